@@ -0,0 +1,43 @@
+"""
+Audit log queries.
+
+Reads the SQLite audit log written by the server (AUDIT_LOG_PATH) and prints
+either aggregate statistics or the latest exchanges as JSON. Safe to run
+while the server is writing: the log uses WAL mode.
+
+Usage:
+    python audit.py summary --hours 24
+    python audit.py recent --limit 20 --session <session id>
+"""
+import argparse
+import json
+import sys
+import time
+
+from src.audit_log import AuditLog
+from src.config import Config
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the conversation audit log")
+    parser.add_argument("command", choices=("summary", "recent"), help="What to print")
+    parser.add_argument("--path", default=Config.AUDIT_LOG_PATH, help="Audit log database")
+    parser.add_argument("--hours", type=float, help="Only exchanges from the last N hours")
+    parser.add_argument("--limit", type=int, default=20, help="Exchanges to print (recent)")
+    parser.add_argument("--session", help="Only this session (recent)")
+    args = parser.parse_args()
+
+    if not args.path:
+        sys.exit("No audit log: set AUDIT_LOG_PATH or pass --path")
+
+    audit_log = AuditLog(args.path)
+    since = time.time() - args.hours * 3600 if args.hours else None
+    if args.command == "summary":
+        print(json.dumps(audit_log.summary(since=since), indent=2))
+    else:
+        for record in audit_log.recent(limit=args.limit, session_id=args.session, since=since):
+            print(json.dumps(record, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Batch question answering.
+
+Runs a JSONL file of queries through the same pipeline as the chat UI
+(answer, quality gate, revision) and appends one JSONL result per query with
+the response, quality scores and stage timings. Rerunning with the same output
+file resumes: completed queries are skipped and failed ones retried.
+
+Each input line holds the query under "query", "message" or "title", with an
+optional "id" and "session_id" (queries sharing a session_id form one
+conversation).
+
+Usage:
+    python batch.py questions.jsonl -o answers.jsonl --concurrency 8
+    python batch.py questions.jsonl -o answers.jsonl --batch-api   # OpenAI Batch API
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from src.config import Config
+
+
+async def run(args) -> dict:
+    from src.ai_system import AIAgentSystem
+    from src.batch import BatchRunner, OpenAIBatchAPI, load_batch_queries
+
+    queries = load_batch_queries(args.input)
+    system = AIAgentSystem()
+
+    batch_api = None
+    if args.batch_api:
+        batch_api = OpenAIBatchAPI(system.openai_client.client, poll_interval=args.poll_interval)
+
+    runner = BatchRunner(system, args.output, concurrency=args.concurrency, batch_api=batch_api)
+    try:
+        return await runner.run(queries, resume=not args.restart)
+    finally:
+        await system.openai_client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of queries through the agent pipeline")
+    parser.add_argument("input", help="JSONL file of queries")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file receiving the results")
+    parser.add_argument("--concurrency", type=int, default=8, help="Conversations processed at once")
+    parser.add_argument("--restart", action="store_true", help="Overwrite the output instead of resuming")
+    parser.add_argument("--batch-api", action="store_true",
+                        help="Generate answers through the OpenAI Batch API (cheaper, slower turnaround)")
+    parser.add_argument("--poll-interval", type=float, default=30.0, help="Batch API status poll interval (s)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not reuse or store cached answers")
+    parser.add_argument("--sample-quality", action="store_true",
+                        help="Keep adaptive quality-check sampling (default: check every answer)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.no_cache:
+        Config.RESPONSE_CACHE_ENABLED = False
+    if not args.sample_quality:
+        # Pre-generated answers are reviewed, so give every one a real quality score
+        Config.QUALITY_SAMPLING_ENABLED = False
+        Config.GROUNDING_ENABLED = False
+
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary))
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
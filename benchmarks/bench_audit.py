@@ -0,0 +1,125 @@
+"""
+Offline benchmark for the audit log.
+
+Runs concurrent conversations through process_query with stub clients (see
+stubs.py), once without and once with the SQLite audit log, and prints the
+request latency of both plus the time spent queueing audit records. Then
+starts a second system on the same database, as after a restart, and checks
+that the sessions were rehydrated, and times the analytics queries.
+
+Usage:
+    python benchmarks/bench_audit.py --conversations 50 --turns 6
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The pipeline validates that keys are present; the stubs never use them
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from src.config import Config
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+def new_system(args):
+    from src.ai_system import AIAgentSystem
+    from benchmarks.stubs import LatencyModel, StubGeminiClient, StubOpenAIClient
+
+    return AIAgentSystem(
+        openai_client=StubOpenAIClient(LatencyModel(args.openai_latency), seed=args.seed),
+        gemini_client=StubGeminiClient(LatencyModel(args.gemini_latency), revision_rate=args.revision_rate,
+                                       seed=args.seed)
+    )
+
+
+async def run_load(system, args) -> list:
+    latencies = []
+
+    async def conversation(number: int):
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            await system.process_query(f"Tell me about project {turn} (conversation {number})",
+                                       session_id=f"bench-audit-{number}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(conversation(number) for number in range(args.conversations)))
+    return latencies
+
+
+async def run(args, path: str):
+    Config.AUDIT_LOG_PATH = ""
+    baseline = await run_load(new_system(args), args)
+
+    Config.AUDIT_LOG_PATH = path
+    system = new_system(args)
+    audit_log = system.audit_log
+    append = audit_log.append
+    append_seconds = []
+
+    def timed_append(record):
+        start = time.perf_counter()
+        append(record)
+        append_seconds.append(time.perf_counter() - start)
+
+    audit_log.append = timed_append
+    audited = await run_load(system, args)
+    system.reset_conversation("bench-audit-0")
+    audit_log.close()
+
+    for name, latencies in (("no audit log", baseline), ("audit log", audited)):
+        print(f"{name:>13}: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms over {len(latencies)} requests")
+    print(f"queueing a record: mean {sum(append_seconds) / len(append_seconds) * 1e6:.1f} us, "
+          f"p99 {percentile(append_seconds, 0.99) * 1e6:.1f} us")
+    print(f"writer: {audit_log.stats()}")
+
+    # A second process on the same database, as after a restart
+    start = time.perf_counter()
+    restarted = new_system(args)
+    restart_seconds = time.perf_counter() - start
+    restored = [restarted.sessions.get(f"bench-audit-{number}") for number in range(args.conversations)]
+    complete = sum(1 for history in restored[1:] if history.interaction_count == args.turns)
+    print(f"rehydrated: {complete}/{args.conversations - 1} sessions with all {args.turns} turns, "
+          f"reset session empty: {restored[0].interaction_count == 0}, startup {restart_seconds:.2f}s")
+
+    start = time.perf_counter()
+    recent = restarted.audit_log.recent(limit=50)
+    recent_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    summary = restarted.audit_log.summary(since=time.time() - 3600)
+    summary_seconds = time.perf_counter() - start
+    print(f"recent(50): {len(recent)} rows in {recent_seconds * 1000:.2f} ms; "
+          f"summary in {summary_seconds * 1000:.2f} ms: {summary}")
+    restarted.audit_log.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline audit log benchmark")
+    parser.add_argument("--conversations", type=int, default=50, help="Concurrent conversations")
+    parser.add_argument("--turns", type=int, default=6, help="Turns per conversation")
+    parser.add_argument("--openai-latency", type=float, default=0.05, help="Median OpenAI latency (s)")
+    parser.add_argument("--gemini-latency", type=float, default=0.03, help="Median Gemini latency (s)")
+    parser.add_argument("--revision-rate", type=float, default=0.1, help="Fraction of answers Gemini rejects")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    args = parser.parse_args()
+
+    Config.FAQ_ENABLED = False
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.CONTENT_RELOAD_ENABLED = False
+    Config.SUMMARY_ENABLED = False
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, os.path.join(directory, "audit.db")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Offline check of the batch runner with stubbed LLM clients.
+
+Runs a query file through BatchRunner online and through the emulated OpenAI
+Batch API (StubBatchAPI), interrupts a run part-way to check that resuming
+completes every query exactly once, and reports throughput.
+
+Usage:
+    python benchmarks/bench_batch.py --requests 300 --concurrency 16
+    python benchmarks/bench_batch.py --batch-api --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The pipeline validates that keys are present; the stubs never use them
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from src.config import Config
+from benchmarks.bench_process_query import DEFAULT_CORPUS
+
+
+def write_queries(path: str, count: int, turns: int):
+    """Query file of `count` queries in conversations of `turns` turns"""
+    with open(path, 'w', encoding='utf-8') as file:
+        for index in range(count):
+            record = {"id": f"q{index}", "query": f"{DEFAULT_CORPUS[index % len(DEFAULT_CORPUS)]} (#{index})"}
+            if turns > 1:
+                record["session_id"] = f"conversation-{index // turns}"
+            file.write(json.dumps(record) + "\n")
+
+
+def read_results(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+async def run_once(args, input_path: str, output_path: str, batch_service=None,
+                   interrupt_after: float = 0.0) -> dict:
+    """One runner invocation on a fresh system; optionally cancelled after some seconds"""
+    from src.ai_system import AIAgentSystem
+    from src.batch import BatchRunner, OpenAIBatchAPI, load_batch_queries
+    from benchmarks.stubs import LatencyModel, StubGeminiClient, StubOpenAIClient
+
+    system = AIAgentSystem(
+        openai_client=StubOpenAIClient(LatencyModel(args.openai_latency), error_rate=args.error_rate,
+                                       seed=args.seed),
+        gemini_client=StubGeminiClient(LatencyModel(args.gemini_latency), error_rate=0.0,
+                                       revision_rate=args.revision_rate, seed=args.seed + 1)
+    )
+    batch_api = None
+    if batch_service is not None:
+        batch_api = OpenAIBatchAPI(batch_service, poll_interval=0.05)
+
+    runner = BatchRunner(system, output_path, concurrency=args.concurrency, batch_api=batch_api)
+    task = asyncio.create_task(runner.run(load_batch_queries(input_path)))
+    if interrupt_after:
+        await asyncio.sleep(interrupt_after)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return runner.summary()
+    return await task
+
+
+async def main_async(args):
+    from benchmarks.stubs import StubBatchAPI
+
+    # Outlives the runs, like the provider's batch service outlives a crashed client
+    batch_service = None
+    if args.batch_api:
+        batch_service = StubBatchAPI(turnaround=args.turnaround, error_rate=args.error_rate, seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "queries.jsonl")
+        output_path = os.path.join(directory, "results.jsonl")
+        write_queries(input_path, args.requests, args.turns)
+
+        first = await run_once(args, input_path, output_path, batch_service, interrupt_after=args.interrupt_after)
+        print(f"interrupted run: {first}")
+
+        # Failed queries are retried on every resume
+        for attempt in range(5):
+            summary = await run_once(args, input_path, output_path, batch_service)
+            print(f"resumed run {attempt + 1}: {summary}")
+            if not summary["failed"]:
+                break
+
+        results = read_results(output_path)
+        completed = {}
+        for record in results:
+            if record["outcome"] in ("ok", "cached", "coalesced"):
+                completed.setdefault(record["id"], 0)
+                completed[record["id"]] += 1
+
+        scores = [record["quality_score"] for record in results if record["quality_score"] is not None]
+        print(f"lines written: {len(results)}, queries completed: {len(completed)}/{args.requests}, "
+              f"duplicates: {sum(1 for count in completed.values() if count > 1)}")
+        if scores:
+            print(f"mean quality score: {sum(scores) / len(scores):.3f}")
+        if batch_service is not None:
+            print(f"batch jobs submitted: {batch_service.submitted}")
+
+        if len(completed) != args.requests or any(count > 1 for count in completed.values()):
+            print("FAIL: resume did not complete every query exactly once")
+            sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline batch runner check with stubbed LLMs")
+    parser.add_argument("--requests", type=int, default=200, help="Number of queries")
+    parser.add_argument("--turns", type=int, default=2, help="Queries per conversation")
+    parser.add_argument("--concurrency", type=int, default=16, help="Conversations processed at once")
+    parser.add_argument("--batch-api", action="store_true", help="Use the emulated OpenAI Batch API")
+    parser.add_argument("--turnaround", type=float, default=0.5, help="Emulated batch turnaround (s)")
+    parser.add_argument("--interrupt-after", type=float, default=1.0, help="Cancel the first run after N seconds")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Median OpenAI latency (s)")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Median Gemini latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of failed answer calls")
+    parser.add_argument("--revision-rate", type=float, default=0.2, help="Fraction of answers Gemini rejects")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    args = parser.parse_args()
+
+    Config.CONTENT_CACHE_ENABLED = False
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.QUALITY_SAMPLING_ENABLED = False
+    Config.PROVIDER_ROUTING_ENABLED = False
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
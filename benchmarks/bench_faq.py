@@ -0,0 +1,130 @@
+"""
+Offline benchmark for the precomputed FAQ index.
+
+Builds an index with FaqBuilder over stub clients (see stubs.py), then sends
+labelled first-turn queries through process_query. Reports how many queries
+were routed to the right entry, routed wrongly or fell through, and the
+latency of FAQ-served turns against turns that went to the (stub) LLMs.
+
+Usage:
+    python benchmarks/bench_faq.py
+    python benchmarks/bench_faq.py --threshold 0.7 --margin 0.1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The pipeline validates that keys are present; the stubs never use them
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from src.config import Config
+from src.tracing import RequestTrace
+
+# (query, FAQ entry it should be served from, or None if it needs the LLM)
+LABELLED_QUERIES = [
+    ("What is Brian's experience?", "experience"),
+    ("Tell me about your professional background.", "experience"),
+    ("what's your work history", "experience"),
+    ("What are your key achievements?", "achievements"),
+    ("What technical skills does he have?", "skills"),
+    ("What is his expertise?", "skills"),
+    ("What is Brian's leadership experience?", "leadership"),
+    ("How does he lead teams?", "leadership"),
+    ("Walk me through his career path", "career_progression"),
+    ("Is he open to CTO roles?", "availability"),
+    ("Is Brian available for a CIO position?", "availability"),
+    ("Who is Brian Veau?", "introduction"),
+    ("Tell me about yourself", "introduction"),
+    ("Which ERP systems has he deployed?", None),
+    ("What did he achieve at Louis Vuitton?", None),
+    ("How large were the teams he managed in Asia?", None),
+    ("What cloud platforms does he know?", None),
+    ("Does he have experience with SAP S/4HANA migrations?", None),
+    ("What certifications does he hold?", None),
+    ("What is his educational background?", None),
+    ("Would he relocate to Singapore for a CTO role?", None),
+    ("What was his budget responsibility as CIO?", None),
+]
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+async def run(args):
+    from src.ai_system import AIAgentSystem
+    from src.faq import DEFAULT_FAQ, FaqBuilder, FaqIndex, save_faq_index
+    from benchmarks.stubs import LatencyModel, StubGeminiClient, StubOpenAIClient
+
+    system = AIAgentSystem(
+        openai_client=StubOpenAIClient(LatencyModel(args.openai_latency), seed=args.seed),
+        gemini_client=StubGeminiClient(LatencyModel(args.gemini_latency), revision_rate=args.revision_rate,
+                                       seed=args.seed)
+    )
+
+    start = time.perf_counter()
+    entries = await FaqBuilder(system, min_confidence=Config.FAQ_MIN_CONFIDENCE).build(DEFAULT_FAQ)
+    build_seconds = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "faq_index.json")
+        save_faq_index(path, entries, system.content_hash, "stub")
+        index_bytes = os.path.getsize(path)
+        system.faq_index = FaqIndex.load(path, threshold=args.threshold, margin=args.margin)
+    print(f"built {len(entries)}/{len(DEFAULT_FAQ)} entries in {build_seconds:.2f}s ({index_bytes} bytes)")
+
+    stored = {entry.id for entry in entries}
+    correct = wrong = missed = 0
+    faq_seconds, llm_seconds = [], []
+    for number, (query, expected) in enumerate(LABELLED_QUERIES):
+        trace = RequestTrace()
+        await system.process_query(query, session_id=f"bench-faq-{number}", trace=trace)
+        served = trace.attributes.get("outcome") == "faq"
+        routed = trace.attributes.get("faq_entry") if served else None
+        if served:
+            faq_seconds.append(trace.elapsed())
+            if routed == expected:
+                correct += 1
+            else:
+                wrong += 1
+                print(f"  wrong route: {query!r} -> {routed} (expected {expected})")
+        else:
+            llm_seconds.append(trace.elapsed())
+            if expected in stored:
+                missed += 1
+                print(f"  fell through: {query!r} (expected {expected})")
+
+    stats = system.faq_index.stats()
+    print(f"routed correctly: {correct}, routed wrongly: {wrong}, missed FAQ matches: {missed}")
+    print(f"fall-through rate: {stats['fall_through_rate']:.2f} over {stats['hits'] + stats['fall_throughs']} lookups")
+    print(f"FAQ turns:  p50 {percentile(faq_seconds, 0.5) * 1000:.2f} ms, "
+          f"p95 {percentile(faq_seconds, 0.95) * 1000:.2f} ms")
+    print(f"LLM turns:  p50 {percentile(llm_seconds, 0.5) * 1000:.2f} ms, "
+          f"p95 {percentile(llm_seconds, 0.95) * 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline FAQ index benchmark")
+    parser.add_argument("--threshold", type=float, default=Config.FAQ_MATCH_THRESHOLD, help="Match threshold")
+    parser.add_argument("--margin", type=float, default=Config.FAQ_MATCH_MARGIN, help="Lead over the runner-up")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Median OpenAI latency (s)")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Median Gemini latency (s)")
+    parser.add_argument("--revision-rate", type=float, default=0.1, help="Fraction of answers Gemini rejects")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    args = parser.parse_args()
+
+    Config.FAQ_ENABLED = False
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.QUALITY_SAMPLING_ENABLED = False
+    Config.CONTENT_RELOAD_ENABLED = False
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Offline benchmark for the local groundedness check.
+
+Scores labelled answers (genuine ones, including replies to CTO openings,
+availability and relocation questions that repeat the recruiter's wording,
+and ones with invented employers, figures, dates and titles, including a
+reply that repeats a leading question's invented claims) against the
+real resume and personal info. Prints the verdict for each, the confusion
+against the labels and the time per check, and exits non-zero if a genuine
+answer is called "fabricated" or a fabricated one "grounded"; "uncertain"
+is the safe fallback that sends an answer to Gemini.
+
+Usage:
+    python benchmarks/bench_grounding.py
+    python benchmarks/bench_grounding.py --min-claims 2 --fail-min-unsupported 1
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The pipeline validates that keys are present; the stubs never use them
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from src.config import Config
+
+# (query, answer, label): "genuine" answers must never be called "fabricated",
+# "fabricated" ones never "grounded"; "uncertain" sends either to Gemini
+LABELLED_ANSWERS = [
+    ("How large were the teams he managed?",
+     "I led 30 IT professionals across 10 countries, supporting more than 3000 employees. "
+     "I also upgraded our cybersecurity from D to A score.", "genuine"),
+    ("What private equity experience does he have?",
+     "In private equity I supported a portfolio of 20 companies with about 15000 staff, "
+     "in verticals such as Automotive, Medical and Maritime services.", "genuine"),
+    ("What has he built?",
+     "As Global CIO I built a cloud solution on the SalesForce platform for Fund administration "
+     "and Limited Partners reporting, and I delivered ERP projects with regular Steering Committees.", "genuine"),
+    ("Where is he based?",
+     "I have been based in Singapore for 13 years, originally from France, and I manage business "
+     "projects valued at $2-3 million USD.", "genuine"),
+    ("We have a CTO opportunity at Acme Corp. Would Brian be interested?",
+     "Thank you, I'm interested in hearing more about the CTO opportunity at Acme Corp. As Global CIO "
+     "I led 30 IT professionals across 10 countries and delivered ERP projects under aggressive timelines.",
+     "genuine"),
+    ("Is he open to CTO roles in Singapore or Hong Kong?",
+     "Yes, I'm open to CTO roles in Singapore and Hong Kong. I'm based in Singapore and have led "
+     "regional IT transformation programs across 10 countries.", "genuine"),
+    ("Would he relocate to Europe for a CIO position?",
+     "I'm open to discussing relocation for the right CIO position. I'm originally from France and "
+     "have worked across multi-geography environments.", "genuine"),
+    ("Does he have an MBA from INSEAD?",
+     "I don't hold an MBA from INSEAD; my strengths come from hands-on IT leadership, leading 30 IT "
+     "professionals across 10 countries.", "genuine"),
+    ("What did he do before?",
+     "I joined Google in 2015 as CTO, where I managed 450 engineers across 40 countries.", "fabricated"),
+    ("What was his budget?",
+     "At Microsoft I was Chief Data Officer from 2009, running a $75 million budget.", "fabricated"),
+    ("What was his previous role?",
+     "I spent 2012 to 2016 as VP of Engineering at Amazon, scaling the team to 600 people.", "fabricated"),
+    ("How large were the teams he managed?",
+     "I led 30 IT professionals and later joined Tesla as Head of Security in 2021 with 250 reports.",
+     "fabricated"),
+    ("Did Brian work at Google as CTO in 2019 managing 450 engineers?",
+     "Yes, I worked at Google as CTO in 2019, managing 450 engineers.", "fabricated"),
+]
+
+# Verdicts a label must never receive
+WRONG_VERDICT = {"genuine": "fabricated", "fabricated": "grounded"}
+
+
+def run(args):
+    from src.ai_system import AIAgentSystem
+    from src.groundedness import GroundednessChecker
+    from benchmarks.stubs import LatencyModel, StubGeminiClient, StubOpenAIClient
+
+    system = AIAgentSystem(
+        openai_client=StubOpenAIClient(LatencyModel(0.01)),
+        gemini_client=StubGeminiClient(LatencyModel(0.01))
+    )
+    checker = GroundednessChecker(
+        pass_threshold=args.pass_threshold,
+        min_claims=args.min_claims,
+        fail_threshold=args.fail_threshold,
+        fail_min_unsupported=args.fail_min_unsupported
+    )
+    index = system.content.grounding
+
+    confusion = {}
+    for query, answer, expected in LABELLED_ANSWERS:
+        result = checker.check(answer, index, query)
+        confusion[(expected, result.verdict)] = confusion.get((expected, result.verdict), 0) + 1
+        unsupported = ", ".join(text for _, text in result.unsupported) or "-"
+        echoed = ", ".join(text for _, text in result.echoed) or "-"
+        print(f"{expected:>10} -> {result.verdict:<10} {result.supported}/{result.claims}  "
+              f"unsupported: {unsupported}  only in query: {echoed}")
+
+    print()
+    for expected in WRONG_VERDICT:
+        row = ", ".join(f"{verdict}: {confusion.get((expected, verdict), 0)}"
+                        for verdict in ("grounded", "uncertain", "fabricated"))
+        print(f"labelled {expected}: {row}")
+    wrong = sum(confusion.get((expected, verdict), 0) for expected, verdict in WRONG_VERDICT.items())
+    print(f"opposite verdicts: {wrong}")
+
+    timings = []
+    for _ in range(args.repeat):
+        for query, answer, _ in LABELLED_ANSWERS:
+            start = time.perf_counter()
+            checker.check(answer, index, query)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"check time: mean {statistics.mean(timings) * 1e6:.0f} us, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} us over {len(timings)} checks")
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline groundedness check benchmark")
+    parser.add_argument("--pass-threshold", type=float, default=Config.GROUNDING_PASS_THRESHOLD)
+    parser.add_argument("--min-claims", type=int, default=Config.GROUNDING_MIN_CLAIMS)
+    parser.add_argument("--fail-threshold", type=float, default=Config.GROUNDING_FAIL_THRESHOLD)
+    parser.add_argument("--fail-min-unsupported", type=int, default=Config.GROUNDING_FAIL_MIN_UNSUPPORTED)
+    parser.add_argument("--repeat", type=int, default=200, help="Timing passes over the answers")
+    args = parser.parse_args()
+
+    Config.CONTENT_RELOAD_ENABLED = False
+    if run(args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
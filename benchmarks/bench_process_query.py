@@ -0,0 +1,204 @@
+"""
+Offline throughput/latency benchmark for AIAgentSystem.process_query.
+
+Replaces OpenAIClient and GeminiClient with local stubs (see stubs.py) and
+replays a query corpus at a fixed concurrency. Reports latency percentiles,
+requests per second, and how request time splits between prompt building,
+network waits and the rest of our own code.
+
+The corpus is a JSONL file with one query per line under "query" (or
+"message"/"title"); without --corpus a built-in set of recruiter questions is
+used.
+
+Usage:
+    python benchmarks/bench_process_query.py --requests 500 --concurrency 32
+    python benchmarks/bench_process_query.py --mode pipelined --revision-rate 0.3
+    python benchmarks/bench_process_query.py --max-p95 2.5   # exit 1 on regression
+    python benchmarks/bench_process_query.py --openai-slow-rate 0.1   # partial OpenAI outage
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The pipeline validates that keys are present; the stubs never use them
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from src.config import Config
+from src.tracing import RequestTrace
+
+DEFAULT_CORPUS = [
+    "What is Brian's leadership experience?",
+    "Is he open to CTO roles?",
+    "Which ERP systems has he deployed?",
+    "Tell me about his cybersecurity achievements.",
+    "How large were the teams he managed?",
+    "What cloud platforms does he know?",
+    "What did he achieve at Louis Vuitton?",
+    "What certifications does he hold?",
+    "Describe his experience with private equity portfolios.",
+    "What is his management style?",
+    "Which languages does he speak?",
+    "What is his educational background?",
+]
+
+NETWORK_STAGES = ("openai", "gemini", "quality_check", "revision", "revision_speculative")
+
+
+def load_corpus(path: str) -> list:
+    """Load queries from a JSONL file"""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            query = record.get("query") or record.get("message") or record.get("title")
+            if query:
+                queries.append(query)
+    return queries
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def run_benchmark(args) -> dict:
+    """Replay the corpus through process_query and collect measurements"""
+    from src.ai_system import AIAgentSystem
+    from benchmarks.stubs import LatencyModel, StubGeminiClient, StubOpenAIClient
+
+    openai_error_rate = args.error_rate if args.openai_error_rate is None else args.openai_error_rate
+    openai_stub = StubOpenAIClient(
+        LatencyModel(args.openai_latency, args.sigma, slow_rate=args.openai_slow_rate),
+        error_rate=openai_error_rate, seed=args.seed
+    )
+    gemini_stub = StubGeminiClient(
+        LatencyModel(args.gemini_latency, args.sigma), error_rate=args.error_rate,
+        revision_rate=args.revision_rate, seed=args.seed + 1
+    )
+    system = AIAgentSystem(openai_client=openai_stub, gemini_client=gemini_stub)
+
+    corpus = load_corpus(args.corpus) if args.corpus else DEFAULT_CORPUS
+    rng = random.Random(args.seed)
+    jobs = [(f"bench-{i % args.sessions}" if args.sessions else f"bench-{i}", rng.choice(corpus))
+            for i in range(args.requests)]
+
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    latencies = []
+    traces = []
+
+    async def worker():
+        while True:
+            try:
+                session_id, query = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            trace = RequestTrace()
+            start = time.perf_counter()
+            await system.process_query(query, session_id=session_id, trace=trace)
+            latencies.append(time.perf_counter() - start)
+            traces.append(trace)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall_time = time.perf_counter() - start
+
+    latencies.sort()
+    total_time = sum(latencies)
+    prompt_build = sum(t.spans.get("prompt_build", 0.0) for t in traces)
+    network = sum(t.spans.get(stage, 0.0) for t in traces for stage in NETWORK_STAGES)
+
+    return {
+        "mode": Config.QUALITY_PIPELINE_MODE,
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "wall_time": wall_time,
+        "rps": len(latencies) / wall_time if wall_time else 0.0,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "prompt_build_share": prompt_build / total_time if total_time else 0.0,
+        "network_share": network / total_time if total_time else 0.0,
+        "other_share": max(0.0, 1.0 - (prompt_build + network) / total_time) if total_time else 0.0,
+        "prompt_build_mean_ms": prompt_build / len(traces) * 1000 if traces else 0.0,
+        "openai_calls": openai_stub.calls,
+        "gemini_calls": gemini_stub.calls,
+        "cache": system.response_cache.stats() if system.response_cache else None,
+        "quality_sampling": system.quality_sampler.stats() if system.quality_sampler else None,
+        "providers": system.router.stats() if system.router else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline process_query benchmark with stubbed LLMs")
+    parser.add_argument("--corpus", help="JSONL file of queries")
+    parser.add_argument("--requests", type=int, default=200, help="Number of queries to replay")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight queries")
+    parser.add_argument("--sessions", type=int, default=0,
+                        help="Spread queries over N multi-turn sessions (default: one session per query)")
+    parser.add_argument("--mode", choices=["serial", "pipelined", "skip"], help="Quality pipeline mode")
+    parser.add_argument("--openai-latency", type=float, default=0.8, help="Median OpenAI latency (s)")
+    parser.add_argument("--gemini-latency", type=float, default=0.6, help="Median Gemini latency (s)")
+    parser.add_argument("--sigma", type=float, default=0.3, help="Log-normal latency spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of failed LLM calls")
+    parser.add_argument("--openai-error-rate", type=float, help="Fraction of failed OpenAI calls (default: --error-rate)")
+    parser.add_argument("--openai-slow-rate", type=float, default=0.0,
+                        help="Fraction of OpenAI calls that take 10x longer")
+    parser.add_argument("--no-routing", action="store_true", help="Disable provider hedging and failover")
+    parser.add_argument("--revision-rate", type=float, default=0.2, help="Fraction of answers Gemini rejects")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the response cache")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--max-p95", type=float, help="Exit with status 1 if p95 latency exceeds this (s)")
+    args = parser.parse_args()
+
+    if args.mode:
+        Config.QUALITY_PIPELINE_MODE = args.mode
+    if args.no_cache:
+        Config.RESPONSE_CACHE_ENABLED = False
+    if args.no_routing:
+        Config.PROVIDER_ROUTING_ENABLED = False
+    Config.CONTENT_CACHE_ENABLED = False
+
+    results = asyncio.run(run_benchmark(args))
+
+    print(f"mode={results['mode']} requests={results['requests']} concurrency={results['concurrency']}")
+    print(f"throughput: {results['rps']:.1f} req/s over {results['wall_time']:.2f}s")
+    print(f"latency:    p50={results['p50']:.3f}s p95={results['p95']:.3f}s p99={results['p99']:.3f}s")
+    print(f"time split: prompt build {results['prompt_build_share']:.2%} "
+          f"({results['prompt_build_mean_ms']:.3f} ms/req), network {results['network_share']:.2%}, "
+          f"other {results['other_share']:.2%}")
+    print(f"llm calls:  openai={results['openai_calls']} gemini={results['gemini_calls']}")
+    if results["cache"]:
+        print(f"cache:      {results['cache']}")
+    if results["quality_sampling"]:
+        print(f"sampling:   {results['quality_sampling']}")
+    if results["providers"]:
+        print(f"providers:  {results['providers']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.max_p95 is not None and results["p95"] > args.max_p95:
+        print(f"FAIL: p95 {results['p95']:.3f}s exceeds {args.max_p95:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark for parsing Gemini quality-check responses.
+
+Compares the previous fence-slicing parser (strip, slice off ```json fences,
+json.loads, ResponseQuality(**data)) with structured_output.parse_model over
+a corpus of well-formed and malformed responses. Reports how many responses
+each parser accepts and the mean parse time per response.
+
+The corpus is a JSONL file with one raw response text per line under "text"
+(e.g. collected from TRACE logs); without --corpus a built-in set modelled on
+observed Gemini output is used.
+
+Usage:
+    python benchmarks/bench_quality_parse.py
+    python benchmarks/bench_quality_parse.py --corpus responses.jsonl --iterations 20000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models import ResponseQuality
+from src.structured_output import parse_model
+
+_BODY = ('{"is_professional": true, "is_relevant": true, "is_based_on_resume": %s, '
+         '"confidence_score": %s, "feedback": "%s", "requires_revision": %s}')
+_PASS = _BODY % ("true", "0.92", "Accurate and concise; cites the NetSuite rollout.", "false")
+_FAIL = _BODY % ("false", "0.41", "Mentions an AWS certification that is not in the resume.", "true")
+
+DEFAULT_CORPUS = [
+    # Structured output: plain JSON
+    _PASS,
+    _FAIL,
+    json.dumps(json.loads(_PASS), indent=2),
+    # Fenced, as free-text mode usually answers
+    f"```json\n{_PASS}\n```",
+    f"```\n{_FAIL}\n```",
+    # Fence followed by whitespace or a remark (the slices cut into the JSON)
+    f"```json\n{_PASS}\n```\n",
+    f"```json\n{_FAIL}\n```\nLet me know if you need more detail.",
+    # Prose around the object
+    f"Here is my assessment:\n{_PASS}",
+    f"Assessment: {_FAIL} (scores are 0-1)",
+    # Braces and escaped quotes inside the feedback string
+    _BODY % ("true", "0.88", 'Good; the \\"{team of 30}\\" detail is supported.', "false"),
+    # Trailing comma
+    _PASS[:-1] + ",}",
+    # Truncated by the output limit; fields are missing, so it stays rejected
+    _FAIL[:-40],
+    # String booleans and scores, accepted by validation
+    _BODY % ('"true"', '"0.8"', "Fine.", '"false"'),
+    # Unrecoverable
+    "",
+    "I cannot assess this response.",
+    '{"is_professional": true, "confidence_score": 1.7}',
+]
+
+
+def legacy_parse(text: str):
+    """Parser used before structured output (fixed fence slices)"""
+    try:
+        json_str = text.strip()
+        if json_str.startswith("```json"):
+            json_str = json_str[7:-3]
+        elif json_str.startswith("```"):
+            json_str = json_str[3:-3]
+        return ResponseQuality(**json.loads(json_str))
+    except Exception:
+        return None
+
+
+def structured_parse(text: str):
+    return parse_model(text, ResponseQuality)[0]
+
+
+def load_corpus(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as file:
+        return [json.loads(line)["text"] for line in file if line.strip()]
+
+
+def measure(parse, corpus: list, iterations: int) -> tuple:
+    """Accepted responses and mean seconds per parse"""
+    accepted = sum(1 for text in corpus if parse(text) is not None)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in corpus:
+            parse(text)
+    return accepted, (time.perf_counter() - start) / (iterations * len(corpus))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gemini quality-response parsing micro-benchmark")
+    parser.add_argument("--corpus", help="JSONL file of raw responses under \"text\"")
+    parser.add_argument("--iterations", type=int, default=5000, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else DEFAULT_CORPUS
+    clean = [text for text in corpus if legacy_parse(text) is not None]
+
+    plain = [text for text in corpus if text.lstrip().startswith("{") and legacy_parse(text) is not None]
+
+    print(f"corpus: {len(corpus)} responses ({len(clean)} accepted by the legacy parser, "
+          f"{len(plain)} plain JSON)")
+    for name, parse in (("legacy", legacy_parse), ("structured", structured_parse)):
+        accepted, seconds = measure(parse, corpus, args.iterations)
+        _, clean_seconds = measure(parse, clean, args.iterations)
+        _, plain_seconds = measure(parse, plain, args.iterations)
+        print(f"{name:>10}: accepted {accepted}/{len(corpus)}; us/response: {seconds * 1e6:.1f} overall, "
+              f"{clean_seconds * 1e6:.1f} legacy-parsable, {plain_seconds * 1e6:.1f} plain JSON")
+
+
+if __name__ == "__main__":
+    main()
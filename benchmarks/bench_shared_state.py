@@ -0,0 +1,225 @@
+"""
+Offline multi-worker check of the shared state backends.
+
+Starts worker processes against a SQLite file and against a local
+Redis stand-in (fakeredis' TCP server), with stub LLM clients (see
+stubs.py), and checks what the workers must share:
+
+- a session started on one worker continues on the other,
+- an answer approved on one worker is served from cache on the other,
+- two workers hammering one rate limiter together stay within a single
+  per-minute budget.
+
+Finally one worker runs against a Redis address that accepts connections
+but never answers, and the longest event-loop stall is measured. It should
+stay within SHARED_BACKEND_TIMEOUT_SECONDS, and requests should still
+complete.
+
+Exits with status 1 if any check fails.
+
+Usage:
+    python benchmarks/bench_shared_state.py
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SESSION = "bench-shared-session"
+CACHED_QUERY = "Which ERP systems has he deployed?"
+
+
+def configure(url: str):
+    """Point this process at a backend; must run before src is imported"""
+    # The pipeline validates that keys are present; the stubs never use them
+    os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ["SHARED_BACKEND_URL"] = url
+
+    from src.config import Config
+    Config.FAQ_ENABLED = False
+    Config.SUMMARY_ENABLED = False
+    Config.CONTENT_RELOAD_ENABLED = False
+    # Every answer gets a Gemini verdict, so approved answers are cached
+    Config.QUALITY_SAMPLING_ENABLED = False
+    Config.GROUNDING_ENABLED = False
+
+
+def new_system(seed: int):
+    from src.ai_system import AIAgentSystem
+    from benchmarks.stubs import LatencyModel, StubGeminiClient, StubOpenAIClient
+
+    return AIAgentSystem(
+        openai_client=StubOpenAIClient(LatencyModel(0.01), seed=seed),
+        gemini_client=StubGeminiClient(LatencyModel(0.01), revision_rate=0.0, seed=seed)
+    )
+
+
+def run_turn(url: str, turn: int, results):
+    """One worker's part of the session and cache handoff"""
+    configure(url)
+    from src.tracing import RequestTrace
+
+    async def main():
+        system = new_system(seed=turn)
+        await system.process_query(f"Tell me about his leadership (turn {turn})", session_id=SESSION)
+        history = await system.sessions.aget(SESSION)
+
+        trace = RequestTrace()
+        await system.process_query(CACHED_QUERY, session_id=f"bench-shared-cache-{turn}", trace=trace)
+        system.shared_backend.flush(timeout=5)
+        results.put((turn, history.interaction_count, trace.attributes.get("outcome", "ok")))
+
+    asyncio.run(main())
+
+
+def run_budget(url: str, barrier, seconds: float, requests_per_minute: int, results):
+    """Admit as many calls as one shared per-minute budget allows"""
+    configure(url)
+    from src.rate_limiter import ProviderLimiter
+    from src.shared_state import get_shared_backend
+
+    async def main():
+        limiter = ProviderLimiter("bench-shared", requests_per_minute=requests_per_minute,
+                                  backend=get_shared_backend(url))
+        barrier.wait()
+        admitted = 0
+        deadline = time.monotonic() + seconds
+
+        async def caller():
+            nonlocal admitted
+            while time.monotonic() < deadline:
+                try:
+                    async with asyncio.timeout(max(deadline - time.monotonic(), 0.001)):
+                        async with limiter.slot():
+                            admitted += 1
+                except TimeoutError:
+                    return
+
+        await asyncio.gather(*(caller() for _ in range(8)))
+        results.put(admitted)
+
+    asyncio.run(main())
+
+
+def run_unresponsive(url: str, queries: int, results):
+    """Requests against a backend that never answers, measuring event-loop stalls"""
+    configure(url)
+    from src.config import Config
+    from src.rate_limiter import ProviderLimiter
+
+    async def main():
+        system = new_system(seed=1)
+        limiter = ProviderLimiter("bench-unresponsive", requests_per_minute=600, backend=system.shared_backend)
+        stalls = []
+        done = asyncio.Event()
+
+        async def ticker():
+            while not done.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(0.005)
+                stalls.append(time.perf_counter() - start - 0.005)
+
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        completed = 0
+        for number in range(queries):
+            async with limiter.slot():
+                response, _ = await system.process_query(f"What cloud platforms does he know? ({number})",
+                                                         session_id=f"bench-unresponsive-{number}")
+            completed += bool(response)
+        elapsed = time.perf_counter() - start
+        done.set()
+        await task
+        results.put((completed, elapsed, max(stalls), Config.SHARED_BACKEND_TIMEOUT_SECONDS))
+
+    asyncio.run(main())
+
+
+def start_fake_redis() -> str:
+    from fakeredis import TcpFakeServer
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"redis://127.0.0.1:{port}/0"
+
+
+def start_blackhole() -> tuple:
+    """A listening socket that accepts connections and never replies"""
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(64)
+    return listener, f"redis://127.0.0.1:{listener.getsockname()[1]}/0"
+
+
+def check_backend(context, name: str, url: str, args) -> bool:
+    results = context.Queue()
+    for turn in (1, 2):
+        # Sequential workers: the second only sees what the first shared
+        process = context.Process(target=run_turn, args=(url, turn, results))
+        process.start()
+        process.join()
+    turns = dict((turn, (count, outcome)) for turn, count, outcome in (results.get() for _ in range(2)))
+    handoff = turns[2][0] == 2
+    cache_shared = turns[2][1] == "cached"
+
+    barrier = context.Barrier(2)
+    workers = [context.Process(target=run_budget,
+                               args=(url, barrier, args.budget_seconds, args.requests_per_minute, results))
+               for _ in range(2)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    admitted = [results.get() for _ in workers]
+    allowed = args.requests_per_minute * (1 + args.budget_seconds / 60.0)
+    budget_shared = sum(admitted) <= allowed + 2
+
+    print(f"{name}: session handoff {'ok' if handoff else 'FAILED'} (turns seen by worker 2: {turns[2][0]}), "
+          f"shared cache {'ok' if cache_shared else 'FAILED'} (outcome: {turns[2][1]}), "
+          f"budget {'ok' if budget_shared else 'FAILED'} (admitted {admitted}, one budget allows {allowed:.0f})")
+    return handoff and cache_shared and budget_shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker shared state check")
+    parser.add_argument("--requests-per-minute", type=int, default=120, help="Shared request budget")
+    parser.add_argument("--budget-seconds", type=float, default=2.0, help="How long the workers compete")
+    parser.add_argument("--queries", type=int, default=6, help="Requests against the unresponsive backend")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    passed = True
+    with tempfile.TemporaryDirectory() as directory:
+        passed &= check_backend(context, "sqlite", f"sqlite:///{os.path.join(directory, 'state.db')}", args)
+    passed &= check_backend(context, "redis (fakeredis)", start_fake_redis(), args)
+
+    listener, url = start_blackhole()
+    results = context.Queue()
+    process = context.Process(target=run_unresponsive, args=(url, args.queries, results))
+    process.start()
+    process.join()
+    listener.close()
+    completed, elapsed, max_stall, timeout = results.get()
+    bounded = completed == args.queries and max_stall <= timeout + 0.1
+    print(f"unresponsive redis: {completed}/{args.queries} requests in {elapsed:.2f}s, "
+          f"longest event-loop stall {max_stall * 1000:.0f} ms (timeout {timeout * 1000:.0f} ms) "
+          f"{'ok' if bounded else 'FAILED'}")
+    passed &= bounded
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Offline benchmark for conversation summarization.
+
+Runs long conversations through process_query with stub clients (see
+stubs.py), once keeping the raw history window and once with background
+summarization, and prints the answer prompt size per turn plus request
+latency. Summaries are generated by the stub Gemini client with its own
+latency; the pipeline never waits for them.
+
+Usage:
+    python benchmarks/bench_summary.py --turns 15 --conversations 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The pipeline validates that keys are present; the stubs never use them
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from src.config import Config
+from src.tracing import RequestTrace
+
+QUESTIONS = [
+    "What is Brian's leadership experience?",
+    "Which ERP systems has he deployed?",
+    "Tell me about his cybersecurity work.",
+    "How large were the teams he managed?",
+    "What did he achieve at Louis Vuitton?",
+    "What cloud platforms does he know?",
+    "Describe his experience with private equity portfolios.",
+    "What is his management style?",
+]
+
+HISTORY_SECTIONS = ("history", "history_recent", "history_older", "history_summary")
+
+
+async def run_mode(args, summarize: bool) -> tuple:
+    Config.SUMMARY_ENABLED = summarize
+    from src.ai_system import AIAgentSystem
+    from benchmarks.stubs import LatencyModel, StubGeminiClient, StubOpenAIClient
+
+    system = AIAgentSystem(
+        openai_client=StubOpenAIClient(LatencyModel(args.openai_latency), seed=args.seed),
+        gemini_client=StubGeminiClient(LatencyModel(args.gemini_latency), revision_rate=0.0, seed=args.seed)
+    )
+
+    prompt_tokens = [[] for _ in range(args.turns)]
+    history_tokens = [[] for _ in range(args.turns)]
+    latencies = []
+
+    async def conversation(number: int):
+        for turn in range(args.turns):
+            # Vary the wording so answers are neither cached nor coalesced
+            query = f"{QUESTIONS[turn % len(QUESTIONS)]} (conversation {number}, turn {turn})"
+            trace = RequestTrace()
+            start = time.perf_counter()
+            await system.process_query(query, session_id=f"bench-summary-{number}", trace=trace)
+            latencies.append(time.perf_counter() - start)
+            prompt_tokens[turn].append(sum(value for name, value in trace.counters.items()
+                                           if name not in ("quality_check", "revision")))
+            history_tokens[turn].append(sum(trace.counters.get(name, 0) for name in HISTORY_SECTIONS))
+            await asyncio.sleep(args.think_time)
+
+    await asyncio.gather(*(conversation(number) for number in range(args.conversations)))
+    if system.summarizer is not None:
+        await system.summarizer.wait_idle()
+    stats = system.summarizer.stats() if system.summarizer else None
+    return prompt_tokens, history_tokens, latencies, stats
+
+
+async def run(args):
+    Config.FAQ_ENABLED = False
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.CONTENT_RELOAD_ENABLED = False
+
+    results = {}
+    for name, summarize in (("raw window", False), ("summary", True)):
+        results[name] = await run_mode(args, summarize)
+
+    print(f"{'turn':>5} " + " ".join(f"{name + ' prompt/history':>28}" for name in results))
+    for turn in range(args.turns):
+        cells = []
+        for prompt_tokens, history_tokens, _, _ in results.values():
+            cells.append(f"{statistics.mean(prompt_tokens[turn]):>18.0f}/"
+                         f"{statistics.mean(history_tokens[turn]):<9.0f}")
+        print(f"{turn + 1:>5} " + " ".join(cells))
+
+    for name, (_, _, latencies, stats) in results.items():
+        ordered = sorted(latencies)
+        print(f"{name}: p50 {ordered[len(ordered) // 2] * 1000:.0f} ms, "
+              f"p95 {ordered[int(len(ordered) * 0.95)] * 1000:.0f} ms; summaries: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation summarization benchmark")
+    parser.add_argument("--turns", type=int, default=12, help="Turns per conversation")
+    parser.add_argument("--conversations", type=int, default=4, help="Concurrent conversations")
+    parser.add_argument("--think-time", type=float, default=0.05, help="Pause between a user's turns (s)")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Median OpenAI latency (s)")
+    parser.add_argument("--gemini-latency", type=float, default=0.2, help="Median Gemini latency (s)")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
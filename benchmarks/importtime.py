@@ -0,0 +1,80 @@
+"""
+Import-time profile summarized per top-level package.
+
+Runs a fresh interpreter with `python -X importtime`, parses the timing
+lines it writes to stderr and reports self time per top-level package,
+so cold-start regressions show up as a single row changing.
+
+Usage:
+    python benchmarks/importtime.py                 # profile `import main`
+    python benchmarks/importtime.py src.ai_system --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def profile_imports(module: str) -> list:
+    """
+    Import a module in a fresh interpreter and collect -X importtime records
+
+    Args:
+        module: Dotted module name to import
+
+    Returns:
+        List of (module_name, self_us, cumulative_us) tuples
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True
+    )
+
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header row
+        records.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+
+    if result.returncode != 0 and not records:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    return records
+
+
+def summarize(records: list) -> list:
+    """Sum self time and module counts per top-level package, slowest first"""
+    totals = defaultdict(lambda: [0, 0])
+    for name, self_us, _ in records:
+        package = name.split(".")[0]
+        totals[package][0] += self_us
+        totals[package][1] += 1
+    return sorted(((pkg, us, count) for pkg, (us, count) in totals.items()), key=lambda row: -row[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize -X importtime per top-level package")
+    parser.add_argument("module", nargs="?", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="Number of packages to show")
+    args = parser.parse_args()
+
+    records = profile_imports(args.module)
+    rows = summarize(records)
+    total_us = sum(us for _, us, _ in rows)
+
+    print(f"{'package':<32} {'self (ms)':>10} {'share':>7} {'modules':>8}")
+    for package, us, count in rows[:args.top]:
+        print(f"{package:<32} {us / 1000:>10.1f} {us / total_us:>6.1%} {count:>8}")
+    print(f"{'total':<32} {total_us / 1000:>10.1f} {'':>7} {len(records):>8}")
+
+
+if __name__ == "__main__":
+    main()
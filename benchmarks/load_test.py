@@ -0,0 +1,235 @@
+"""
+Concurrency load test for OpenAIClient against a local stub server.
+
+Starts an OpenAI-compatible chat completions endpoint on localhost that
+answers after a fixed delay, then fires batches of concurrent requests
+through OpenAIClient. With a non-blocking client the wall time of a batch
+stays close to a single round trip as concurrency grows.
+
+With --stream the stub sends server-sent events, one token every
+--token-delay seconds, and the report adds time-to-first-token.
+
+Usage:
+    python benchmarks/load_test.py --delay 0.5 --concurrency 1 2 4 8 16 32
+    python benchmarks/load_test.py --stream --delay 0.3 --token-delay 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubOpenAIServer:
+    """Minimal HTTP/1.1 server answering /v1/chat/completions after a delay"""
+
+    STREAM_TOKENS = ["Stub ", "streamed ", "response ", "with ", "several ", "tokens."]
+
+    def __init__(self, delay: float, token_delay: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.delay = delay
+        self.token_delay = token_delay
+        self.host = host
+        self.port = port
+        self.server = None
+        self.requests_served = 0
+
+    async def start(self) -> str:
+        """Start listening and return the base URL"""
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def stop(self):
+        """Stop the server"""
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                content_length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        content_length = int(value.strip())
+
+                payload = {}
+                if content_length:
+                    payload = json.loads(await reader.readexactly(content_length))
+
+                await asyncio.sleep(self.delay)
+                self.requests_served += 1
+
+                if payload.get("stream"):
+                    await self._write_stream(writer)
+                    continue
+
+                body = json.dumps({
+                    "id": f"chatcmpl-stub-{self.requests_served}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "stub",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "Stub response."},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13}
+                }).encode()
+
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+                    b"Connection: keep-alive\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write_stream(self, writer: asyncio.StreamWriter):
+        """Send the stub response as chunked server-sent events"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+
+        for index, token in enumerate(self.STREAM_TOKENS):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            event = json.dumps({
+                "id": f"chatcmpl-stub-{self.requests_served}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+            })
+            self._write_chunk(writer, f"data: {event}\n\n".encode())
+            await writer.drain()
+
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes):
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+async def _timed_stream(client, prompt: str) -> tuple:
+    """Consume a streamed response, returning (text, time_to_first_token, total_time)"""
+    start = time.perf_counter()
+    first_token = None
+    chunks = []
+
+    async for delta in client.stream_response(prompt):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        chunks.append(delta)
+
+    return "".join(chunks), first_token or 0.0, time.perf_counter() - start
+
+
+async def run_load_test(delay: float, levels: list, stream: bool = False, token_delay: float = 0.0) -> list:
+    """
+    Run batches of concurrent requests against the stub server
+
+    Args:
+        delay: Simulated server latency in seconds
+        levels: Concurrency levels to measure
+        stream: Use streamed responses and record time-to-first-token
+        token_delay: Delay between streamed tokens in seconds
+
+    Returns:
+        List of result dicts, one per concurrency level
+    """
+    server = StubOpenAIServer(delay, token_delay)
+    base_url = await server.start()
+
+    os.environ.setdefault("OPENAI_API_KEY", "stub-key")
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    from src.ai_clients import OpenAIClient
+
+    client = OpenAIClient()
+    results = []
+
+    try:
+        # Warm the connection pool so the first level isn't charged for connects
+        await client.get_response("warmup")
+
+        for concurrency in levels:
+            start = time.perf_counter()
+            if stream:
+                timed = await asyncio.gather(
+                    *(_timed_stream(client, f"query {i}") for i in range(concurrency))
+                )
+                responses = [text for text, _, _ in timed]
+                first_tokens = sorted(ttft for _, ttft, _ in timed)
+                totals = sorted(total for _, _, total in timed)
+            else:
+                responses = await asyncio.gather(
+                    *(client.get_response(f"query {i}") for i in range(concurrency))
+                )
+            elapsed = time.perf_counter() - start
+
+            errors = sum(1 for r in responses if r.startswith("Error:"))
+            row = {
+                "concurrency": concurrency,
+                "wall_time": elapsed,
+                "serial_time": delay * concurrency,
+                "speedup": (delay * concurrency) / elapsed if elapsed else 0.0,
+                "errors": errors
+            }
+            if stream:
+                row["ttft_p50"] = first_tokens[len(first_tokens) // 2]
+                row["total_p50"] = totals[len(totals) // 2]
+            results.append(row)
+    finally:
+        await client.aclose()
+        await server.stop()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAIClient concurrency load test")
+    parser.add_argument("--delay", type=float, default=0.5, help="Stub server latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="Concurrency levels to measure")
+    parser.add_argument("--stream", action="store_true", help="Measure streamed responses")
+    parser.add_argument("--token-delay", type=float, default=0.02,
+                        help="Delay between streamed tokens in seconds")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args.delay, args.concurrency, args.stream, args.token_delay))
+
+    header = f"{'concurrency':>12} {'wall (s)':>10} {'serial (s)':>11} {'speedup':>8} {'errors':>7}"
+    if args.stream:
+        header += f" {'ttft p50':>9} {'total p50':>10}"
+    print(header)
+
+    for row in results:
+        line = (f"{row['concurrency']:>12} {row['wall_time']:>10.3f} {row['serial_time']:>11.3f} "
+                f"{row['speedup']:>7.1f}x {row['errors']:>7}")
+        if args.stream:
+            line += f" {row['ttft_p50']:>9.3f} {row['total_p50']:>10.3f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark for prompt assembly.
+
+Measures the cost of PromptBuilder.create_brian_prompt and
+create_quality_check_prompt at several history depths, then replays a short
+conversation and reports the estimated prompt tokens per turn, split into
+the static system prefix, history and per-turn query sections.
+
+Usage:
+    python benchmarks/prompt_build_bench.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config
+from src.file_loader import FileLoader
+from src.models import ConversationHistory
+from src.prompt_builder import PromptBuilder
+from src.retrieval import ResumeIndex
+from src.token_budget import get_token_counter
+
+QUERIES = [
+    "What is Brian's leadership experience?",
+    "Which ERP systems has he deployed?",
+    "Tell me about his cybersecurity work.",
+    "How large were the teams he managed?",
+    "Is he open to CTO roles?",
+    "What cloud platforms does he know?",
+    "What did he achieve at Louis Vuitton?",
+    "What certifications does he hold?",
+]
+
+SAMPLE_ANSWER = ("I have led IT organisations across multiple geographies, most recently as Group CIO "
+                 "at ShawKwei & Partners, where I drive digital transformation across the portfolio. ") * 4
+
+
+def bench_build(resume_index: ResumeIndex, personal_info: str, iterations: int):
+    """Time prompt construction at several history depths"""
+    print(f"{'history':>8} {'brian (us)':>11} {'quality (us)':>13}")
+
+    for depth in (0, 1, 5, 20):
+        history = ConversationHistory()
+        for i in range(depth):
+            history.add_exchange(QUERIES[i % len(QUERIES)], SAMPLE_ANSWER)
+
+        query = QUERIES[0]
+        excerpts = resume_index.get_context(query, Config.RETRIEVAL_TOP_K)
+
+        brian = timeit.timeit(
+            lambda: PromptBuilder.create_brian_prompt(query, excerpts, personal_info, history),
+            number=iterations
+        )
+        quality = timeit.timeit(
+            lambda: PromptBuilder.create_quality_check_prompt(query, SAMPLE_ANSWER, excerpts, personal_info),
+            number=iterations
+        )
+        print(f"{depth:>8} {brian / iterations * 1e6:>11.2f} {quality / iterations * 1e6:>13.2f}")
+
+
+def report_tokens(resume_index: ResumeIndex, personal_info: str):
+    """Replay a conversation and report estimated prompt tokens per turn"""
+    counter = get_token_counter(Config.OPENAI_MODEL)
+    print()
+    print(f"{'turn':>5} {'system':>7} {'history':>8} {'query':>6} {'total':>6}")
+
+    history = ConversationHistory()
+    for turn, query in enumerate(QUERIES, 1):
+        excerpts = resume_index.get_context(query, Config.RETRIEVAL_TOP_K)
+        messages = PromptBuilder.create_brian_prompt(query, excerpts, personal_info, history)
+
+        system = counter.count_messages(messages[:1])
+        past = sum(counter.count_message(message) for message in messages[1:-1])
+        current = counter.count_message(messages[-1])
+        print(f"{turn:>5} {system:>7} {past:>8} {current:>6} {system + past + current:>6}")
+
+        history.add_exchange(query, SAMPLE_ANSWER)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt assembly micro-benchmark")
+    parser.add_argument("--iterations", type=int, default=20000, help="Builds per measurement")
+    args = parser.parse_args()
+
+    resume_content = FileLoader.load_pdf_content(Config.PDF_PATH)
+    personal_info = FileLoader.load_txt_content(Config.TXT_PATH)
+    resume_index = ResumeIndex.from_text(resume_content)
+
+    bench_build(resume_index, personal_info, args.iterations)
+    report_tokens(resume_index, personal_info)
+
+
+if __name__ == "__main__":
+    main()
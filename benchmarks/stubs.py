@@ -0,0 +1,233 @@
+"""
+Local stand-ins for OpenAIClient and GeminiClient.
+
+They follow the real clients' interfaces and error conventions ("Error: ..."
+strings, ResponseQuality results). Latency, error rate and revision rate are
+configurable, so the AIAgentSystem pipeline can be measured offline without
+spending API credits.
+"""
+import asyncio
+import itertools
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import AsyncIterator, Dict, Optional
+
+from src.config import Config
+from src.models import ResponseQuality
+from src.token_budget import get_token_counter
+
+STUB_ANSWER = (
+    "Over the past two decades I have led IT organisations across Europe, the Americas and "
+    "Asia-Pacific. As Group CIO at ShawKwei & Partners I drive digital transformation across the "
+    "portfolio, from rapid NetSuite ERP deployments to a unified cybersecurity framework. "
+    "Previously I led 30 IT staff across 10 countries and raised our cybersecurity score from D to A. "
+    "I focus on aligning technology roadmaps with business objectives and delivering measurable impact."
+)
+
+
+def _record_usage(trace, provider: str, prompt, completion: str):
+    """Report estimated token usage the way the real clients report billed usage"""
+    if trace is None:
+        return
+    counter = get_token_counter(Config.OPENAI_MODEL)
+    prompt_tokens = counter.count(prompt) if isinstance(prompt, str) else counter.count_messages(prompt)
+    trace.add_usage(provider, prompt_tokens, counter.count(completion))
+
+
+@dataclass
+class LatencyModel:
+    """
+    Log-normal latency distribution described by its median and spread
+
+    A fraction `slow_rate` of calls takes `slow_factor` times longer, modelling
+    a partial provider outage.
+    """
+    median: float
+    sigma: float = 0.3
+    slow_rate: float = 0.0
+    slow_factor: float = 10.0
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        latency = rng.lognormvariate(math.log(self.median), self.sigma)
+        if self.slow_rate and rng.random() < self.slow_rate:
+            latency *= self.slow_factor
+        return latency
+
+
+class StubOpenAIClient:
+    """Offline replacement for OpenAIClient"""
+
+    def __init__(self, latency: LatencyModel, error_rate: float = 0.0,
+                 token_delay: float = 0.01, seed: Optional[int] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.token_delay = token_delay
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.network_seconds = 0.0
+
+    async def get_response(self, prompt, timeout: Optional[float] = None, trace=None, priority: int = 0) -> str:
+        self.calls += 1
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency.sample(self.rng))
+        self.network_seconds += time.perf_counter() - start
+
+        if self.rng.random() < self.error_rate:
+            return "Error: OpenAI rate limit exceeded. Please try again later."
+        _record_usage(trace, "openai", prompt, STUB_ANSWER)
+        return STUB_ANSWER
+
+    async def stream_response(self, prompt, timeout: Optional[float] = None,
+                              trace=None, priority: int = 0) -> AsyncIterator[str]:
+        self.calls += 1
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency.sample(self.rng))
+
+        if self.rng.random() < self.error_rate:
+            self.network_seconds += time.perf_counter() - start
+            yield "Error: OpenAI rate limit exceeded. Please try again later."
+            return
+
+        for index, word in enumerate(STUB_ANSWER.split(" ")):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield word if index == 0 else " " + word
+        self.network_seconds += time.perf_counter() - start
+        _record_usage(trace, "openai", prompt, STUB_ANSWER)
+
+    async def aclose(self):
+        pass
+
+
+class StubGeminiClient:
+    """Offline replacement for GeminiClient"""
+
+    def __init__(self, latency: LatencyModel, error_rate: float = 0.0,
+                 revision_rate: float = 0.2, seed: Optional[int] = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.revision_rate = revision_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.network_seconds = 0.0
+
+    async def get_response(self, prompt, timeout: Optional[float] = None, trace=None, priority: int = 0) -> str:
+        self.calls += 1
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency.sample(self.rng))
+        self.network_seconds += time.perf_counter() - start
+
+        if self.rng.random() < self.error_rate:
+            return "Error: Error getting Gemini response: stub failure"
+        _record_usage(trace, "gemini", prompt, STUB_ANSWER)
+        return STUB_ANSWER
+
+    async def get_quality_assessment(self, prompt: str, timeout: Optional[float] = None,
+                                     trace=None, priority: int = 1) -> ResponseQuality:
+        self.calls += 1
+        start = time.perf_counter()
+        await asyncio.sleep(self.latency.sample(self.rng))
+        self.network_seconds += time.perf_counter() - start
+
+        if self.rng.random() < self.error_rate:
+            # Mirrors GeminiClient._default_quality_assessment
+            return ResponseQuality(
+                is_professional=True,
+                is_relevant=True,
+                is_based_on_resume=True,
+                confidence_score=0.8,
+                feedback="Quality check failed: Gemini API error: stub failure",
+                requires_revision=False
+            )
+
+        _record_usage(trace, "gemini", prompt, "{}" * 40)
+        needs_revision = self.rng.random() < self.revision_rate
+        return ResponseQuality(
+            is_professional=True,
+            is_relevant=True,
+            is_based_on_resume=not needs_revision,
+            confidence_score=0.55 if needs_revision else 0.9,
+            feedback="Tie the answer more closely to resume facts." if needs_revision else "Good response.",
+            requires_revision=needs_revision
+        )
+
+
+@dataclass
+class _StubBatch:
+    id: str
+    input_file_id: str
+    ready_at: float
+    status: str = "in_progress"
+    output_file_id: Optional[str] = None
+    error_file_id: Optional[str] = None
+
+
+class StubBatchAPI:
+    """
+    Offline stand-in for the AsyncOpenAI files and batches endpoints
+
+    Accepts the requests file OpenAIBatchAPI uploads and, after
+    `turnaround` seconds, answers every request with STUB_ANSWER in the
+    Batch API output format; a fraction `error_rate` of requests fails.
+    """
+
+    def __init__(self, turnaround: float = 0.5, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.turnaround = turnaround
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.counter = get_token_counter(Config.OPENAI_MODEL)
+        self._files: Dict[str, str] = {}
+        self._batches: Dict[str, _StubBatch] = {}
+        self._ids = itertools.count(1)
+        self.submitted = 0
+        self.files = SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = SimpleNamespace(create=self._create_batch, retrieve=self._retrieve_batch)
+
+    async def _create_file(self, file, purpose: str):
+        _, data = file
+        file_id = f"file-{next(self._ids)}"
+        self._files[file_id] = data.decode("utf-8")
+        return SimpleNamespace(id=file_id)
+
+    async def _file_content(self, file_id: str):
+        return SimpleNamespace(text=self._files[file_id])
+
+    async def _create_batch(self, input_file_id: str, endpoint: str, completion_window: str):
+        batch = _StubBatch(f"batch-{next(self._ids)}", input_file_id, time.monotonic() + self.turnaround)
+        self._batches[batch.id] = batch
+        self.submitted += 1
+        return batch
+
+    async def _retrieve_batch(self, batch_id: str):
+        batch = self._batches[batch_id]
+        if batch.status == "in_progress" and time.monotonic() >= batch.ready_at:
+            outputs, errors = [], []
+            for line in self._files[batch.input_file_id].splitlines():
+                request = json.loads(line)
+                prompt_tokens = self.counter.count_messages(request["body"]["messages"])
+                if self.rng.random() < self.error_rate:
+                    errors.append({"custom_id": request["custom_id"], "response": None,
+                                   "error": {"code": "server_error", "message": "stub failure"}})
+                    continue
+                outputs.append({"custom_id": request["custom_id"], "error": None, "response": {
+                    "status_code": 200,
+                    "body": {
+                        "choices": [{"message": {"role": "assistant", "content": STUB_ANSWER}}],
+                        "usage": {"prompt_tokens": prompt_tokens,
+                                  "completion_tokens": self.counter.count(STUB_ANSWER)}
+                    }
+                }})
+
+            for name, records in (("output_file_id", outputs), ("error_file_id", errors)):
+                if records:
+                    file_id = f"file-{next(self._ids)}"
+                    self._files[file_id] = "\n".join(json.dumps(record) for record in records) + "\n"
+                    setattr(batch, name, file_id)
+            batch.status = "completed"
+        return batch
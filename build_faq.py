@@ -0,0 +1,88 @@
+"""
+FAQ index build.
+
+Answers a curated set of frequent questions through the regular pipeline
+(answer, Gemini quality gate, revision), verifies every final answer with
+Gemini once more and writes the approved ones to the FAQ index. The server
+then answers first-turn questions that match an entry confidently from the
+index, without any LLM call.
+
+Rebuild whenever the resume or personal info changes: the index records the
+content version it was built from and is not served for any other.
+
+The question file is JSON (a list) or JSONL with "id", "question" and
+optional "phrasings" (other ways users ask it); the built-in set covers the
+topics listed in the chat UI.
+
+Usage:
+    python build_faq.py
+    python build_faq.py --questions faq.jsonl -o faq_index.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from src.config import Config
+
+
+def load_questions(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+async def run(args) -> dict:
+    from src.ai_system import AIAgentSystem
+    from src.faq import DEFAULT_FAQ, FaqBuilder, save_faq_index
+
+    faq = load_questions(args.questions) if args.questions else DEFAULT_FAQ
+    system = AIAgentSystem()
+
+    builder = FaqBuilder(system, min_confidence=args.min_confidence, concurrency=args.concurrency)
+    try:
+        entries = await builder.build(faq)
+    finally:
+        await system.openai_client.aclose()
+
+    if entries:
+        save_faq_index(args.output, entries, system.content_hash, Config.OPENAI_MODEL)
+    return {
+        "questions": len(faq),
+        "approved": len(entries),
+        "rejected": sorted({item["id"] for item in faq} - {entry.id for entry in entries}),
+        "content_hash": system.content_hash,
+        "output": args.output
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the precomputed FAQ answer index")
+    parser.add_argument("--questions", help="JSON or JSONL file of FAQ questions (default: built-in set)")
+    parser.add_argument("-o", "--output", default=Config.FAQ_INDEX_PATH, help="Index file to write")
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions answered at once")
+    parser.add_argument("--min-confidence", type=float, default=Config.FAQ_MIN_CONFIDENCE,
+                        help="Minimum Gemini confidence of a stored answer")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Generate fresh answers, each one checked by Gemini
+    Config.FAQ_ENABLED = False
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.QUALITY_SAMPLING_ENABLED = False
+    Config.GROUNDING_ENABLED = False
+    Config.CONTENT_RELOAD_ENABLED = False
+    if Config.QUALITY_PIPELINE_MODE == "skip":
+        Config.QUALITY_PIPELINE_MODE = "serial"
+
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary))
+    if not summary["approved"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
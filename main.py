@@ -1,18 +1,60 @@
 import gradio as gr
 import asyncio
-from src.ai_system import AIAgentSystem
+import logging
+import os
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from src.config import Config
+from src.lazy_loader import LazyLoader
+from src.metrics import METRICS
 
-# Initialize the AI system
-ai_system = AIAgentSystem()
+logger = logging.getLogger(__name__)
 
 
-async def chat_function(message, history):
+def create_ai_system():
+    """Import the LLM SDKs, validate config and load content"""
+    # Imported here so the web server can start before the heavy SDKs load
+    from src.ai_system import AIAgentSystem
+    return AIAgentSystem()
+
+
+# Initialize the AI system in the background (or right away when not lazy).
+# In multi-worker mode the supervising process only spawns workers, which
+# import this module under its own name and load the system themselves.
+ai_loader = LazyLoader(create_ai_system, name="AI agent system")
+if __name__ != "__main__" or Config.WEB_WORKERS <= 1:
+    if Config.LAZY_STARTUP:
+        ai_loader.start()
+    else:
+        ai_loader.load()
+
+
+async def chat_function(message, history, request: gr.Request):
     """Chat function for gr.ChatInterface"""
     if not message.strip():
-        return "Please enter a message."
+        yield "Please enter a message."
+        return
+
+    ai_system = await ai_loader.get()
+    from src.ai_system import DEFAULT_SESSION_ID
+
+    # Keep each visitor's conversation isolated, rebuilding it from the UI
+    # history if this process has not seen (or has evicted) the session
+    session_id = request.session_hash if request and request.session_hash else DEFAULT_SESSION_ID
+    await ai_system.get_session(session_id, history)
+
+    if Config.STREAMING_ENABLED:
+        # Render tokens as they arrive; the last item may swap in a revision
+        debug = ""
+        async for response, debug in ai_system.stream_query(message, session_id=session_id):
+            yield response
+    else:
+        response, debug = await ai_system.process_query(message, session_id=session_id)
+        yield response
 
-    response, debug = await ai_system.process_query(message)
-    return response
+    logger.debug(f"Query debug info: {debug}")
 
 
 # Create ChatInterface
@@ -49,10 +91,82 @@ I can answer questions about Brian's:
     clear_btn="🗑️ Clear"
 )
 
+# Health endpoints live next to the UI so orchestrators can probe the
+# process while the AI system is still loading
+app = FastAPI()
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the HTTP server is up"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the AI system has loaded and can answer queries"""
+    body = {"status": ai_loader.status}
+    if ai_loader.error:
+        body["error"] = ai_loader.error
+    if ai_loader.load_seconds is not None:
+        body["load_seconds"] = round(ai_loader.load_seconds, 3)
+    return JSONResponse(body, status_code=200 if ai_loader.is_ready else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint: request, stage latency and token aggregates"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+class ChatRequest(BaseModel):
+    message: str
+    session_id: str = ""
+
+
+@app.post("/api/chat")
+async def api_chat(chat_request: ChatRequest):
+    """Stateless JSON chat endpoint; any worker can serve any session"""
+    if not chat_request.message.strip():
+        return JSONResponse({"error": "Please enter a message."}, status_code=400)
+
+    ai_system = await ai_loader.get()
+    from src.ai_system import DEFAULT_SESSION_ID
+
+    session_id = chat_request.session_id or DEFAULT_SESSION_ID
+    response, debug = await ai_system.process_query(chat_request.message, session_id=session_id)
+    logger.debug(f"Query debug info: {debug}")
+    return {"response": response, "session_id": session_id}
+
+
+app = gr.mount_gradio_app(app, demo, path="/")
+
+
+def prepare_workers():
+    """Load the documents once and share them with the worker processes"""
+    if Config.SHARED_BACKEND_URL.startswith("memory://"):
+        logger.warning("WEB_WORKERS > 1 with an in-memory backend: sessions, cached answers "
+                       "and rate limits will not be shared between workers")
+
+    from src.ai_system import AIAgentSystem
+    snapshot_path = Config.CONTENT_SNAPSHOT_PATH or os.path.join(Config.CONTENT_CACHE_DIR, "snapshot.bin")
+    AIAgentSystem.write_content_snapshot(snapshot_path)
+    # Workers inherit the environment and read their Config from it
+    os.environ["CONTENT_SNAPSHOT_PATH"] = snapshot_path
+
+
 if __name__ == "__main__":
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=8080,
-        share=False,
-        debug=False
-    )
\ No newline at end of file
+    if Config.WEB_WORKERS > 1:
+        prepare_workers()
+        uvicorn.run(
+            "main:app",
+            host=Config.SERVER_NAME,
+            port=Config.SERVER_PORT,
+            workers=Config.WEB_WORKERS
+        )
+    else:
+        uvicorn.run(
+            app,
+            host=Config.SERVER_NAME,
+            port=Config.SERVER_PORT
+        )
\ No newline at end of file
@@ -1,104 +1,428 @@
 import openai
+import httpx
 import google.generativeai as genai
-import json
+from google.api_core import exceptions as google_exceptions
+import asyncio
 import logging
-from typing import Optional
+from collections import Counter
+from contextlib import nullcontext
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type, Union
 from .config import Config
+from .metrics import METRICS
 from .models import ResponseQuality
+from .rate_limiter import (PRIORITY_ANSWER, PRIORITY_QUALITY_CHECK, ProviderLimiter, backoff_delay,
+                           retry_after_seconds)
+from .shared_state import get_shared_backend
+from .structured_output import parse_model, response_schema
+from .token_budget import get_token_counter
+from .tracing import RequestTrace
 
 logger = logging.getLogger(__name__)
 
+Prompt = Union[str, List[Dict[str, str]]]
+
+
+# Transient failures worth retrying; anything else is returned to the caller at once
+OPENAI_RETRYABLE_ERRORS: Tuple[Type[Exception], ...] = (
+    openai.RateLimitError,
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.InternalServerError,
+)
+GEMINI_RETRYABLE_ERRORS: Tuple[Type[Exception], ...] = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+
+def _to_messages(prompt: Prompt) -> List[Dict[str, str]]:
+    """Wrap a plain prompt string as a single user message"""
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return prompt
+
+
+def _to_gemini_contents(messages: List[Dict[str, str]]) -> Tuple[str, List[dict]]:
+    """
+    Split chat messages into a Gemini system instruction and user/model turns
+
+    Only the leading system message (the static instructions) becomes the
+    system instruction, which keys the cached model; later system messages,
+    such as a session's rolling summary, are sent as user turns.
+    """
+    system_instruction = ""
+    contents = []
+    for index, message in enumerate(messages):
+        if message["role"] == "system" and index == 0:
+            system_instruction = message["content"]
+        else:
+            role = "model" if message["role"] == "assistant" else "user"
+            contents.append({"role": role, "parts": [message["content"]]})
+    return system_instruction, contents
+
+
+def _retry_delay(limiter: ProviderLimiter, error: Exception, attempt: int,
+                 retryable: Tuple[Type[Exception], ...]) -> Optional[float]:
+    """
+    Decide whether a failed call is retried
+
+    Args:
+        limiter: Limiter of the provider, used to count retries
+        error: Failure of the call
+        attempt: Zero-based number of the failed attempt
+        retryable: Exception types worth retrying
+
+    Returns:
+        Seconds to wait before retrying, or None to give up
+    """
+    if attempt >= Config.LLM_MAX_RETRIES or not isinstance(error, retryable):
+        return None
+
+    response = getattr(error, "response", None)
+    retry_after = retry_after_seconds(getattr(response, "headers", None))
+    delay = backoff_delay(attempt, Config.LLM_BACKOFF_BASE_SECONDS, Config.LLM_BACKOFF_MAX_SECONDS, retry_after)
+
+    limiter.record_retry(type(error).__name__)
+    logger.warning(f"{limiter.name} call failed ({type(error).__name__}), "
+                   f"retry {attempt + 1}/{Config.LLM_MAX_RETRIES} in {delay:.2f}s")
+    return delay
+
+
+def _record_wait(provider: str, wait: float, trace: Optional[RequestTrace]):
+    """Record time spent waiting for admission as its own stage"""
+    if trace is not None and wait >= 0.001:
+        trace.record(f"{provider}_queue", wait)
+
 
 class OpenAIClient:
     """Handles OpenAI API interactions"""
 
     def __init__(self):
-        self.client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
+        # One pooled HTTP client shared by every request so concurrent chats
+        # reuse keep-alive connections instead of opening a socket per call
+        self.http_client = openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=Config.OPENAI_TIMEOUT
+        )
+        self.client = openai.AsyncOpenAI(
+            api_key=Config.OPENAI_API_KEY,
+            base_url=Config.OPENAI_BASE_URL,
+            http_client=self.http_client,
+            timeout=Config.OPENAI_TIMEOUT,
+            # Retries go through our limiter and backoff instead of the SDK's
+            max_retries=0
+        )
+        self.limiter = ProviderLimiter(
+            "openai",
+            requests_per_minute=Config.OPENAI_RPM,
+            tokens_per_minute=Config.OPENAI_TPM,
+            max_concurrency=Config.OPENAI_MAX_CONCURRENCY,
+            backend=get_shared_backend(Config.SHARED_BACKEND_URL)
+        )
+        self.token_counter = get_token_counter(Config.OPENAI_MODEL)
 
-    async def get_response(self, prompt: str) -> str:
+    async def get_response(self, prompt: Prompt, timeout: Optional[float] = None,
+                           trace: Optional[RequestTrace] = None, priority: int = PRIORITY_ANSWER) -> str:
         """
         Get response from OpenAI API
 
+        Transient failures (rate limits, timeouts, 5xx) are retried with
+        jittered exponential backoff, honouring the server's retry-after.
+
         Args:
-            prompt: The prompt to send to OpenAI
+            prompt: The prompt string or chat messages to send to OpenAI
+            timeout: Per-call timeout in seconds (defaults to Config.OPENAI_TIMEOUT)
+            trace: Optional trace to record token usage and queue wait into
+            priority: Admission priority (first answers before revisions)
 
         Returns:
             Generated response text
         """
-        try:
-            response = self.client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=Config.MAX_TOKENS,
-                temperature=Config.TEMPERATURE
-            )
+        messages = _to_messages(prompt)
+        tokens = self._estimate_call_tokens(messages)
 
-            content = response.choices[0].message.content
-            if not content:
-                raise ValueError("Empty response from OpenAI")
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            try:
+                async with self.limiter.slot(tokens, priority) as wait:
+                    _record_wait("openai", wait, trace)
+                    response = await self.client.chat.completions.create(
+                        model=Config.OPENAI_MODEL,
+                        messages=messages,
+                        max_tokens=Config.MAX_TOKENS,
+                        temperature=Config.TEMPERATURE,
+                        timeout=timeout or Config.OPENAI_TIMEOUT
+                    )
+                self._record_usage(response.usage, trace)
 
-            return content
+                content = response.choices[0].message.content
+                if not content:
+                    raise ValueError("Empty response from OpenAI")
+
+                return content
+
+            except Exception as e:
+                delay = _retry_delay(self.limiter, e, attempt, OPENAI_RETRYABLE_ERRORS)
+                if delay is None:
+                    return self._format_error(e)
+                await asyncio.sleep(delay)
+
+    async def stream_response(self, prompt: Prompt, timeout: Optional[float] = None,
+                              trace: Optional[RequestTrace] = None,
+                              priority: int = PRIORITY_ANSWER) -> AsyncIterator[str]:
+        """
+        Stream response deltas from OpenAI API
+
+        Failures before the first delta are retried like get_response.
+
+        Args:
+            prompt: The prompt string or chat messages to send to OpenAI
+            timeout: Per-call timeout in seconds (defaults to Config.OPENAI_TIMEOUT)
+            trace: Optional trace to record token usage and queue wait into
+            priority: Admission priority (first answers before revisions)
 
-        except openai.RateLimitError as e:
+        Yields:
+            Response text deltas as they arrive; a single "Error: ..." item if
+            the request fails before any text was produced
+        """
+        messages = _to_messages(prompt)
+        tokens = self._estimate_call_tokens(messages)
+        produced = False
+
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            try:
+                async with self.limiter.slot(tokens, priority) as wait:
+                    _record_wait("openai", wait, trace)
+                    stream = await self.client.chat.completions.create(
+                        model=Config.OPENAI_MODEL,
+                        messages=messages,
+                        max_tokens=Config.MAX_TOKENS,
+                        temperature=Config.TEMPERATURE,
+                        timeout=timeout or Config.OPENAI_TIMEOUT,
+                        stream=True,
+                        # The final chunk then carries the usage totals
+                        stream_options={"include_usage": True}
+                    )
+
+                    async for chunk in stream:
+                        if chunk.usage is not None:
+                            self._record_usage(chunk.usage, trace)
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            produced = True
+                            yield delta
+                return
+
+            except Exception as e:
+                # Once text has reached the user, keep the partial answer rather
+                # than retrying or replacing it with an error
+                if produced:
+                    self._format_error(e)
+                    return
+                delay = _retry_delay(self.limiter, e, attempt, OPENAI_RETRYABLE_ERRORS)
+                if delay is None:
+                    yield self._format_error(e)
+                    return
+                await asyncio.sleep(delay)
+
+    def _estimate_call_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """Tokens a call may consume against the TPM budget: prompt estimate plus max output"""
+        return self.token_counter.count_messages(messages) + Config.MAX_TOKENS
+
+    @staticmethod
+    def _record_usage(usage, trace: Optional[RequestTrace]):
+        """Copy the token counts of a completion into the request trace"""
+        if usage is not None and trace is not None:
+            trace.add_usage("openai", usage.prompt_tokens, usage.completion_tokens)
+
+    @staticmethod
+    def _format_error(e: Exception) -> str:
+        """Log an OpenAI failure and convert it to an error string"""
+        if isinstance(e, openai.RateLimitError):
             error_msg = "OpenAI rate limit exceeded. Please try again later."
             logger.error(f"OpenAI rate limit: {str(e)}")
-            return f"Error: {error_msg}"
-
-        except openai.AuthenticationError as e:
+        elif isinstance(e, openai.AuthenticationError):
             error_msg = "OpenAI authentication failed. Please check API key."
             logger.error(f"OpenAI auth error: {str(e)}")
-            return f"Error: {error_msg}"
-
-        except Exception as e:
+        elif isinstance(e, openai.APITimeoutError):
+            error_msg = "OpenAI request timed out. Please try again."
+            logger.error(f"OpenAI timeout: {str(e)}")
+        else:
             error_msg = f"Error getting OpenAI response: {str(e)}"
             logger.error(error_msg)
-            return f"Error: {error_msg}"
+
+        return f"Error: {error_msg}"
+
+    async def aclose(self):
+        """Close the pooled HTTP connections"""
+        await self.client.close()
 
 
 class GeminiClient:
     """Handles Google Gemini API interactions"""
 
     def __init__(self):
-        genai.configure(api_key=Config.GEMINI_API_KEY)
+        # The asyncio gRPC transport multiplexes every call over one shared channel
+        genai.configure(api_key=Config.GEMINI_API_KEY, transport="grpc_asyncio")
         self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
+        # System instruction -> model used to generate answers; one per content version
+        self._answer_models: Dict[str, genai.GenerativeModel] = {}
+
+        # Quality checks request JSON constrained to the ResponseQuality schema
+        self.quality_config = None
+        if Config.GEMINI_STRUCTURED_OUTPUT:
+            self.quality_config = genai.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=response_schema(ResponseQuality)
+            )
+        # Parse result -> count ("ok", "recovered", "invalid_json", "invalid_schema", "empty")
+        self.parse_counts: Counter = Counter()
+        self.limiter = ProviderLimiter(
+            "gemini",
+            requests_per_minute=Config.GEMINI_RPM,
+            tokens_per_minute=Config.GEMINI_TPM,
+            max_concurrency=Config.GEMINI_MAX_CONCURRENCY,
+            backend=get_shared_backend(Config.SHARED_BACKEND_URL)
+        )
+        self.token_counter = get_token_counter(Config.GEMINI_MODEL)
+
+    async def _generate(self, prompt, timeout: Optional[float], trace: Optional[RequestTrace],
+                        priority: int, model: Optional[genai.GenerativeModel] = None,
+                        generation_config: Optional[genai.GenerationConfig] = None, tokens: int = 0):
+        """Call generate_content through the limiter, retrying transient failures"""
+        tokens = tokens or self.token_counter.count(prompt) + 256
+        model = model or self.model
+
+        for attempt in range(Config.LLM_MAX_RETRIES + 1):
+            try:
+                async with self.limiter.slot(tokens, priority) as wait:
+                    _record_wait("gemini", wait, trace)
+                    return await model.generate_content_async(
+                        prompt,
+                        generation_config=generation_config,
+                        request_options={"timeout": timeout or Config.GEMINI_TIMEOUT}
+                    )
+            except Exception as e:
+                delay = _retry_delay(self.limiter, e, attempt, GEMINI_RETRYABLE_ERRORS)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    async def get_response(self, prompt: Prompt, timeout: Optional[float] = None,
+                           trace: Optional[RequestTrace] = None, priority: int = PRIORITY_ANSWER) -> str:
+        """
+        Generate an answer with Gemini
+
+        Accepts the same chat messages as OpenAIClient.get_response and follows
+        its error convention, so the provider router can hedge and fail over
+        answers to Gemini.
+
+        Args:
+            prompt: The prompt string or chat messages
+            timeout: Per-call timeout in seconds (defaults to Config.GEMINI_TIMEOUT)
+            trace: Optional trace to record token usage and queue wait into
+            priority: Admission priority
+
+        Returns:
+            Generated response text, or "Error: ..." on failure
+        """
+        messages = _to_messages(prompt)
+        system_instruction, contents = _to_gemini_contents(messages)
 
-    async def get_quality_assessment(self, prompt: str) -> ResponseQuality:
+        try:
+            response = await self._generate(
+                contents, timeout, trace, priority,
+                model=self._answer_model(system_instruction),
+                generation_config=genai.GenerationConfig(
+                    max_output_tokens=Config.MAX_TOKENS,
+                    temperature=Config.TEMPERATURE
+                ),
+                tokens=self.token_counter.count_messages(messages) + Config.MAX_TOKENS
+            )
+            self._record_usage(response, trace)
+
+            content = response.text
+            if not content:
+                raise ValueError("Empty response from Gemini")
+
+            return content
+
+        except Exception as e:
+            error_msg = f"Error getting Gemini response: {str(e)}"
+            logger.error(error_msg)
+            return f"Error: {error_msg}"
+
+    def _answer_model(self, system_instruction: str) -> genai.GenerativeModel:
+        """Model configured with the answer prompt's system instruction"""
+        model = self._answer_models.get(system_instruction)
+        if model is None:
+            if len(self._answer_models) >= 4:
+                self._answer_models.clear()
+            model = genai.GenerativeModel(Config.GEMINI_MODEL, system_instruction=system_instruction or None)
+            self._answer_models[system_instruction] = model
+        return model
+
+    @staticmethod
+    def _record_usage(response, trace: Optional[RequestTrace]):
+        """Copy the token counts of a generation into the request trace"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None and trace is not None:
+            trace.add_usage("gemini", usage.prompt_token_count, usage.candidates_token_count)
+
+    async def get_quality_assessment(self, prompt: str, timeout: Optional[float] = None,
+                                     trace: Optional[RequestTrace] = None,
+                                     priority: int = PRIORITY_QUALITY_CHECK) -> ResponseQuality:
         """
         Get quality assessment from Gemini API
 
+        The response is requested as schema-constrained JSON. Output that is
+        not plain JSON (fenced, wrapped in prose, truncated) is recovered by a
+        tolerant extractor; every parse result is counted.
+
         Args:
             prompt: The prompt for quality assessment
+            timeout: Per-call timeout in seconds (defaults to Config.GEMINI_TIMEOUT)
+            trace: Optional trace to record token usage, queue wait and parse time into
+            priority: Admission priority
 
         Returns:
             ResponseQuality object with assessment results
         """
         try:
-            response = self.model.generate_content(prompt)
+            response = await self._generate(prompt, timeout, trace, priority,
+                                            generation_config=self.quality_config)
+            self._record_usage(response, trace)
 
-            if not response.text:
+            text = response.text
+            if not text:
+                self._count_parse("empty")
                 raise ValueError("Empty response from Gemini")
 
-            # Parse JSON response
-            json_str = response.text.strip()
-
-            # Clean up potential markdown formatting
-            if json_str.startswith("```json"):
-                json_str = json_str[7:-3]
-            elif json_str.startswith("```"):
-                json_str = json_str[3:-3]
+            with trace.span("json_parse") if trace is not None else nullcontext():
+                quality, result = parse_model(text, ResponseQuality)
+            self._count_parse(result)
 
-            # Parse and validate with Pydantic
-            quality_data = json.loads(json_str)
-            return ResponseQuality(**quality_data)
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse Gemini JSON response: {str(e)}")
-            return self._default_quality_assessment(f"JSON parsing failed: {str(e)}")
+            if quality is None:
+                logger.error(f"Failed to parse Gemini quality response ({result}): {text[:200]!r}")
+                return self._default_quality_assessment(f"JSON parsing failed: {result}")
+            if result == "recovered":
+                logger.warning("Recovered Gemini quality response that was not plain JSON")
+            return quality
 
         except Exception as e:
             logger.error(f"Error getting Gemini quality assessment: {str(e)}")
             return self._default_quality_assessment(f"Gemini API error: {str(e)}")
 
+    def _count_parse(self, result: str):
+        """Count a quality-response parse result"""
+        self.parse_counts[result] += 1
+        METRICS.llm_parse.inc(labels={"provider": "gemini", "result": result})
+
     def _default_quality_assessment(self, error_msg: str) -> ResponseQuality:
         """
         Return default quality assessment when API fails
@@ -1,41 +1,483 @@
+import asyncio
+import hashlib
+import json
 import logging
-from typing import Tuple
+import random
+import threading
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+from .audit_log import AuditLog, AuditRecord
 from .config import Config
-from .models import ConversationHistory, ProcessingResult
+from .models import (CachedResponse, ConversationHistory, GeneratedResponse, PrescreenResult, ProcessingResult,
+                     QualityDecision, ResponseQuality)
+from .session_store import SessionStore
+from .faq import FaqMatch, load_faq_index
 from .file_loader import FileLoader
+from .groundedness import GroundednessChecker, GroundingIndex, GroundingResult
+from .content_cache import ContentCache
+from .content_reload import ContentVersion, ContentWatcher
+from .content_snapshot import ContentSnapshot, open_snapshot
 from .ai_clients import OpenAIClient, GeminiClient
-from .prompt_builder import PromptBuilder
+from .prompt_builder import RESUME_EXCERPTS_SECTION, PromptBuilder
+from .prescreen import ResponsePrescreen
+from .provider_router import ProviderRouter
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_QUALITY_CHECK, PRIORITY_REVISION
+from .quality_sampling import FAILED_CHECK_PREFIX, QualitySampler
+from .response_cache import ResponseCache
+from .retrieval import ResumeIndex
+from .shared_state import get_shared_backend
+from .single_flight import SingleFlight
+from .summarizer import ConversationSummarizer
+from .text_similarity import normalize_text
+from .token_budget import PromptBudgeter, get_token_counter
+from .tracing import RequestTrace
+from .metrics import METRICS, TraceSink
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SESSION_ID = "default"
+
 
 class AIAgentSystem:
     """Main AI agent system coordinating all components"""
 
-    def __init__(self):
+    def __init__(self, openai_client: Optional[OpenAIClient] = None,
+                 gemini_client: Optional[GeminiClient] = None):
+        """
+        Args:
+            openai_client: Client for answers (defaults to OpenAIClient)
+            gemini_client: Client for quality checks and fallback answers (defaults to GeminiClient)
+        """
         # Validate configuration
         Config.validate_config()
 
         # Initialize AI clients
-        self.openai_client = OpenAIClient()
-        self.gemini_client = GeminiClient()
+        self.openai_client = openai_client or OpenAIClient()
+        self.gemini_client = gemini_client or GeminiClient()
+
+        # Answers and revisions go through the router, which hedges slow calls
+        # and fails over to the other provider when one is unhealthy
+        self.router = None
+        self.answer_client = self.openai_client
+        if Config.PROVIDER_ROUTING_ENABLED:
+            self.router = ProviderRouter(
+                {"openai": self.openai_client, "gemini": self.gemini_client},
+                order=Config.ANSWER_PROVIDERS,
+                hedging=Config.HEDGING_ENABLED,
+                hedge_quantile=Config.HEDGE_QUANTILE,
+                hedge_min_delay=Config.HEDGE_MIN_DELAY_SECONDS,
+                hedge_default_delay=Config.HEDGE_DEFAULT_DELAY_SECONDS,
+                window=Config.PROVIDER_HEALTH_WINDOW,
+                min_samples=Config.PROVIDER_HEALTH_MIN_SAMPLES,
+                failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+                error_rate_threshold=Config.CIRCUIT_ERROR_RATE,
+                open_seconds=Config.CIRCUIT_OPEN_SECONDS
+            )
+            self.answer_client = self.router
+
+        # Load content: workers map the snapshot their parent wrote; otherwise
+        # warm restarts reuse text extracted by a previous run
+        self.content_cache = ContentCache(Config.CONTENT_CACHE_DIR) if Config.CONTENT_CACHE_ENABLED else None
+        self.snapshot = open_snapshot(Config.CONTENT_SNAPSHOT_PATH)
+        self.content = self._load_content(self.snapshot)
+        self._reload_lock = threading.Lock()
+        self.content_reloads = 0
+
+        # Local groundedness verdicts settle clear-cut answers without Gemini
+        self.grounding_checker = None
+        if Config.GROUNDING_ENABLED:
+            self.grounding_checker = GroundednessChecker(
+                pass_threshold=Config.GROUNDING_PASS_THRESHOLD,
+                min_claims=Config.GROUNDING_MIN_CLAIMS,
+                fail_threshold=Config.GROUNDING_FAIL_THRESHOLD,
+                fail_min_unsupported=Config.GROUNDING_FAIL_MIN_UNSUPPORTED
+            )
+        self._grounding_rng = random.Random()
+        self._grounding_audits = set()
+
+        # Answer prompts are fitted to an input token budget, section by section
+        self.token_counter = get_token_counter(Config.OPENAI_MODEL)
+        self.prompt_budgeter = None
+        if Config.PROMPT_TOKEN_BUDGET > 0:
+            self.prompt_budgeter = PromptBudgeter(
+                self.token_counter,
+                input_budget=Config.PROMPT_TOKEN_BUDGET,
+                recent_exchanges=Config.HISTORY_RECENT_EXCHANGES
+            )
+
+        # Skip the Gemini check on low-risk answers, auditing a sample of them
+        self.quality_sampler = None
+        if Config.QUALITY_SAMPLING_ENABLED:
+            self.quality_sampler = QualitySampler(
+                self.resume_content,
+                self.personal_info,
+                audit_rate=Config.QUALITY_SAMPLING_AUDIT_RATE,
+                min_groundedness=Config.QUALITY_SAMPLING_MIN_GROUNDEDNESS,
+                min_pass_rate=Config.QUALITY_SAMPLING_MIN_PASS_RATE,
+                window=Config.QUALITY_SAMPLING_WINDOW,
+                min_samples=Config.QUALITY_SAMPLING_MIN_SAMPLES
+            )
+
+        # Sessions and cached answers are shared with other workers when a
+        # shared backend is configured
+        self.shared_backend = get_shared_backend(Config.SHARED_BACKEND_URL)
+
+        self.response_cache = None
+        if Config.RESPONSE_CACHE_ENABLED:
+            self.response_cache = ResponseCache(
+                max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+                ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS,
+                similarity_threshold=(Config.RESPONSE_CACHE_SIMILARITY_THRESHOLD
+                                      if Config.RESPONSE_CACHE_SIMILARITY_ENABLED else None),
+                backend=self.shared_backend
+            )
+
+        # Initialize per-session conversation tracking
+        self.sessions = SessionStore(
+            ttl_seconds=Config.SESSION_TTL_SECONDS,
+            max_sessions=Config.SESSION_MAX_COUNT,
+            max_memory_bytes=int(Config.SESSION_MAX_MEMORY_MB * 1024 * 1024),
+            backend=self.shared_backend
+        )
+
+        # First-turn questions matching a precomputed FAQ answer skip the LLMs
+        self.faq_index = load_faq_index(Config.FAQ_INDEX_PATH) if Config.FAQ_ENABLED else None
+        if self.faq_index is not None and self.faq_index.content_hash != self.content_hash:
+            logger.warning("FAQ index was built from different content; not serving it until rebuilt")
+
+        # Older turns are folded into a per-session summary in the background
+        self.summarizer = None
+        if Config.SUMMARY_ENABLED:
+            self.summarizer = ConversationSummarizer(
+                self.gemini_client if Config.SUMMARY_PROVIDER == "gemini" else self.openai_client,
+                self.sessions,
+                keep_recent=Config.SUMMARY_RAW_EXCHANGES,
+                max_words=Config.SUMMARY_MAX_WORDS,
+                max_tokens=Config.SUMMARY_MAX_TOKENS,
+                concurrency=Config.SUMMARY_CONCURRENCY,
+                counter=self.token_counter
+            )
+
+        # Concurrent identical queries await one shared pipeline run
+        self.single_flight = SingleFlight() if Config.REQUEST_COALESCING_ENABLED else None
+
+        # Finished request traces feed the /metrics aggregates and, optionally, a JSONL file
+        self.metrics = METRICS
+        self.trace_sink = TraceSink(Config.TRACE_JSONL_PATH) if Config.TRACE_JSONL_PATH else None
+
+        # Durable record of every exchange; also restores sessions after a restart
+        self.audit_log = None
+        if Config.AUDIT_LOG_PATH:
+            self.audit_log = AuditLog(
+                Config.AUDIT_LOG_PATH,
+                batch_size=Config.AUDIT_BATCH_SIZE,
+                flush_interval=Config.AUDIT_FLUSH_INTERVAL_SECONDS,
+                max_queue=Config.AUDIT_MAX_QUEUE
+            )
+            if Config.AUDIT_REHYDRATE_SESSIONS:
+                self._rehydrate_sessions()
+            self.audit_log.start()
+
+        # Pick up edits to the resume and personal info without a restart
+        self.content_watcher = None
+        if Config.CONTENT_RELOAD_ENABLED:
+            self.content_watcher = ContentWatcher(
+                [Config.PDF_PATH, Config.TXT_PATH],
+                on_change=lambda paths: self.reload_content(),
+                interval=Config.CONTENT_RELOAD_INTERVAL_SECONDS
+            )
+            self.content_watcher.start()
+
+        logger.info("AI Agent System initialized successfully")
+
+    @property
+    def resume_content(self) -> str:
+        return self.content.resume_content
+
+    @property
+    def personal_info(self) -> str:
+        return self.content.personal_info
+
+    @property
+    def content_hash(self) -> str:
+        """Version of the loaded content; cached answers are scoped to it"""
+        return self.content.content_hash
+
+    @property
+    def resume_index(self) -> Optional[ResumeIndex]:
+        return self.content.resume_index
 
-        # Load content
-        self.resume_content = FileLoader.load_pdf_content(Config.PDF_PATH)
-        self.personal_info = FileLoader.load_txt_content(Config.TXT_PATH)
+    @property
+    def prescreen(self) -> ResponsePrescreen:
+        return self.content.prescreen
+
+    def _load_content(self, snapshot: Optional[ContentSnapshot] = None) -> ContentVersion:
+        """
+        Load the documents and build everything derived from them
+
+        Args:
+            snapshot: Snapshot to read instead of the source files
+
+        Returns:
+            New content version
+        """
+        if snapshot is not None:
+            resume_content = snapshot.text("resume")
+            personal_info = snapshot.text("personal_info")
+        else:
+            resume_content = FileLoader.load_pdf_content(Config.PDF_PATH, cache=self.content_cache)
+            personal_info = FileLoader.load_txt_content(Config.TXT_PATH)
 
         # Validate loaded content
-        if not FileLoader.validate_content(self.resume_content, self.personal_info):
+        if not FileLoader.validate_content(resume_content, personal_info):
             raise ValueError("Invalid content loaded from files")
 
-        # Initialize conversation tracking
-        self.conversation_history = ConversationHistory()
+        # Build the retrieval index once so prompts carry only relevant resume chunks
+        resume_index = self._build_resume_index(resume_content, snapshot) if Config.RETRIEVAL_ENABLED else None
 
-        logger.info("AI Agent System initialized successfully")
+        # Build the static prompt prefix now rather than on the first request
+        PromptBuilder.system_message(personal_info, "" if resume_index is not None else resume_content)
+
+        grounding = GroundingIndex.build(resume_content, personal_info)
+        return ContentVersion(
+            resume_content=resume_content,
+            personal_info=personal_info,
+            content_hash=hashlib.sha256(f"{resume_content}\0{personal_info}".encode("utf-8")).hexdigest()[:16],
+            resume_index=resume_index,
+            prescreen=ResponsePrescreen(grounding),
+            grounding=grounding
+        )
+
+    def _build_resume_index(self, resume_content: str, snapshot: Optional[ContentSnapshot] = None) -> ResumeIndex:
+        """Build the retrieval index, reusing cached chunks when the PDF is unchanged"""
+        if snapshot is not None:
+            return ResumeIndex(json.loads(snapshot.text("resume_chunks")))
+
+        chunks = self.content_cache.get(Config.PDF_PATH, "resume_chunks") if self.content_cache else None
+
+        if chunks is None:
+            chunks = ResumeIndex.chunk_text(resume_content)
+            if self.content_cache is not None:
+                self.content_cache.put(Config.PDF_PATH, chunks, "resume_chunks")
+
+        return ResumeIndex(chunks)
+
+    def reload_content(self) -> bool:
+        """
+        Reload the documents and swap in the rebuilt content
+
+        Loading and indexing run in the calling thread (the content watcher's)
+        while requests keep using the current version; the swap itself is a
+        single reference assignment. Only cached answers of the replaced
+        version are invalidated.
+
+        Returns:
+            Whether the content changed
+        """
+        with self._reload_lock:
+            start = time.perf_counter()
+            content = self._load_content()
+            previous = self.content
+            if content.content_hash == previous.content_hash:
+                logger.info("Content files changed on disk but their text did not; keeping the current version")
+                return False
+
+            if self.quality_sampler is not None:
+                self.quality_sampler.update_content(content.resume_content, content.personal_info)
+            self.content = content
+
+            invalidated = self.response_cache.invalidate_scope(previous.content_hash) if self.response_cache else 0
+            self.content_reloads += 1
+            self.metrics.content_reloads.inc()
+            logger.info(f"Content reloaded in {time.perf_counter() - start:.2f}s "
+                        f"({previous.content_hash} -> {content.content_hash}), "
+                        f"{invalidated} cached answers invalidated")
+            return True
+
+    @staticmethod
+    def write_content_snapshot(path: str):
+        """
+        Load the documents once and write them as a snapshot for worker processes
+
+        Args:
+            path: Snapshot file to create
+        """
+        content_cache = ContentCache(Config.CONTENT_CACHE_DIR) if Config.CONTENT_CACHE_ENABLED else None
+        resume_content = FileLoader.load_pdf_content(Config.PDF_PATH, cache=content_cache)
+        personal_info = FileLoader.load_txt_content(Config.TXT_PATH)
+
+        ContentSnapshot.write(
+            path,
+            {
+                "resume": resume_content,
+                "personal_info": personal_info,
+                "resume_chunks": json.dumps(ResumeIndex.chunk_text(resume_content))
+            },
+            source_paths=[Config.PDF_PATH, Config.TXT_PATH]
+        )
+        logger.info(f"Wrote content snapshot to {path}")
+
+    async def get_session(self, session_id: str, history: Optional[List[dict]] = None) -> ConversationHistory:
+        """
+        Get the conversation for a session, seeding it from the chat UI history
+
+        Args:
+            session_id: Session identifier (e.g. Gradio session hash)
+            history: Chat history in Gradio "messages" format, used to rebuild
+                a session that is unknown to this process or has expired
 
-    def _should_suggest_linkedin(self) -> bool:
+        Returns:
+            ConversationHistory for the session
+        """
+        exchanges = self._history_to_exchanges(history or [])
+
+        if not exchanges:
+            history = await self.sessions.aget(session_id)
+            # A new session starts with an empty UI history too; there is nothing to clear
+            if not history.exchanges:
+                return history
+            # An empty UI history for a session with exchanges means the user cleared the chat
+            self._reset_session(session_id)
+
+        return await self.sessions.aget(session_id, seed_exchanges=exchanges)
+
+    @staticmethod
+    def _history_to_exchanges(history: List[dict]) -> List[Tuple[str, str]]:
+        """Pair Gradio user/assistant messages into (user_message, assistant_response) tuples"""
+        exchanges = []
+        pending_user = None
+
+        for message in history:
+            role = message.get("role")
+            content = message.get("content")
+            if not isinstance(content, str):
+                continue
+
+            if role == "user":
+                pending_user = content
+            elif role == "assistant" and pending_user is not None:
+                exchanges.append((pending_user, content))
+                pending_user = None
+
+        return exchanges
+
+    def _resume_context(self, query: str, conversation_history: Optional[ConversationHistory] = None,
+                        top_k: Optional[int] = None) -> str:
+        """
+        Select the resume text to include in a prompt
+
+        Args:
+            query: Text to retrieve against
+            conversation_history: History whose last question is added to the
+                query, so follow-ups retrieve the same section
+            top_k: Number of chunks to retrieve (defaults to Config.RETRIEVAL_TOP_K)
+
+        Returns:
+            Relevant resume chunks, or the full resume when retrieval is disabled
+        """
+        if self.resume_index is None:
+            return self.resume_content
+
+        if conversation_history is not None and conversation_history.exchanges:
+            query = f"{conversation_history.exchanges[-1][0]}\n{query}"
+
+        return self.resume_index.get_context(query, top_k or Config.RETRIEVAL_TOP_K)
+
+    def _build_brian_prompt(self, user_query: str, conversation_history: ConversationHistory,
+                            suggest_linkedin: bool, trace: RequestTrace) -> List[dict]:
+        """Build the answer messages and record their size per section"""
+        if self.prompt_budgeter is not None:
+            return self._build_budgeted_prompt(user_query, conversation_history, suggest_linkedin, trace)
+
+        with trace.span("prompt_build"):
+            if self.resume_index is not None:
+                resume_excerpts = self._resume_context(user_query, conversation_history)
+                static_resume = ""
+            else:
+                resume_excerpts = ""
+                static_resume = self.resume_content
+
+            brian_prompt = PromptBuilder.create_brian_prompt(
+                user_query=user_query,
+                resume_content=resume_excerpts,
+                personal_info=self.personal_info,
+                conversation_history=conversation_history,
+                suggest_linkedin=suggest_linkedin,
+                static_resume=static_resume
+            )
+
+        trace.count("system", self.token_counter.count_messages(brian_prompt[:1]))
+        trace.count("history", sum(self.token_counter.count_message(message) for message in brian_prompt[1:-1]))
+        trace.count("query", self.token_counter.count_message(brian_prompt[-1]))
+        logger.debug(f"Prompt tokens: {trace.format_counters()}")
+
+        return brian_prompt
+
+    def _build_budgeted_prompt(self, user_query: str, conversation_history: ConversationHistory,
+                               suggest_linkedin: bool, trace: RequestTrace) -> List[dict]:
+        """
+        Build the answer messages within Config.PROMPT_TOKEN_BUDGET
+
+        The system message and query are always sent; resume chunks, recent
+        history and older history follow in that priority while budget
+        remains.
+        """
+        with trace.span("prompt_build"):
+            content = self.content
+            static_resume = content.resume_content if content.resume_index is None else ""
+            system_message = PromptBuilder.system_message(content.personal_info, static_resume)
+
+            candidates = []
+            if content.resume_index is not None:
+                query = user_query
+                if conversation_history.exchanges:
+                    query = f"{conversation_history.exchanges[-1][0]}\n{query}"
+                candidates = [(i, content.resume_index.chunks[i])
+                              for i in content.resume_index.select(query, Config.RETRIEVAL_TOP_K)]
+
+            # With summarization, older turns are represented by the summary
+            summary_message = None
+            raw_exchanges = Config.HISTORY_PROMPT_EXCHANGES
+            if Config.SUMMARY_ENABLED:
+                raw_exchanges = Config.SUMMARY_RAW_EXCHANGES
+                if conversation_history.summary:
+                    summary_message = PromptBuilder.create_summary_message(conversation_history.summary)
+
+            plan = self.prompt_budgeter.plan(
+                system_message=system_message,
+                query_message=PromptBuilder.create_query_message(user_query, "", suggest_linkedin),
+                resume_chunks=candidates,
+                exchanges=conversation_history.get_recent_message_pairs(raw_exchanges),
+                resume_header=RESUME_EXCERPTS_SECTION,
+                summary_message=summary_message
+            )
+
+            resume_excerpts = content.resume_index.render(plan.resume_chunks) if plan.resume_chunks else ""
+            brian_prompt = [system_message]
+            if plan.summary_message is not None:
+                brian_prompt.append(plan.summary_message)
+            brian_prompt.extend(plan.history_messages)
+            brian_prompt.append(PromptBuilder.create_query_message(user_query, resume_excerpts, suggest_linkedin))
+
+        for section, tokens in plan.spend.items():
+            trace.count(section, tokens)
+            self.metrics.prompt_tokens.inc(tokens, labels={"section": section})
+        for section, tokens in plan.dropped.items():
+            self.metrics.prompt_tokens_dropped.inc(tokens, labels={"section": section})
+
+        spend = ", ".join(f"{section}={tokens}" for section, tokens in plan.spend.items())
+        if plan.dropped:
+            dropped = ", ".join(f"{section}={tokens}" for section, tokens in plan.dropped.items())
+            logger.info(f"Prompt tokens ({plan.total}/{self.prompt_budgeter.input_budget}): {spend}; "
+                        f"dropped {dropped}")
+        else:
+            logger.debug(f"Prompt tokens ({plan.total}/{self.prompt_budgeter.input_budget}): {spend}")
+
+        return brian_prompt
+
+    def _should_suggest_linkedin(self, conversation_history: ConversationHistory) -> bool:
         """Determine if LinkedIn should be suggested based on interaction count"""
-        return self.conversation_history.interaction_count >= Config.LINKEDIN_THRESHOLD
+        return conversation_history.interaction_count >= Config.LINKEDIN_THRESHOLD
 
     def _add_linkedin_suggestion(self, response: str) -> str:
         """Add LinkedIn connection suggestion to response"""
@@ -44,115 +486,777 @@ class AIAgentSystem:
                         "https://www.linkedin.com/in/brian-veau")
         return response + linkedin_msg
 
-    async def process_query(self, user_query: str) -> Tuple[str, str]:
+    async def process_query(self, user_query: str, session_id: str = DEFAULT_SESSION_ID,
+                            trace: Optional[RequestTrace] = None) -> Tuple[str, str]:
         """
         Main processing function for user queries
 
         Args:
             user_query: User's question or message
+            session_id: Session whose conversation history provides context
+            trace: Optional trace to record stage timings into
 
         Returns:
             Tuple of (final_response, debug_info)
         """
+        conversation_history = await self.sessions.aget(session_id)
+        trace = trace or RequestTrace()
+        trace.set("content_hash", self.content_hash)
+
         try:
             # Check if LinkedIn should be suggested
-            suggest_linkedin = self._should_suggest_linkedin()
+            suggest_linkedin = self._should_suggest_linkedin(conversation_history)
 
-            # Create Brian's prompt
-            brian_prompt = PromptBuilder.create_brian_prompt(
-                user_query=user_query,
-                resume_content=self.resume_content,
-                personal_info=self.personal_info,
-                conversation_history=self.conversation_history,
-                suggest_linkedin=suggest_linkedin
-            )
+            # Serve precomputed FAQ answers and approved answers to repeated
+            # questions without any LLM call
+            faq = self._match_faq(user_query, conversation_history, trace)
+            if faq is not None:
+                trace.set("outcome", "faq")
+                return self._finalize_exchange(
+                    user_query=user_query,
+                    final_response=faq.entry.answer,
+                    quality_assessment=faq.entry.quality,
+                    revision_info=f"(FAQ answer: {faq.entry.id}, similarity {faq.score:.2f})",
+                    session_id=session_id,
+                    conversation_history=conversation_history,
+                    suggest_linkedin=suggest_linkedin,
+                    trace=trace
+                )
+
+            cached = await self._get_cached_response(user_query, conversation_history, suggest_linkedin, trace)
+            if cached is not None:
+                trace.set("outcome", "cached")
+                return self._finalize_exchange(
+                    user_query=user_query,
+                    final_response=cached.response,
+                    quality_assessment=cached.quality_assessment,
+                    revision_info=f"(Cached response: {cached.match} match, similarity {cached.similarity:.2f})",
+                    session_id=session_id,
+                    conversation_history=conversation_history,
+                    suggest_linkedin=suggest_linkedin,
+                    trace=trace
+                )
+
+            async def generate() -> GeneratedResponse:
+                return await self._generate_response(user_query, conversation_history, suggest_linkedin, trace)
+
+            # Identical concurrent queries share one OpenAI + Gemini run
+            if self.single_flight is not None:
+                key = self._coalescing_key(user_query, conversation_history, suggest_linkedin)
+                generated, shared = await self.single_flight.do(key, generate)
+            else:
+                generated, shared = await generate(), False
+
+            return self._finish_generated(user_query, generated, shared, session_id,
+                                          conversation_history, suggest_linkedin, trace)
+
+        except Exception as e:
+            trace.set("outcome", "error")
+            return self._handle_processing_error(e, user_query, session_id, conversation_history, trace)
+
+        finally:
+            self._finish_trace(trace)
+
+    def build_answer_prompt(self, user_query: str, session_id: str = DEFAULT_SESSION_ID,
+                            trace: Optional[RequestTrace] = None) -> List[dict]:
+        """
+        Build the answer prompt process_query would send for a query
+
+        Used to generate answers out of band (e.g. through a provider batch API)
+        before completing them with complete_query.
+
+        Args:
+            user_query: User's question or message
+            session_id: Session whose conversation history provides context
+            trace: Optional trace to record prompt token estimates into
+
+        Returns:
+            Chat messages for the answer model
+        """
+        conversation_history = self.sessions.get(session_id)
+        suggest_linkedin = self._should_suggest_linkedin(conversation_history)
+        return self._build_brian_prompt(user_query, conversation_history, suggest_linkedin, trace or RequestTrace())
+
+    async def complete_query(self, user_query: str, initial_response: str, session_id: str = DEFAULT_SESSION_ID,
+                             trace: Optional[RequestTrace] = None) -> Tuple[str, str]:
+        """
+        Run the quality gate on an answer generated out of band and record the exchange
+
+        Args:
+            user_query: User's question or message
+            initial_response: Answer to build_answer_prompt's prompt, or an "Error: ..." string
+            session_id: Session whose conversation history provides context
+            trace: Optional trace to record stage timings into
+
+        Returns:
+            Tuple of (final_response, debug_info)
+        """
+        conversation_history = await self.sessions.aget(session_id)
+        trace = trace or RequestTrace()
+        trace.set("content_hash", self.content_hash)
 
-            # Get initial response from OpenAI
-            initial_response = await self.openai_client.get_response(brian_prompt)
+        try:
+            suggest_linkedin = self._should_suggest_linkedin(conversation_history)
 
-            # Handle API errors
             if initial_response.startswith("Error:"):
-                self.conversation_history.add_exchange(user_query, initial_response)
-                return initial_response, "OpenAI API Error"
+                generated = GeneratedResponse(response=initial_response, error=True)
+            else:
+                brian_prompt = self._build_brian_prompt(user_query, conversation_history, suggest_linkedin, trace)
+                generated = await self._run_quality_gate(
+                    user_query, brian_prompt, initial_response, conversation_history, suggest_linkedin, trace
+                )
 
-            # Quality check with Gemini
-            quality_prompt = PromptBuilder.create_quality_check_prompt(
-                user_query=user_query,
-                brian_response=initial_response,
-                resume_content=self.resume_content,
-                personal_info=self.personal_info
-            )
+            return self._finish_generated(user_query, generated, False, session_id,
+                                          conversation_history, suggest_linkedin, trace)
+
+        except Exception as e:
+            trace.set("outcome", "error")
+            return self._handle_processing_error(e, user_query, session_id, conversation_history, trace)
+
+        finally:
+            self._finish_trace(trace)
+
+    async def stream_query(self, user_query: str, session_id: str = DEFAULT_SESSION_ID,
+                           trace: Optional[RequestTrace] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Streaming variant of process_query
+
+        Yields the response accumulated so far as OpenAI tokens arrive. Once the
+        answer is complete the Gemini quality gate runs on the finished text and
+        a final item is yielded carrying the (possibly revised) response. A query
+        identical to one already in flight waits for that run and yields only
+        the final item.
+
+        Args:
+            user_query: User's question or message
+            session_id: Session whose conversation history provides context
+            trace: Optional trace to record stage timings into
+
+        Yields:
+            Tuples of (response_so_far, debug_info); debug_info is empty until
+            the final item
+        """
+        conversation_history = await self.sessions.aget(session_id)
+        trace = trace or RequestTrace()
+        trace.set("content_hash", self.content_hash)
+        key = flight = None
+
+        try:
+            suggest_linkedin = self._should_suggest_linkedin(conversation_history)
+
+            faq = self._match_faq(user_query, conversation_history, trace)
+            if faq is not None:
+                trace.set("outcome", "faq")
+                yield self._finalize_exchange(
+                    user_query=user_query,
+                    final_response=faq.entry.answer,
+                    quality_assessment=faq.entry.quality,
+                    revision_info=f"(FAQ answer: {faq.entry.id}, similarity {faq.score:.2f})",
+                    session_id=session_id,
+                    conversation_history=conversation_history,
+                    suggest_linkedin=suggest_linkedin,
+                    trace=trace
+                )
+                return
+
+            cached = await self._get_cached_response(user_query, conversation_history, suggest_linkedin, trace)
+            if cached is not None:
+                trace.set("outcome", "cached")
+                yield self._finalize_exchange(
+                    user_query=user_query,
+                    final_response=cached.response,
+                    quality_assessment=cached.quality_assessment,
+                    revision_info=f"(Cached response: {cached.match} match, similarity {cached.similarity:.2f})",
+                    session_id=session_id,
+                    conversation_history=conversation_history,
+                    suggest_linkedin=suggest_linkedin,
+                    trace=trace
+                )
+                return
+
+            if self.single_flight is not None:
+                key = self._coalescing_key(user_query, conversation_history, suggest_linkedin)
+                in_flight = self.single_flight.join(key)
+                if in_flight is not None:
+                    generated, shared = await self.single_flight.wait(in_flight, lambda: self._generate_response(
+                        user_query, conversation_history, suggest_linkedin, trace
+                    ))
+                    yield self._finish_generated(user_query, generated, shared, session_id,
+                                                 conversation_history, suggest_linkedin, trace)
+                    return
+                flight = self.single_flight.lead(key)
+
+            brian_prompt = self._build_brian_prompt(user_query, conversation_history, suggest_linkedin, trace)
+
+            start_time = time.perf_counter()
+            first_token_time = None
+            chunks = []
 
-            quality_assessment = await self.gemini_client.get_quality_assessment(quality_prompt)
+            async for delta in self.answer_client.stream_response(brian_prompt, trace=trace):
+                if first_token_time is None:
+                    first_token_time = time.perf_counter() - start_time
+                chunks.append(delta)
+                yield "".join(chunks), ""
 
-            final_response = initial_response
-            revision_info = ""
+            initial_response = "".join(chunks)
+            stream_time = time.perf_counter() - start_time
+            # Under the provider that answered: the router may have hedged or failed over
+            trace.record(trace.attributes.get("provider", "openai"), stream_time)
 
-            # If revision needed, get improved response
-            if quality_assessment.requires_revision:
-                revision_prompt = PromptBuilder.create_revision_prompt(
-                    original_prompt=brian_prompt,
-                    initial_response=initial_response,
-                    quality_feedback=quality_assessment.feedback
+            if not initial_response or initial_response.startswith("Error:"):
+                generated = GeneratedResponse(response=initial_response or "Error: Empty response from OpenAI",
+                                              error=True)
+            else:
+                logger.info(f"Streamed response: first token {first_token_time:.3f}s, "
+                            f"complete {stream_time:.3f}s")
+                generated = await self._run_quality_gate(
+                    user_query, brian_prompt, initial_response, conversation_history, suggest_linkedin, trace
                 )
 
-                revised_response = await self.openai_client.get_response(revision_prompt)
+            if flight is not None:
+                self.single_flight.finish(key, flight, result=generated)
+
+            final_response, debug_info = self._finish_generated(user_query, generated, False, session_id,
+                                                                conversation_history, suggest_linkedin, trace)
+            if not generated.error:
+                debug_info += (f"Time To First Token: {first_token_time:.3f}s\n"
+                               f"Stream Complete: {stream_time:.3f}s\n")
+
+            yield final_response, debug_info
+
+        except Exception as e:
+            trace.set("outcome", "error")
+            if flight is not None:
+                self.single_flight.finish(key, flight, error=e)
+            yield self._handle_processing_error(e, user_query, session_id, conversation_history, trace)
+
+        finally:
+            # Also covers a client disconnecting mid-stream
+            if flight is not None and not flight.done():
+                self.single_flight.finish(key, flight, error=RuntimeError("stream closed"))
+            self._finish_trace(trace)
+
+    def _coalescing_key(self, user_query: str, conversation_history: ConversationHistory,
+                        suggest_linkedin: bool) -> Tuple[str, str, str, bool]:
+        """Key under which identical concurrent queries share one pipeline run"""
+        context = hashlib.sha256(conversation_history.summary.encode("utf-8"))
+        for user_message, response in conversation_history.exchanges:
+            context.update(f"{user_message}\0{response}\0".encode("utf-8"))
+        return self.content_hash, normalize_text(user_query), context.hexdigest(), suggest_linkedin
+
+    async def _generate_response(self, user_query: str, conversation_history: ConversationHistory,
+                                 suggest_linkedin: bool, trace: RequestTrace) -> GeneratedResponse:
+        """
+        Produce a quality-checked answer without touching the session
+
+        Args:
+            user_query: User's question or message
+            conversation_history: Conversation history providing context
+            suggest_linkedin: Whether to suggest LinkedIn connection
+            trace: Stage timings for this request
+
+        Returns:
+            GeneratedResponse shared by every caller coalesced onto this run
+        """
+        # Create Brian's prompt
+        brian_prompt = self._build_brian_prompt(user_query, conversation_history, suggest_linkedin, trace)
+
+        # Get initial response (from OpenAI unless the router hedged or failed over)
+        start_time = time.perf_counter()
+        try:
+            initial_response = await self.answer_client.get_response(brian_prompt, trace=trace)
+        finally:
+            trace.record(trace.attributes.get("provider", "openai"), time.perf_counter() - start_time)
+
+        # Handle API errors
+        if initial_response.startswith("Error:"):
+            return GeneratedResponse(response=initial_response, error=True)
+
+        return await self._run_quality_gate(
+            user_query, brian_prompt, initial_response, conversation_history, suggest_linkedin, trace
+        )
+
+    async def _run_quality_gate(self, user_query: str, brian_prompt: List[dict], initial_response: str,
+                                conversation_history: ConversationHistory, suggest_linkedin: bool,
+                                trace: RequestTrace) -> GeneratedResponse:
+        """
+        Run the quality gate on a finished OpenAI answer
+
+        Args:
+            user_query: User's question or message
+            brian_prompt: Prompt that produced the initial response
+            initial_response: Complete response from OpenAI
+            conversation_history: Conversation history of the session
+            suggest_linkedin: Whether to suggest LinkedIn connection
+            trace: Stage timings for this request
+
+        Returns:
+            GeneratedResponse with the approved (possibly revised) answer
+        """
+        mode = Config.QUALITY_PIPELINE_MODE
+        decision = None
+        grounding = None
+        local_verdict = None
+
+        if mode != "skip":
+            with trace.span("prescreen"):
+                prescreen = self.prescreen.screen(user_query, initial_response)
+                if self.grounding_checker is not None:
+                    grounding = self.grounding_checker.check(initial_response, self.content.grounding, user_query)
+                    trace.set("grounding", grounding.verdict)
+                    trace.set("grounding_score", round(grounding.score, 3))
+                    self.metrics.grounding_verdicts.inc(labels={"verdict": grounding.verdict})
+                    # Clear-cut verdicts settle the answer locally; a grounded answer
+                    # the pre-screen flagged for other reasons still goes to Gemini
+                    if grounding.verdict == "fabricated" or (grounding.verdict == "grounded"
+                                                             and not prescreen.likely_revision):
+                        local_verdict = grounding.verdict
+                # Claims only the query backs up (a leading question) always get the remote check
+                if (local_verdict is None and self.quality_sampler is not None
+                        and not (grounding is not None and grounding.echoed)):
+                    decision = self.quality_sampler.decide(user_query, initial_response, prescreen)
+
+        if local_verdict == "fabricated":
+            # Revise right away with the unsupported claims as feedback
+            quality_assessment = self._grounding_quality_assessment(grounding)
+            final_response, revision_info = initial_response, ""
+            revised_response = await self._revise_response(
+                brian_prompt, initial_response, grounding.feedback, trace, "revision"
+            )
+            if not revised_response.startswith("Error:"):
+                final_response, revision_info = revised_response, f"(Revised: {grounding.feedback})"
+        elif local_verdict == "grounded":
+            quality_assessment = self._grounding_quality_assessment(grounding)
+            final_response, revision_info = initial_response, ""
+        elif mode == "skip" or (decision is not None and not decision.run_check):
+            quality_assessment = self._skipped_quality_assessment(decision)
+            final_response, revision_info = initial_response, ""
+        elif mode == "pipelined":
+            quality_assessment, final_response, revision_info = await self._pipelined_quality_gate(
+                user_query, brian_prompt, initial_response, prescreen, trace
+            )
+        else:
+            quality_assessment, final_response, revision_info = await self._serial_quality_gate(
+                user_query, brian_prompt, initial_response, trace
+            )
+
+        checked = mode != "skip" and local_verdict is None and (decision is None or decision.run_check)
+        if checked and decision is not None:
+            self.quality_sampler.record(decision, quality_assessment)
+        if grounding is not None:
+            if checked:
+                self._record_grounding_agreement(grounding, quality_assessment)
+            elif local_verdict is not None and self._grounding_rng.random() < Config.GROUNDING_AUDIT_RATE:
+                self._audit_grounding(user_query, initial_response, grounding)
+
+        trace.set("revised", bool(revision_info))
+        if local_verdict is not None:
+            trace.set("quality_check", "local")
+        else:
+            trace.set("quality_check", "skipped" if not checked else "audit" if decision and decision.audit else "run")
+        if decision is not None:
+            trace.set("quality_check_reason", decision.reason)
+            trace.set("query_category", decision.category)
+
+        # Only answers Gemini approved as-is, generated without conversation
+        # context or a LinkedIn instruction, are safe to reuse for other users;
+        # an answer to content replaced mid-request is not cached at all
+        if (self.response_cache is not None and checked
+                and not quality_assessment.requires_revision
+                and not conversation_history.exchanges and not suggest_linkedin
+                and trace.attributes.get("content_hash", self.content_hash) == self.content_hash):
+            self.response_cache.put(user_query, self.content_hash, final_response, quality_assessment)
+
+        return GeneratedResponse(
+            response=final_response,
+            quality_assessment=quality_assessment,
+            revision_info=revision_info
+        )
+
+    def _finish_generated(self, user_query: str, generated: GeneratedResponse, shared: bool, session_id: str,
+                          conversation_history: ConversationHistory, suggest_linkedin: bool,
+                          trace: RequestTrace) -> Tuple[str, str]:
+        """Record a generated (or shared) answer in the caller's session"""
+        if shared:
+            trace.set("outcome", "coalesced")
+
+        if generated.error:
+            trace.attributes.setdefault("outcome", "openai_error")
+            conversation_history.add_exchange(user_query, generated.response)
+            self.sessions.touch(session_id)
+            self._audit_exchange(user_query, generated.response, session_id, conversation_history, trace)
+            return generated.response, "OpenAI API Error"
+
+        revision_info = generated.revision_info
+        if shared:
+            revision_info = f"{revision_info}\n(Shared with an identical in-flight query)".lstrip()
+
+        return self._finalize_exchange(
+            user_query=user_query,
+            final_response=generated.response,
+            quality_assessment=generated.quality_assessment,
+            revision_info=revision_info,
+            session_id=session_id,
+            conversation_history=conversation_history,
+            suggest_linkedin=suggest_linkedin,
+            trace=trace
+        )
 
-                # Use revised response if it's valid
-                if not revised_response.startswith("Error:"):
-                    final_response = revised_response
-                    revision_info = f"(Revised: {quality_assessment.feedback})"
+    def _match_faq(self, user_query: str, conversation_history: ConversationHistory,
+                   trace: RequestTrace) -> Optional[FaqMatch]:
+        """Route a first-turn query to a precomputed FAQ answer if it matches confidently"""
+        # Later turns depend on the conversation, and answers to old content are stale
+        if (self.faq_index is None or conversation_history.exchanges
+                or self.faq_index.content_hash != self.content_hash):
+            return None
+
+        with trace.span("faq_match"):
+            match = self.faq_index.match(user_query)
+        self.metrics.faq_lookups.inc(labels={"result": "hit" if match is not None else "fall_through"})
+        if match is not None:
+            trace.set("faq_entry", match.entry.id)
+        return match
+
+    async def _get_cached_response(self, user_query: str, conversation_history: ConversationHistory,
+                                   suggest_linkedin: bool, trace: RequestTrace) -> Optional[CachedResponse]:
+        """Look up an approved answer for a first-turn query in the response cache"""
+        # Only context-free answers are cached, so only context-free queries may reuse them
+        if self.response_cache is None or conversation_history.exchanges or suggest_linkedin:
+            return None
+
+        with trace.span("cache_lookup"):
+            return await self.response_cache.aget(user_query, self.content_hash)
+
+    def _finalize_exchange(self, user_query: str, final_response: str, quality_assessment: ResponseQuality,
+                           revision_info: str, session_id: str, conversation_history: ConversationHistory,
+                           suggest_linkedin: bool, trace: RequestTrace) -> Tuple[str, str]:
+        """
+        Apply per-session post-processing and record the exchange
+
+        Args:
+            user_query: User's question or message
+            final_response: Approved response text
+            quality_assessment: Quality assessment of the response
+            revision_info: Revision or cache note for the debug info
+            session_id: Session the exchange belongs to
+            conversation_history: Conversation history of the session
+            suggest_linkedin: Whether to suggest LinkedIn connection
+            trace: Stage timings for this request
 
-            # Add LinkedIn suggestion if appropriate and not already included
-            linkedin_suggested = False
+        Returns:
+            Tuple of (final_response, debug_info)
+        """
+        # Add LinkedIn suggestion if appropriate and not already included
+        linkedin_suggested = False
+        with trace.span("linkedin"):
             if suggest_linkedin and "linkedin.com/in/brian-veau" not in final_response.lower():
                 final_response = self._add_linkedin_suggestion(final_response)
                 linkedin_suggested = True
 
-            # Update conversation history
-            self.conversation_history.add_exchange(user_query, final_response)
+        # Update conversation history
+        conversation_history.add_exchange(user_query, final_response)
+        self.sessions.touch(session_id)
+        if self.summarizer is not None:
+            # Never awaited here: the next turn uses whichever summary is ready
+            self.summarizer.schedule(session_id, conversation_history)
+        trace.set("quality", quality_assessment.model_dump())
+        self._audit_exchange(user_query, final_response, session_id, conversation_history, trace,
+                             quality_assessment)
+
+        # Prepare debug information
+        debug_info = self._create_debug_info(
+            quality_assessment=quality_assessment,
+            revision_info=revision_info,
+            linkedin_suggested=linkedin_suggested,
+            conversation_history=conversation_history,
+            trace=trace
+        )
+
+        logger.info(f"Query processed successfully. Quality score: {quality_assessment.confidence_score}")
+
+        return final_response, debug_info
+
+    async def _serial_quality_gate(self, user_query: str, brian_prompt: List[dict], initial_response: str,
+                                   trace: RequestTrace) -> Tuple[ResponseQuality, str, str]:
+        """
+        Gemini check followed by an OpenAI revision when requested
+
+        Returns:
+            Tuple of (quality_assessment, final_response, revision_info)
+        """
+        quality_assessment = await self._check_quality(user_query, initial_response, trace)
 
-            # Prepare debug information
-            debug_info = self._create_debug_info(
-                quality_assessment=quality_assessment,
-                revision_info=revision_info,
-                linkedin_suggested=linkedin_suggested
+        # If revision needed, get improved response
+        if quality_assessment.requires_revision:
+            revised_response = await self._revise_response(
+                brian_prompt, initial_response, quality_assessment.feedback, trace, "revision"
             )
 
-            logger.info(f"Query processed successfully. Quality score: {quality_assessment.confidence_score}")
+            # Use revised response if it's valid
+            if not revised_response.startswith("Error:"):
+                return quality_assessment, revised_response, f"(Revised: {quality_assessment.feedback})"
 
-            return final_response, debug_info
+        return quality_assessment, initial_response, ""
 
-        except Exception as e:
-            error_msg = f"I apologize, but I'm experiencing technical difficulties. Please try again."
-            logger.error(f"Error processing query: {str(e)}")
+    async def _pipelined_quality_gate(self, user_query: str, brian_prompt: List[dict], initial_response: str,
+                                      prescreen: PrescreenResult,
+                                      trace: RequestTrace) -> Tuple[ResponseQuality, str, str]:
+        """
+        Gemini check overlapped with a speculative revision
 
-            # Still update conversation history for context
-            self.conversation_history.add_exchange(user_query, error_msg)
+        A local pre-screen predicts whether the check will fail. When it does,
+        the revision (driven by the pre-screen findings) starts alongside the
+        Gemini check, so a failed check costs one round trip instead of two.
+        A speculative revision is discarded if Gemini approves the answer.
 
-            return error_msg, f"System Error: {str(e)}"
+        Returns:
+            Tuple of (quality_assessment, final_response, revision_info)
+        """
+        check_task = asyncio.create_task(self._check_quality(user_query, initial_response, trace))
+        revision_task = None
+        if prescreen.likely_revision:
+            revision_task = asyncio.create_task(self._revise_response(
+                brian_prompt, initial_response, prescreen.feedback, trace, "revision_speculative"
+            ))
 
-    def _create_debug_info(self, quality_assessment, revision_info: str, linkedin_suggested: bool) -> str:
+        try:
+            quality_assessment = await check_task
+
+            if not quality_assessment.requires_revision:
+                return quality_assessment, initial_response, ""
+
+            if revision_task is not None:
+                revised_response = await revision_task
+                revision_info = f"(Revised speculatively: {prescreen.feedback})"
+            else:
+                revised_response = await self._revise_response(
+                    brian_prompt, initial_response, quality_assessment.feedback, trace, "revision"
+                )
+                revision_info = f"(Revised: {quality_assessment.feedback})"
+
+            if revised_response.startswith("Error:"):
+                return quality_assessment, initial_response, ""
+
+            return quality_assessment, revised_response, revision_info
+
+        finally:
+            for task in (check_task, revision_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _check_quality(self, user_query: str, response: str, trace: RequestTrace,
+                             priority: int = PRIORITY_QUALITY_CHECK) -> ResponseQuality:
+        """Run the Gemini quality check on a response"""
+        # Quality check with Gemini
+        quality_prompt = PromptBuilder.create_quality_check_prompt(
+            user_query=user_query,
+            brian_response=response,
+            resume_content=self._resume_context(f"{user_query}\n{response}",
+                                                top_k=Config.RETRIEVAL_QUALITY_TOP_K),
+            personal_info=self.personal_info
+        )
+
+        trace.count("quality_check", self.token_counter.count(quality_prompt))
+
+        with trace.span("quality_check"):
+            return await self.gemini_client.get_quality_assessment(quality_prompt, trace=trace, priority=priority)
+
+    async def _revise_response(self, brian_prompt: List[dict], initial_response: str, feedback: str,
+                               trace: RequestTrace, stage: str) -> str:
+        """Ask OpenAI for a revised response addressing the feedback"""
+        revision_prompt = PromptBuilder.create_revision_prompt(
+            original_prompt=brian_prompt,
+            initial_response=initial_response,
+            quality_feedback=feedback
+        )
+        if self.prompt_budgeter is not None:
+            # The revision repeats the original prompt; make room for the answer and feedback
+            revision_prompt = self.prompt_budgeter.fit_messages(revision_prompt, keep_tail=3)
+
+        trace.count(stage, self.token_counter.count_messages(revision_prompt))
+
+        with trace.span(stage):
+            return await self.answer_client.get_response(revision_prompt, trace=trace, priority=PRIORITY_REVISION)
+
+    @staticmethod
+    def _skipped_quality_assessment(decision: Optional[QualityDecision] = None) -> ResponseQuality:
+        """Assessment recorded when the quality check is disabled or sampled out"""
+        return ResponseQuality(
+            is_professional=True,
+            is_relevant=True,
+            is_based_on_resume=True,
+            confidence_score=0.8,
+            feedback=f"Quality check skipped ({decision.reason})" if decision else "Quality check skipped",
+            requires_revision=False
+        )
+
+    @staticmethod
+    def _grounding_quality_assessment(grounding: GroundingResult) -> ResponseQuality:
+        """Assessment recorded when the local groundedness verdict settles an answer"""
+        fabricated = grounding.verdict == "fabricated"
+        return ResponseQuality(
+            is_professional=True,
+            is_relevant=True,
+            is_based_on_resume=not fabricated,
+            confidence_score=round(grounding.score, 2),
+            feedback=(grounding.feedback if fabricated else
+                      f"Local groundedness check: all {grounding.claims} claims found in the sources"),
+            requires_revision=fabricated
+        )
+
+    def _record_grounding_agreement(self, grounding: GroundingResult, quality_assessment: ResponseQuality):
+        """Compare a local verdict with Gemini's judgement of the same answer"""
+        # A failed Gemini call says nothing about the answer
+        if quality_assessment.feedback.startswith(FAILED_CHECK_PREFIX):
+            return
+        self.grounding_checker.record_agreement(grounding, quality_assessment.is_based_on_resume)
+        self.metrics.grounding_agreement.inc(labels={
+            "verdict": grounding.verdict,
+            "gemini": "pass" if quality_assessment.is_based_on_resume else "fail"
+        })
+
+    def _audit_grounding(self, user_query: str, response: str, grounding: GroundingResult):
+        """Check a locally settled answer with Gemini in the background, for agreement statistics only"""
+        async def audit():
+            quality_assessment = await self._check_quality(user_query, response, RequestTrace(),
+                                                           priority=PRIORITY_BACKGROUND)
+            self._record_grounding_agreement(grounding, quality_assessment)
+
+        task = asyncio.get_running_loop().create_task(audit())
+        self._grounding_audits.add(task)
+        task.add_done_callback(self._grounding_audits.discard)
+
+    def _handle_processing_error(self, error: Exception, user_query: str, session_id: str,
+                                 conversation_history: ConversationHistory,
+                                 trace: RequestTrace) -> Tuple[str, str]:
+        """Log a processing failure and record an apology in the conversation"""
+        error_msg = f"I apologize, but I'm experiencing technical difficulties. Please try again."
+        logger.error(f"Error processing query: {str(error)}")
+
+        # Still update conversation history for context
+        conversation_history.add_exchange(user_query, error_msg)
+        self.sessions.touch(session_id)
+        self._audit_exchange(user_query, error_msg, session_id, conversation_history, trace)
+
+        return error_msg, f"System Error: {str(error)}"
+
+    def _create_debug_info(self, quality_assessment, revision_info: str, linkedin_suggested: bool,
+                           conversation_history: ConversationHistory, trace: RequestTrace) -> str:
         """Create debug information string"""
+        quality_check = trace.attributes.get("quality_check", "not run")
+        if trace.attributes.get("quality_check_reason"):
+            quality_check += f" ({trace.attributes['quality_check_reason']})"
+        provider = trace.attributes.get("provider", "openai")
+        if trace.attributes.get("routing", "primary") != "primary":
+            provider += f" ({trace.attributes['routing']})"
+
         return f"""
 Quality Score: {quality_assessment.confidence_score:.2f}
 Professional: {quality_assessment.is_professional}
 Relevant: {quality_assessment.is_relevant}
 Based on Resume: {quality_assessment.is_based_on_resume}
 {revision_info}
-Interaction Count: {self.conversation_history.interaction_count}
+Interaction Count: {conversation_history.interaction_count}
 LinkedIn Suggested: {linkedin_suggested}
+Pipeline Mode: {Config.QUALITY_PIPELINE_MODE}
+Quality Check: {quality_check}
+Answer Provider: {provider}
+Stage Timings: {trace.format_timings()}
+Prompt Tokens (est.): {trace.format_counters()}
+LLM Tokens: {trace.format_usage()}
 """
 
-    def reset_conversation(self):
+    def _reset_session(self, session_id: str):
+        """Drop a session and record the reset so a restart does not bring it back"""
+        self.sessions.reset(session_id)
+        if self.audit_log is not None:
+            # Rehydration starts after the latest reset
+            self.audit_log.append(AuditRecord(session_id=session_id, kind="reset"))
+
+    def _audit_exchange(self, user_query: str, response: str, session_id: str,
+                        conversation_history: ConversationHistory, trace: RequestTrace,
+                        quality_assessment: Optional[ResponseQuality] = None):
+        """Queue a finished exchange for the audit log"""
+        if self.audit_log is None:
+            return
+        snapshot = trace.to_dict()
+        self.audit_log.append(AuditRecord(
+            session_id=session_id,
+            interaction=conversation_history.interaction_count,
+            query=user_query,
+            response=response,
+            outcome=trace.attributes.get("outcome", "ok"),
+            confidence=quality_assessment.confidence_score if quality_assessment else None,
+            revised=bool(trace.attributes.get("revised")),
+            quality=quality_assessment.model_dump() if quality_assessment else None,
+            timings={"total": snapshot["total_seconds"], **snapshot["spans"]},
+            tokens={"prompt_estimated": snapshot["prompt_tokens_estimated"], "usage": snapshot["usage"]},
+            content_hash=trace.attributes.get("content_hash")
+        ))
+
+    def _rehydrate_sessions(self):
+        """Restore the sessions active within the session TTL from the audit log"""
+        try:
+            sessions = self.audit_log.load_sessions(
+                since=time.time() - Config.SESSION_TTL_SECONDS,
+                max_sessions=Config.SESSION_MAX_COUNT,
+                max_exchanges=Config.HISTORY_MAX_EXCHANGES
+            )
+        except Exception as e:
+            logger.warning(f"Failed to rehydrate sessions from {self.audit_log.path}: {str(e)}")
+            return
+
+        for session_id, (exchanges, interaction_count) in sessions.items():
+            history = self.sessions.get(session_id, seed_exchanges=exchanges)
+            if history.interaction_count < interaction_count:
+                history.interaction_count = interaction_count
+                self.sessions.touch(session_id)
+        logger.info(f"Rehydrated {len(sessions)} sessions from the audit log")
+
+    def _finish_trace(self, trace: RequestTrace):
+        """Publish a finished request trace to the metrics registry and trace sink"""
+        trace.attributes.setdefault("outcome", "ok")
+        trace.set("mode", Config.QUALITY_PIPELINE_MODE)
+
+        self.metrics.observe_trace(trace)
+        if self.trace_sink is not None:
+            self.trace_sink.write(trace)
+
+    def reset_conversation(self, session_id: str = DEFAULT_SESSION_ID):
         """Reset conversation history"""
-        self.conversation_history.clear()
+        self._reset_session(session_id)
         logger.info("Conversation history reset")
 
-    def get_conversation_stats(self) -> dict:
+    def get_conversation_stats(self, session_id: str = DEFAULT_SESSION_ID) -> dict:
         """Get conversation statistics"""
+        conversation_history = self.sessions.get(session_id)
         return {
-            "total_interactions": self.conversation_history.interaction_count,
-            "exchanges": len(self.conversation_history.exchanges),
-            "linkedin_threshold": Config.LINKEDIN_THRESHOLD
+            "total_interactions": conversation_history.interaction_count,
+            "exchanges": len(conversation_history.exchanges),
+            "linkedin_threshold": Config.LINKEDIN_THRESHOLD,
+            "shared_backend": self.shared_backend.describe(),
+            "content": {
+                "version": self.content_hash,
+                "loaded_at": self.content.loaded_at,
+                "reloads": self.content_reloads
+            },
+            "sessions": self.sessions.stats(),
+            "faq": self.faq_index.stats() if self.faq_index else None,
+            "grounding": self.grounding_checker.stats() if self.grounding_checker else None,
+            "summaries": self.summarizer.stats() if self.summarizer else None,
+            "audit": self.audit_log.stats() if self.audit_log else None,
+            "response_cache": self.response_cache.stats() if self.response_cache else None,
+            "quality_sampling": self.quality_sampler.stats() if self.quality_sampler else None,
+            "coalescing": self.single_flight.stats() if self.single_flight else None,
+            "providers": self.router.stats() if self.router else None,
+            "prompt_budget": {
+                "tokenizer": self.token_counter.backend,
+                "input_budget": self.prompt_budgeter.input_budget if self.prompt_budgeter else None
+            },
+            "quality_parse": dict(getattr(self.gemini_client, "parse_counts", {})),
+            "llm_admission": {
+                name: client.limiter.stats()
+                for name, client in (("openai", self.openai_client), ("gemini", self.gemini_client))
+                if hasattr(client, "limiter")
+            }
         }
\ No newline at end of file
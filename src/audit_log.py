@@ -0,0 +1,291 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    interaction INTEGER NOT NULL DEFAULT 0,
+    query TEXT NOT NULL DEFAULT '',
+    response TEXT NOT NULL DEFAULT '',
+    outcome TEXT,
+    confidence REAL,
+    revised INTEGER NOT NULL DEFAULT 0,
+    quality TEXT,
+    timings TEXT,
+    tokens TEXT,
+    content_hash TEXT
+);
+CREATE INDEX IF NOT EXISTS exchanges_session ON exchanges (session_id, id);
+CREATE INDEX IF NOT EXISTS exchanges_ts ON exchanges (ts);
+"""
+
+COLUMNS = ("ts", "session_id", "kind", "interaction", "query", "response", "outcome",
+           "confidence", "revised", "quality", "timings", "tokens", "content_hash")
+INSERT = f"INSERT INTO exchanges ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)})"
+# Columns holding JSON documents
+JSON_COLUMNS = ("quality", "timings", "tokens")
+
+# Queued to make the writer flush and exit
+_STOP = object()
+
+
+@dataclass
+class AuditRecord:
+    """One appended row: a finished exchange or a conversation reset"""
+    session_id: str
+    kind: str = "exchange"
+    interaction: int = 0
+    query: str = ""
+    response: str = ""
+    outcome: Optional[str] = None
+    confidence: Optional[float] = None
+    revised: bool = False
+    quality: Optional[dict] = None
+    timings: Optional[dict] = None
+    tokens: Optional[dict] = None
+    content_hash: Optional[str] = None
+    ts: float = field(default_factory=time.time)
+
+    def row(self) -> tuple:
+        return (self.ts, self.session_id, self.kind, self.interaction, self.query, self.response,
+                self.outcome, self.confidence, int(self.revised),
+                *(json.dumps(value) if value is not None else None
+                  for value in (self.quality, self.timings, self.tokens)),
+                self.content_hash)
+
+
+class AuditLog:
+    """
+    Append-only conversation and audit log in SQLite (WAL mode)
+
+    Requests only enqueue records; a background thread writes them in
+    batches, one transaction per batch, so logging adds no I/O to the request
+    path. When the queue is full records are dropped and counted rather than
+    blocking a request. Reads open their own connection and run concurrently
+    with the writer.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 0.5,
+                 max_queue: int = 10000):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            batch_size: Records written per transaction at most
+            flush_interval: Seconds a partial batch may wait for more records
+            max_queue: Records buffered before new ones are dropped
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failures = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        # WAL makes NORMAL durable against process crashes; only an OS crash can lose the last batches
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def start(self):
+        """Start the writer in a daemon thread; pending records are flushed at exit"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def append(self, record: AuditRecord):
+        """Queue a record for writing (never blocks)"""
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued records and stop the writer"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        connection = self._connect()
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._write(connection, batch)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _next_batch(self) -> Tuple[List[AuditRecord], bool]:
+        """Wait for a record, then collect more until the batch is full or the flush interval ends"""
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, connection: sqlite3.Connection, batch: List[AuditRecord]):
+        try:
+            with connection:
+                connection.executemany(INSERT, [record.row() for record in batch])
+            self.written += len(batch)
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.failures += 1
+            logger.warning(f"Failed to write {len(batch)} audit records to {self.path}: {str(e)}")
+
+    def load_sessions(self, since: float, max_sessions: int,
+                      max_exchanges: int) -> Dict[str, Tuple[List[Tuple[str, str]], int]]:
+        """
+        Read back the conversations active since a point in time
+
+        Exchanges before a session's latest reset are ignored.
+
+        Args:
+            since: Unix time of the oldest activity to consider
+            max_sessions: Most recently active sessions to return
+            max_exchanges: Latest exchanges to return per session
+
+        Returns:
+            session_id -> (exchanges oldest first, interaction count)
+        """
+        sessions = {}
+        with closing(self._connect()) as connection:
+            active = connection.execute(
+                "SELECT session_id FROM exchanges WHERE ts >= ? GROUP BY session_id "
+                "ORDER BY MAX(id) DESC LIMIT ?", (since, max_sessions)
+            ).fetchall()
+            for (session_id,) in active:
+                reset_id = connection.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM exchanges WHERE session_id = ? AND kind = 'reset'",
+                    (session_id,)
+                ).fetchone()[0]
+                rows = connection.execute(
+                    "SELECT query, response, interaction FROM exchanges "
+                    "WHERE session_id = ? AND kind = 'exchange' AND id > ? ORDER BY id DESC LIMIT ?",
+                    (session_id, reset_id, max_exchanges)
+                ).fetchall()
+                if rows:
+                    sessions[session_id] = ([(query, response) for query, response, _ in reversed(rows)],
+                                            rows[0][2])
+        return sessions
+
+    def recent(self, limit: int = 50, session_id: Optional[str] = None,
+               since: Optional[float] = None) -> List[dict]:
+        """
+        Latest exchanges, newest first
+
+        Args:
+            limit: Maximum number of exchanges
+            session_id: Only exchanges of this session
+            since: Only exchanges at or after this Unix time
+
+        Returns:
+            Exchange records with their JSON columns decoded
+        """
+        conditions, params = ["kind = 'exchange'"], []
+        if session_id is not None:
+            conditions.append("session_id = ?")
+            params.append(session_id)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+
+        with closing(self._connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            rows = connection.execute(
+                f"SELECT id, {', '.join(COLUMNS)} FROM exchanges WHERE {' AND '.join(conditions)} "
+                f"ORDER BY id DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(row)
+            for column in JSON_COLUMNS:
+                if record[column] is not None:
+                    record[column] = json.loads(record[column])
+            record["revised"] = bool(record["revised"])
+            records.append(record)
+        return records
+
+    def summary(self, since: Optional[float] = None) -> dict:
+        """
+        Aggregate statistics over the exchanges since a point in time
+
+        Args:
+            since: Unix time of the oldest exchange to include (default: all)
+
+        Returns:
+            Exchange and session counts, revision rate, mean confidence and outcome counts
+        """
+        since = since if since is not None else 0.0
+        with closing(self._connect()) as connection:
+            exchanges, sessions, revised, confidence = connection.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT session_id), COALESCE(SUM(revised), 0), AVG(confidence) "
+                "FROM exchanges WHERE kind = 'exchange' AND ts >= ?", (since,)
+            ).fetchone()
+            outcomes = dict(connection.execute(
+                "SELECT COALESCE(outcome, 'ok'), COUNT(*) FROM exchanges "
+                "WHERE kind = 'exchange' AND ts >= ? GROUP BY 1", (since,)
+            ).fetchall())
+        return {
+            "exchanges": exchanges,
+            "sessions": sessions,
+            "revision_rate": revised / exchanges if exchanges else 0.0,
+            "mean_confidence": confidence,
+            "outcomes": outcomes
+        }
+
+    def stats(self) -> dict:
+        """Get writer statistics"""
+        return {
+            "path": self.path,
+            "written": self.written,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "failures": self.failures
+        }
@@ -0,0 +1,410 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .config import Config
+from .tracing import RequestTrace
+
+logger = logging.getLogger(__name__)
+
+# Outcomes that are not retried when a run is resumed
+COMPLETED_OUTCOMES = ("ok", "cached", "coalesced", "faq")
+
+
+@dataclass
+class BatchQuery:
+    """One query of a batch file"""
+    id: str
+    query: str
+    session_id: str
+
+
+def load_batch_queries(path: str) -> List[BatchQuery]:
+    """
+    Read queries from a JSONL file
+
+    Each line holds the query under "query", "message" or "title", an optional
+    "id" (or "request_id") and an optional "session_id". Queries sharing a
+    session_id run in file order as one conversation; others get their own session.
+
+    Args:
+        path: JSONL file
+
+    Returns:
+        Queries in file order
+    """
+    queries = []
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            query = record.get("query") or record.get("message") or record.get("title")
+            if not query:
+                logger.warning(f"{path}:{line_number}: no query, skipping")
+                continue
+
+            query_id = str(record.get("id") or record.get("request_id") or f"line-{line_number}")
+            if query_id in seen:
+                raise ValueError(f"{path}:{line_number}: duplicate id {query_id}")
+            seen.add(query_id)
+
+            queries.append(BatchQuery(query_id, query, str(record.get("session_id") or f"batch-{query_id}")))
+    return queries
+
+
+def read_completed(path: str) -> Dict[str, dict]:
+    """
+    Results already written by a previous run
+
+    Args:
+        path: Output JSONL file (may not exist)
+
+    Returns:
+        id -> latest completed result; a truncated last line from a crash is ignored
+    """
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("outcome") in COMPLETED_OUTCOMES:
+                completed[record["id"]] = record
+    return completed
+
+
+def _result_record(item: BatchQuery, response: str, trace: RequestTrace, mode: str) -> dict:
+    """Output line for a processed query"""
+    details = trace.to_dict()
+    attributes = details["attributes"]
+    quality = attributes.get("quality")
+    return {
+        "id": item.id,
+        "session_id": item.session_id,
+        "query": item.query,
+        "response": response,
+        "outcome": attributes.get("outcome", "ok"),
+        "quality_score": quality["confidence_score"] if quality else None,
+        "quality": quality,
+        "revised": bool(attributes.get("revised")),
+        "provider": attributes.get("provider"),
+        "mode": mode,
+        "total_seconds": details["total_seconds"],
+        "spans": details["spans"],
+        "usage": details["usage"],
+        "completed_at": round(time.time(), 3)
+    }
+
+
+class BatchRunner:
+    """
+    Runs a file of queries through AIAgentSystem and appends results to JSONL
+
+    Results are written and flushed as each query finishes, so a crashed run
+    resumes by skipping ids that already have a completed result; failed
+    queries are retried. Conversations (queries sharing a session) run in
+    order, different conversations run concurrently.
+    """
+
+    def __init__(self, system, output_path: str, concurrency: int = 8, batch_api=None):
+        """
+        Args:
+            system: AIAgentSystem processing the queries
+            output_path: JSONL file receiving one result per query
+            concurrency: Maximum conversations processed at once
+            batch_api: Optional provider batch backend (e.g. OpenAIBatchAPI) used
+                to generate the answers; the quality gate still runs per query
+        """
+        self.system = system
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.batch_api = batch_api
+
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+        self._total = 0
+        self._started = 0.0
+        self._file = None
+
+    async def run(self, queries: List[BatchQuery], resume: bool = True) -> dict:
+        """
+        Process queries, skipping those already completed in the output file
+
+        Args:
+            queries: Queries to process
+            resume: Continue a previous run's output instead of starting over
+
+        Returns:
+            Run summary
+        """
+        completed = read_completed(self.output_path) if resume else {}
+        conversations = self._conversations(queries, completed)
+        self._total = sum(len(pending) for pending in conversations.values())
+        self.skipped = len(queries) - self._total
+        self._started = time.perf_counter()
+        logger.info(f"Batch: {self._total} queries to process, {self.skipped} already completed")
+
+        directory = os.path.dirname(os.path.abspath(self.output_path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.output_path, 'a' if resume else 'w', encoding='utf-8') as self._file:
+            if self.batch_api is not None:
+                await self._run_batch_api(conversations)
+            else:
+                await self._run_online(conversations)
+
+        return self.summary()
+
+    def _conversations(self, queries: List[BatchQuery],
+                       completed: Dict[str, dict]) -> "OrderedDict[str, List[BatchQuery]]":
+        """Group pending queries by session, seeding sessions with their completed turns"""
+        conversations: "OrderedDict[str, List[BatchQuery]]" = OrderedDict()
+        history: Dict[str, List[Tuple[str, str]]] = {}
+
+        for item in queries:
+            pending = conversations.setdefault(item.session_id, [])
+            done = completed.get(item.id)
+            if done is not None and not pending:
+                # Turns before the first pending one become the session's context
+                history.setdefault(item.session_id, []).append((item.query, done["response"]))
+            else:
+                # Later turns are redone so the conversation stays consistent
+                pending.append(item)
+
+        for session_id, exchanges in history.items():
+            self.system.sessions.get(session_id, seed_exchanges=exchanges)
+
+        return OrderedDict((session_id, pending) for session_id, pending in conversations.items() if pending)
+
+    async def _run_online(self, conversations: "OrderedDict[str, List[BatchQuery]]"):
+        """
+        Run every conversation through process_query, bounded by the concurrency
+
+        A failed turn ends its conversation for this run; the remaining turns
+        depend on its answer and run when the batch is resumed.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_conversation(items: List[BatchQuery]):
+            async with semaphore:
+                for item in items:
+                    trace = RequestTrace()
+                    response, _ = await self.system.process_query(item.query, session_id=item.session_id,
+                                                                  trace=trace)
+                    if not self._write(_result_record(item, response, trace, "online")):
+                        return
+
+        await asyncio.gather(*(run_conversation(items) for items in conversations.values()))
+
+    async def _run_batch_api(self, conversations: "OrderedDict[str, List[BatchQuery]]"):
+        """
+        Generate answers through the provider batch API, one round per conversation turn
+
+        Each round submits the next pending turn of every conversation as one
+        batch, then completes the answers (quality gate, session update) with
+        bounded concurrency. As online, a failed turn ends its conversation.
+        """
+        queues = [list(items) for items in conversations.values()]
+        round_number = 0
+
+        while any(queues):
+            round_number += 1
+            items = [queue.pop(0) for queue in queues if queue]
+            traces = {item.id: RequestTrace() for item in items}
+            prompts = {
+                item.id: self.system.build_answer_prompt(item.query, item.session_id, traces[item.id])
+                for item in items
+            }
+
+            logger.info(f"Batch round {round_number}: submitting {len(prompts)} prompts")
+            answers = await self.batch_api.run(prompts, state_key=f"{self.output_path}.round{round_number}")
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def complete(item: BatchQuery) -> bool:
+                async with semaphore:
+                    trace = traces[item.id]
+                    answer = answers.get(item.id) or "Error: No result from the batch API"
+                    usage = self.batch_api.usage.get(item.id)
+                    if usage:
+                        trace.add_usage(self.batch_api.provider, *usage)
+                    response, _ = await self.system.complete_query(item.query, answer, item.session_id, trace)
+                    return self._write(_result_record(item, response, trace, "batch_api"))
+
+            succeeded = await asyncio.gather(*(complete(item) for item in items))
+            failed_sessions = {item.session_id for item, ok in zip(items, succeeded) if not ok}
+            queues = [queue for queue in queues if queue and queue[0].session_id not in failed_sessions]
+
+    def _write(self, record: dict) -> bool:
+        """
+        Append a result and flush it so a crash loses at most the queries in flight
+
+        Returns:
+            Whether the query completed
+        """
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+        if record["outcome"] in COMPLETED_OUTCOMES:
+            self.processed += 1
+        else:
+            self.failed += 1
+
+        done = self.processed + self.failed
+        if done % 25 == 0 or done == self._total:
+            logger.info(f"Batch progress: {done}/{self._total} ({self.failed} failed), "
+                        f"{time.perf_counter() - self._started:.1f}s elapsed")
+        return record["outcome"] in COMPLETED_OUTCOMES
+
+    def summary(self) -> dict:
+        """Counts and throughput of the run"""
+        elapsed = time.perf_counter() - self._started
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "seconds": round(elapsed, 3),
+            "queries_per_second": round((self.processed + self.failed) / elapsed, 3) if elapsed else 0.0
+        }
+
+
+class OpenAIBatchAPI:
+    """
+    Generates answers through the OpenAI Batch API
+
+    Batch jobs are billed at a discount but may take up to the completion
+    window to finish. The submitted batch id is saved next to the output, so a
+    resumed run polls the same job instead of paying for it twice.
+    """
+
+    provider = "openai"
+
+    def __init__(self, client, poll_interval: float = 30.0, completion_window: str = "24h"):
+        """
+        Args:
+            client: AsyncOpenAI client (or a stand-in exposing files and batches)
+            poll_interval: Seconds between batch status checks
+            completion_window: Batch completion window requested from OpenAI
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        # custom_id -> (prompt_tokens, completion_tokens) of the last run
+        self.usage: Dict[str, Tuple[int, int]] = {}
+
+    async def run(self, prompts: Dict[str, List[dict]], state_key: str) -> Dict[str, str]:
+        """
+        Submit prompts as one batch job and wait for the answers
+
+        Args:
+            prompts: custom_id -> chat messages
+            state_key: Path prefix for the file recording the submitted batch
+
+        Returns:
+            custom_id -> answer text, or "Error: ..." for failed requests
+        """
+        state_path = f"{state_key}.json"
+        batch_id = self._load_batch_id(state_path, prompts)
+
+        if batch_id is None:
+            batch_id = await self._submit(prompts)
+            with open(state_path, 'w', encoding='utf-8') as file:
+                json.dump({"batch_id": batch_id, "ids": sorted(prompts)}, file)
+        else:
+            logger.info(f"Resuming batch {batch_id}")
+
+        batch = await self._wait(batch_id)
+        answers = await self._read_results(batch)
+        os.remove(state_path)
+        return answers
+
+    @staticmethod
+    def _load_batch_id(state_path: str, prompts: Dict[str, List[dict]]) -> Optional[str]:
+        """Batch submitted by an interrupted run for the same prompts, if any"""
+        if not os.path.exists(state_path):
+            return None
+        with open(state_path, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+        if state.get("ids") != sorted(prompts):
+            return None
+        return state.get("batch_id")
+
+    async def _submit(self, prompts: Dict[str, List[dict]]) -> str:
+        """Upload the requests file and create the batch job"""
+        lines = []
+        for custom_id, messages in prompts.items():
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": Config.OPENAI_MODEL,
+                    "messages": messages,
+                    "max_tokens": Config.MAX_TOKENS,
+                    "temperature": Config.TEMPERATURE
+                }
+            }))
+
+        upload = await self.client.files.create(
+            file=("batch.jsonl", ("\n".join(lines) + "\n").encode("utf-8")),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window=self.completion_window
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(lines)} requests")
+        return batch.id
+
+    async def _wait(self, batch_id: str):
+        """Poll the batch until it reaches a final state"""
+        while True:
+            batch = await self.client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                logger.info(f"Batch {batch_id} {batch.status}")
+                return batch
+            await asyncio.sleep(self.poll_interval)
+
+    async def _read_results(self, batch) -> Dict[str, str]:
+        """Collect answers and per-request errors from the batch output files"""
+        answers = {}
+        self.usage = {}
+
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                custom_id = record["custom_id"]
+                response = record.get("response") or {}
+                body = response.get("body") or {}
+
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or body.get("error") or {}
+                    answers[custom_id] = f"Error: Batch request failed: {error.get('message', 'unknown error')}"
+                    continue
+
+                content_text = body["choices"][0]["message"]["content"]
+                answers[custom_id] = content_text or "Error: Empty response from OpenAI"
+                usage = body.get("usage")
+                if usage:
+                    self.usage[custom_id] = (usage.get("prompt_tokens"), usage.get("completion_tokens"))
+
+        if batch.status != "completed":
+            logger.warning(f"Batch {batch.id} {batch.status}: {len(answers)} results returned")
+        return answers
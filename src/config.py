@@ -16,18 +16,167 @@ class Config:
     PDF_PATH = os.getenv('PDF_PATH', 'resume.pdf')
     TXT_PATH = os.getenv('TXT_PATH', 'personal_info.txt')
 
+    # Content loading settings
+    CONTENT_CACHE_ENABLED = os.getenv('CONTENT_CACHE_ENABLED', 'true').lower() == 'true'
+    CONTENT_CACHE_DIR = os.getenv('CONTENT_CACHE_DIR', '.cache/content')
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '8'))
+    PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', '0'))
+    # Poll the resume and personal info files and swap in edits without a restart
+    CONTENT_RELOAD_ENABLED = os.getenv('CONTENT_RELOAD_ENABLED', 'true').lower() == 'true'
+    CONTENT_RELOAD_INTERVAL_SECONDS = float(os.getenv('CONTENT_RELOAD_INTERVAL_SECONDS', '5'))
+
     # AI Model settings
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
     GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
+    # Ask Gemini for JSON matching the ResponseQuality schema instead of free text
+    GEMINI_STRUCTURED_OUTPUT = os.getenv('GEMINI_STRUCTURED_OUTPUT', 'true').lower() == 'true'
 
     # Response settings
     MAX_TOKENS = int(os.getenv('MAX_TOKENS', '500'))
     TEMPERATURE = float(os.getenv('TEMPERATURE', '0.7'))
     LINKEDIN_THRESHOLD = int(os.getenv('LINKEDIN_THRESHOLD', '8'))
+    STREAMING_ENABLED = os.getenv('STREAMING_ENABLED', 'true').lower() == 'true'
+
+    # Quality pipeline settings
+    # serial: answer, then Gemini check, then optional revision
+    # pipelined: local pre-screen; likely failures start a speculative revision alongside the check
+    # skip: no Gemini check
+    QUALITY_PIPELINE_MODE = os.getenv('QUALITY_PIPELINE_MODE', 'serial').lower()
+    PRESCREEN_MAX_WORDS = int(os.getenv('PRESCREEN_MAX_WORDS', '350'))
+    PRESCREEN_MIN_WORDS = int(os.getenv('PRESCREEN_MIN_WORDS', '15'))
+
+    # Adaptive quality-check sampling: skip the Gemini check on low-risk answers
+    QUALITY_SAMPLING_ENABLED = os.getenv('QUALITY_SAMPLING_ENABLED', 'true').lower() == 'true'
+    QUALITY_SAMPLING_AUDIT_RATE = float(os.getenv('QUALITY_SAMPLING_AUDIT_RATE', '0.1'))
+    QUALITY_SAMPLING_MIN_GROUNDEDNESS = float(os.getenv('QUALITY_SAMPLING_MIN_GROUNDEDNESS', '0.45'))
+    QUALITY_SAMPLING_MIN_PASS_RATE = float(os.getenv('QUALITY_SAMPLING_MIN_PASS_RATE', '0.9'))
+    QUALITY_SAMPLING_WINDOW = int(os.getenv('QUALITY_SAMPLING_WINDOW', '50'))
+    QUALITY_SAMPLING_MIN_SAMPLES = int(os.getenv('QUALITY_SAMPLING_MIN_SAMPLES', '10'))
+
+    # Local groundedness check: answers whose claims are all found in the
+    # sources skip Gemini; answers with several unsupported employers, figures,
+    # dates or titles are revised without waiting for Gemini; answers repeating
+    # claims only the user's question makes are always checked by Gemini. A sample
+    # of the local verdicts is still checked in the background to measure agreement.
+    GROUNDING_ENABLED = os.getenv('GROUNDING_ENABLED', 'true').lower() == 'true'
+    GROUNDING_PASS_THRESHOLD = float(os.getenv('GROUNDING_PASS_THRESHOLD', '1.0'))
+    GROUNDING_MIN_CLAIMS = int(os.getenv('GROUNDING_MIN_CLAIMS', '3'))
+    GROUNDING_FAIL_THRESHOLD = float(os.getenv('GROUNDING_FAIL_THRESHOLD', '0.6'))
+    GROUNDING_FAIL_MIN_UNSUPPORTED = int(os.getenv('GROUNDING_FAIL_MIN_UNSUPPORTED', '2'))
+    GROUNDING_AUDIT_RATE = float(os.getenv('GROUNDING_AUDIT_RATE', '0.1'))
+
+    # Retrieval settings
+    RETRIEVAL_ENABLED = os.getenv('RETRIEVAL_ENABLED', 'true').lower() == 'true'
+    RETRIEVAL_TOP_K = int(os.getenv('RETRIEVAL_TOP_K', '5'))
+    RETRIEVAL_QUALITY_TOP_K = int(os.getenv('RETRIEVAL_QUALITY_TOP_K', '4'))
+
+    # Response cache settings
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+    RESPONSE_CACHE_TTL_SECONDS = float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '86400'))
+    RESPONSE_CACHE_SIMILARITY_ENABLED = os.getenv('RESPONSE_CACHE_SIMILARITY_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv('RESPONSE_CACHE_SIMILARITY_THRESHOLD', '0.85'))
+
+    # Precomputed FAQ answers served on first turns (built with build_faq.py)
+    FAQ_ENABLED = os.getenv('FAQ_ENABLED', 'true').lower() == 'true'
+    FAQ_INDEX_PATH = os.getenv('FAQ_INDEX_PATH', 'faq_index.json')
+    FAQ_MATCH_THRESHOLD = float(os.getenv('FAQ_MATCH_THRESHOLD', '0.8'))
+    FAQ_MATCH_MARGIN = float(os.getenv('FAQ_MATCH_MARGIN', '0.15'))
+    FAQ_MIN_CONFIDENCE = float(os.getenv('FAQ_MIN_CONFIDENCE', '0.85'))
+
+    # Identical concurrent queries share one pipeline run
+    REQUEST_COALESCING_ENABLED = os.getenv('REQUEST_COALESCING_ENABLED', 'true').lower() == 'true'
+
+    # Conversation history settings
+    HISTORY_MAX_EXCHANGES = int(os.getenv('HISTORY_MAX_EXCHANGES', '20'))
+    HISTORY_PROMPT_EXCHANGES = int(os.getenv('HISTORY_PROMPT_EXCHANGES', '5'))
+    HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '0'))
+    # Fold exchanges older than the raw window into a rolling per-session
+    # summary, off the request path; prompts carry the summary plus the last
+    # SUMMARY_RAW_EXCHANGES turns
+    SUMMARY_ENABLED = os.getenv('SUMMARY_ENABLED', 'true').lower() == 'true'
+    SUMMARY_RAW_EXCHANGES = int(os.getenv('SUMMARY_RAW_EXCHANGES', '2'))
+    SUMMARY_MAX_WORDS = int(os.getenv('SUMMARY_MAX_WORDS', '150'))
+    SUMMARY_MAX_TOKENS = int(os.getenv('SUMMARY_MAX_TOKENS', '300'))
+    SUMMARY_PROVIDER = os.getenv('SUMMARY_PROVIDER', 'gemini').lower()
+    SUMMARY_CONCURRENCY = int(os.getenv('SUMMARY_CONCURRENCY', '4'))
+    # Exchanges that fill the prompt budget before older history does
+    HISTORY_RECENT_EXCHANGES = int(os.getenv('HISTORY_RECENT_EXCHANGES', '2'))
+
+    # Input token budget for answer prompts (0 disables budgeting; then only
+    # HISTORY_TOKEN_BUDGET limits the history)
+    PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '6000'))
+
+    # Session settings
+    SESSION_TTL_SECONDS = float(os.getenv('SESSION_TTL_SECONDS', '3600'))
+    SESSION_MAX_COUNT = int(os.getenv('SESSION_MAX_COUNT', '1000'))
+    SESSION_MAX_MEMORY_MB = float(os.getenv('SESSION_MAX_MEMORY_MB', '64'))
+
+    # Network settings
+    OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+    OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '30'))
+    GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', '30'))
+    HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+
+    # Observability settings
+    # Optional JSONL file receiving one structured trace per request
+    TRACE_JSONL_PATH = os.getenv('TRACE_JSONL_PATH', '')
+    # Optional SQLite file receiving every exchange (query, response, quality,
+    # timings, tokens); written in batches by a background thread
+    AUDIT_LOG_PATH = os.getenv('AUDIT_LOG_PATH', '')
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '100'))
+    AUDIT_FLUSH_INTERVAL_SECONDS = float(os.getenv('AUDIT_FLUSH_INTERVAL_SECONDS', '0.5'))
+    AUDIT_MAX_QUEUE = int(os.getenv('AUDIT_MAX_QUEUE', '10000'))
+    # Rebuild sessions active within SESSION_TTL_SECONDS from the audit log on startup
+    AUDIT_REHYDRATE_SESSIONS = os.getenv('AUDIT_REHYDRATE_SESSIONS', 'true').lower() == 'true'
+
+    # LLM admission control and retries (0 disables a limit)
+    OPENAI_RPM = int(os.getenv('OPENAI_RPM', '500'))
+    OPENAI_TPM = int(os.getenv('OPENAI_TPM', '200000'))
+    OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '32'))
+    GEMINI_RPM = int(os.getenv('GEMINI_RPM', '1000'))
+    GEMINI_TPM = int(os.getenv('GEMINI_TPM', '1000000'))
+    GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '32'))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+    LLM_BACKOFF_BASE_SECONDS = float(os.getenv('LLM_BACKOFF_BASE_SECONDS', '0.5'))
+    LLM_BACKOFF_MAX_SECONDS = float(os.getenv('LLM_BACKOFF_MAX_SECONDS', '8'))
+
+    # Provider routing: answers go to the first healthy provider in ANSWER_PROVIDERS;
+    # a call slower than the primary's HEDGE_QUANTILE latency is hedged on the next one
+    PROVIDER_ROUTING_ENABLED = os.getenv('PROVIDER_ROUTING_ENABLED', 'true').lower() == 'true'
+    ANSWER_PROVIDERS = [name.strip() for name in os.getenv('ANSWER_PROVIDERS', 'openai,gemini').split(',')
+                        if name.strip()]
+    HEDGING_ENABLED = os.getenv('HEDGING_ENABLED', 'true').lower() == 'true'
+    HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', '0.95'))
+    HEDGE_MIN_DELAY_SECONDS = float(os.getenv('HEDGE_MIN_DELAY_SECONDS', '0.5'))
+    HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv('HEDGE_DEFAULT_DELAY_SECONDS', '5'))
+    PROVIDER_HEALTH_WINDOW = int(os.getenv('PROVIDER_HEALTH_WINDOW', '100'))
+    PROVIDER_HEALTH_MIN_SAMPLES = int(os.getenv('PROVIDER_HEALTH_MIN_SAMPLES', '20'))
+    # Circuit breaker: opens after consecutive failures or a high windowed error rate
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_ERROR_RATE = float(os.getenv('CIRCUIT_ERROR_RATE', '0.5'))
+    CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+
+    # Multi-worker settings
+    # State shared by app workers: memory:// (one worker), sqlite:///path/to/state.db
+    # (one host; put it on /dev/shm to keep it in shared memory) or redis://host:port/db
+    SHARED_BACKEND_URL = os.getenv('SHARED_BACKEND_URL', 'memory://')
+    # Longest a shared backend call may block; the rate limiter calls it on the
+    # event loop. After a Redis failure calls fail fast for the retry interval.
+    SHARED_BACKEND_TIMEOUT_SECONDS = float(os.getenv('SHARED_BACKEND_TIMEOUT_SECONDS', '0.25'))
+    SHARED_BACKEND_RETRY_SECONDS = float(os.getenv('SHARED_BACKEND_RETRY_SECONDS', '5'))
+    # Worker processes behind SERVER_PORT. Gradio's queue keeps each UI event
+    # stream inside one process, so with several workers the chat UI needs a
+    # proxy with session affinity; /api/chat works with any worker.
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', '1'))
+    # Read-only snapshot of the loaded documents, written once by the parent process
+    CONTENT_SNAPSHOT_PATH = os.getenv('CONTENT_SNAPSHOT_PATH', '')
 
     # Gradio settings
     SERVER_NAME = os.getenv('SERVER_NAME', '0.0.0.0')
     SERVER_PORT = int(os.getenv('SERVER_PORT', '8080'))
+    LAZY_STARTUP = os.getenv('LAZY_STARTUP', 'true').lower() == 'true'
 
     @classmethod
     def validate_config(cls):
@@ -42,6 +191,16 @@ class Config:
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
 
+        if cls.QUALITY_PIPELINE_MODE not in ('serial', 'pipelined', 'skip'):
+            raise ValueError(f"Invalid QUALITY_PIPELINE_MODE: {cls.QUALITY_PIPELINE_MODE}")
+
+        unknown_providers = set(cls.ANSWER_PROVIDERS) - {'openai', 'gemini'}
+        if not cls.ANSWER_PROVIDERS or unknown_providers:
+            raise ValueError(f"Invalid ANSWER_PROVIDERS: {', '.join(cls.ANSWER_PROVIDERS)}")
+
+        if cls.SUMMARY_PROVIDER not in ('openai', 'gemini'):
+            raise ValueError(f"Invalid SUMMARY_PROVIDER: {cls.SUMMARY_PROVIDER}")
+
         # Check if files exist
         if not os.path.exists(cls.PDF_PATH):
             raise FileNotFoundError(f"Resume PDF not found: {cls.PDF_PATH}")
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+
+
+class ContentCache:
+    """On-disk cache of text extracted from source files and artifacts derived from it"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """SHA-256 of a file's contents"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 16), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get(self, file_path: str, name: str = "text") -> Optional[Any]:
+        """
+        Get a cached value for a source file if the file is unchanged
+
+        The entry is valid when the file's size and mtime match. If only the
+        mtime changed (e.g. the file was copied or touched) the content hash
+        decides, and a matching entry is refreshed with the new mtime.
+
+        Args:
+            file_path: Source file the value was derived from
+            name: Value name ("text" for extracted text, or a derived artifact)
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry = self._read_entry(file_path)
+        if entry is None or name not in entry["values"]:
+            return None
+
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        if stat.st_size != entry["size"]:
+            return None
+
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            if self.file_hash(file_path) != entry["sha256"]:
+                return None
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._write_entry(file_path, entry)
+
+        return entry["values"][name]
+
+    def put(self, file_path: str, value: Any, name: str = "text"):
+        """
+        Store a value derived from a source file
+
+        Values stored for an older version of the file are discarded.
+
+        Args:
+            file_path: Source file the value was derived from
+            value: JSON-serializable value
+            name: Value name ("text" for extracted text, or a derived artifact)
+        """
+        try:
+            stat = os.stat(file_path)
+            sha256 = self.file_hash(file_path)
+        except OSError as e:
+            logger.warning(f"Cannot cache content for {file_path}: {str(e)}")
+            return
+
+        entry = self._read_entry(file_path)
+        if entry is None or entry["sha256"] != sha256:
+            entry = {"values": {}}
+
+        entry.update({
+            "version": CACHE_VERSION,
+            "path": os.path.abspath(file_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256
+        })
+        entry["values"][name] = value
+        self._write_entry(file_path, entry)
+
+    def entry_path(self, file_path: str) -> str:
+        """Location of the cache entry for a source file"""
+        key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_entry(self, file_path: str) -> Optional[dict]:
+        try:
+            with open(self.entry_path(file_path), 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable content cache entry for {file_path}: {str(e)}")
+            return None
+
+        if entry.get("version") != CACHE_VERSION:
+            return None
+        return entry
+
+    def _write_entry(self, file_path: str, entry: dict):
+        """Write an entry atomically so concurrent readers never see a partial file"""
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(entry, file)
+            os.replace(tmp_path, self.entry_path(file_path))
+        except (OSError, TypeError) as e:
+            logger.warning(f"Failed to write content cache for {file_path}: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
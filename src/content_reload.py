@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from .groundedness import GroundingIndex
+from .prescreen import ResponsePrescreen
+from .retrieval import ResumeIndex
+
+logger = logging.getLogger(__name__)
+
+# (size, mtime_ns), or None while the file is missing
+FileState = Optional[Tuple[int, int]]
+
+
+@dataclass(frozen=True)
+class ContentVersion:
+    """
+    The loaded documents and everything derived from them
+
+    Replaced as a whole on reload, so a request that holds a version sees
+    consistent text, index and hash.
+    """
+    resume_content: str
+    personal_info: str
+    content_hash: str
+    resume_index: Optional[ResumeIndex]
+    prescreen: ResponsePrescreen
+    grounding: GroundingIndex
+    loaded_at: float = field(default_factory=time.time)
+
+
+def _file_state(path: str) -> FileState:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ContentWatcher:
+    """
+    Polls source files and reports changes from a background thread
+
+    A change is reported once the file's size and mtime have been stable for
+    one poll, so a file that is still being written is not read half-done.
+    A change is only marked as seen once on_change returns, so a failed
+    reload is retried on every poll until it succeeds.
+    """
+
+    def __init__(self, paths: List[str], on_change: Callable[[List[str]], None], interval: float = 5.0):
+        """
+        Args:
+            paths: Files to watch
+            on_change: Called (in the watcher thread) with the changed paths
+            interval: Seconds between polls
+        """
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+
+        self._seen: Dict[str, FileState] = {path: _file_state(path) for path in self.paths}
+        self._pending: Dict[str, FileState] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.changes = 0
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="content-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Content reload failed: {str(e)}")
+
+    def check(self) -> bool:
+        """
+        Poll once
+
+        Returns:
+            Whether a change was reported
+        """
+        changed = []
+        for path in self.paths:
+            state = _file_state(path)
+            if state == self._seen[path]:
+                self._pending.pop(path, None)
+                continue
+            if state is not None and self._pending.get(path) == state:
+                changed.append(path)
+            else:
+                # First sighting of this state (or the file vanished): wait for it to settle
+                self._pending[path] = state
+
+        if not changed:
+            return False
+
+        logger.info(f"Content files changed: {', '.join(changed)}")
+        # If the reload raises, the change stays pending and is retried on the next poll
+        self.on_change(changed)
+        for path in changed:
+            self._seen[path] = self._pending.pop(path)
+        self.changes += 1
+        return True
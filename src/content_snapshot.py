@@ -0,0 +1,126 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AGENTSNAP1\n"
+HEADER_LENGTH = struct.Struct("<Q")
+
+
+class ContentSnapshot:
+    """
+    Read-only, memory-mapped bundle of the loaded documents
+
+    The parent process writes it once before starting workers; every worker
+    maps the same file, so the pages are shared through the OS page cache and
+    no worker repeats PDF extraction or chunking.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a content snapshot: {path}")
+
+        start = len(MAGIC) + HEADER_LENGTH.size
+        (header_length,) = HEADER_LENGTH.unpack_from(self._map, len(MAGIC))
+        header = json.loads(self._map[start:start + header_length])
+        self.sources: Dict[str, List[int]] = header["sources"]
+        self._sections: Dict[str, List[int]] = header["sections"]
+        self._data_start = start + header_length
+
+    def text(self, name: str) -> str:
+        """Decode one section of the snapshot"""
+        offset, length = self._sections[name]
+        begin = self._data_start + offset
+        return self._map[begin:begin + length].decode("utf-8")
+
+    def is_current(self) -> bool:
+        """Whether the source files still match the size and mtime recorded in the snapshot"""
+        for path, (size, mtime_ns) in self.sources.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                return False
+        return True
+
+    def close(self):
+        self._map.close()
+
+    @staticmethod
+    def write(path: str, sections: Dict[str, str], source_paths: List[str]):
+        """
+        Write a snapshot atomically
+
+        Args:
+            path: Snapshot file to create
+            sections: Section name -> text
+            source_paths: Files the sections were derived from
+        """
+        blobs = []
+        layout = {}
+        offset = 0
+        for name, text in sections.items():
+            data = text.encode("utf-8")
+            layout[name] = [offset, len(data)]
+            blobs.append(data)
+            offset += len(data)
+
+        sources = {}
+        for source in source_paths:
+            stat = os.stat(source)
+            sources[source] = [stat.st_size, stat.st_mtime_ns]
+
+        header = json.dumps({"sources": sources, "sections": layout}).encode("utf-8")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(MAGIC)
+                file.write(HEADER_LENGTH.pack(len(header)))
+                file.write(header)
+                for data in blobs:
+                    file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def open_snapshot(path: str) -> Optional[ContentSnapshot]:
+    """
+    Open a snapshot if it exists and still matches its source files
+
+    Args:
+        path: Snapshot file
+
+    Returns:
+        ContentSnapshot, or None if it is missing, unreadable or stale
+    """
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        snapshot = ContentSnapshot(path)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable content snapshot {path}: {str(e)}")
+        return None
+
+    if not snapshot.is_current():
+        logger.info(f"Content snapshot {path} is stale; loading documents directly")
+        snapshot.close()
+        return None
+
+    return snapshot
@@ -0,0 +1,373 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from .config import Config
+from .models import ResponseQuality
+from .prompt_builder import PromptBuilder
+from .text_similarity import tokenize
+from .tracing import RequestTrace
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Curated questions behind the topics listed in the chat UI description. Each
+# entry's phrasings are what the intent matcher compares queries against.
+DEFAULT_FAQ = [
+    {"id": "experience", "question": "What is Brian's professional experience?", "phrasings": [
+        "What is your experience?",
+        "Tell me about your professional background",
+        "What is your work history?",
+        "Summarize your career experience",
+        "What have you done in your career?",
+    ]},
+    {"id": "achievements", "question": "What are Brian's key professional achievements?", "phrasings": [
+        "What are your biggest achievements?",
+        "What accomplishments are you most proud of?",
+        "What are your key achievements?",
+    ]},
+    {"id": "skills", "question": "What are Brian's technical skills and areas of expertise?", "phrasings": [
+        "What are your technical skills?",
+        "What is your expertise?",
+        "What technologies do you know?",
+        "What are your core competencies?",
+        "What skills do you have?",
+    ]},
+    {"id": "leadership", "question": "What is Brian's leadership background?", "phrasings": [
+        "What is your leadership experience?",
+        "Tell me about your leadership style",
+        "What teams have you led?",
+        "How do you lead teams?",
+        "Describe your management experience",
+    ]},
+    {"id": "career_progression", "question": "How has Brian's career progressed?", "phrasings": [
+        "How has your career progressed?",
+        "Walk me through your career path",
+        "What is your career progression?",
+        "How did you become a CIO?",
+    ]},
+    {"id": "availability", "question": "Is Brian available for CIO or CTO positions?", "phrasings": [
+        "Are you available for CIO positions?",
+        "Are you open to CTO roles?",
+        "Are you looking for a new role?",
+        "Are you available for a CIO or CTO position?",
+        "Are you open to new opportunities?",
+    ]},
+    {"id": "introduction", "question": "Who is Brian VEAU?", "phrasings": [
+        "Who are you?",
+        "Tell me about yourself",
+        "Introduce yourself",
+        "Give me a short introduction",
+    ]},
+]
+
+
+@dataclass
+class FaqEntry:
+    """A stored, quality-checked FAQ answer"""
+    id: str
+    question: str
+    phrasings: List[str]
+    answer: str
+    quality: ResponseQuality
+
+
+@dataclass
+class FaqMatch:
+    """A query routed to a stored FAQ answer"""
+    entry: FaqEntry
+    score: float
+
+
+class FaqMatcher:
+    """
+    TF-IDF intent matcher over the phrasings of each FAQ entry
+
+    Phrasings are embedded once into an L2-normalized matrix over unigrams and
+    bigrams; a query costs one vectorization and one matrix-vector product.
+    Query terms missing from the vocabulary still count towards the query's
+    norm, so questions with specifics the FAQ doesn't cover score low.
+    """
+
+    def __init__(self, phrasings: List[str], labels: List[int]):
+        """
+        Args:
+            phrasings: Example questions
+            labels: Entry index of each phrasing
+        """
+        self.labels = np.asarray(labels, dtype=np.int32)
+        self.n_entries = int(self.labels.max()) + 1 if labels else 0
+
+        documents = [self._terms(text) for text in phrasings]
+        self.vocabulary: Dict[str, int] = {}
+        for terms in documents:
+            for term in terms:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        doc_freq = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for terms in documents:
+            for term in set(terms):
+                doc_freq[self.vocabulary[term]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + doc_freq)) + 1
+        # Weight for unseen query terms: as rare as the rarest known term
+        self.unknown_idf = float(self.idf.max()) if len(self.idf) else 1.0
+
+        self.matrix = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, terms in enumerate(documents):
+            for term in terms:
+                self.matrix[row, self.vocabulary[term]] += 1
+        self.matrix *= self.idf
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        np.divide(self.matrix, norms, out=self.matrix, where=norms > 0)
+
+    @staticmethod
+    def _terms(text: str) -> List[str]:
+        # Questions made only of function words ("who are you?") keep them
+        tokens = tokenize(text) or tokenize(text, drop_stopwords=False)
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        Score every entry against a query
+
+        Args:
+            query: User's question
+
+        Returns:
+            Best cosine similarity per entry
+        """
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        unknown = 0.0
+        for term in self._terms(query):
+            index = self.vocabulary.get(term)
+            if index is None:
+                unknown += self.unknown_idf ** 2
+            else:
+                vector[index] += self.idf[index]
+
+        norm = np.sqrt(float(vector @ vector) + unknown)
+        entry_scores = np.zeros(self.n_entries, dtype=np.float32)
+        if norm == 0:
+            return entry_scores
+
+        np.maximum.at(entry_scores, self.labels, self.matrix @ (vector / norm))
+        return entry_scores
+
+
+class FaqIndex:
+    """
+    Precomputed FAQ answers with an intent matcher in front
+
+    A query is routed to a stored answer only when its best entry clears the
+    similarity threshold and beats the runner-up by a margin; everything else
+    falls through to the LLM pipeline.
+    """
+
+    def __init__(self, entries: List[FaqEntry], content_hash: str, threshold: float = 0.8,
+                 margin: float = 0.15):
+        """
+        Args:
+            entries: Stored answers
+            content_hash: Content version the answers were generated from
+            threshold: Minimum similarity to the best entry
+            margin: Minimum lead of the best entry over the runner-up
+        """
+        self.entries = entries
+        self.content_hash = content_hash
+        self.threshold = threshold
+        self.margin = margin
+
+        phrasings, labels = [], []
+        for label, entry in enumerate(entries):
+            for text in [entry.question, *entry.phrasings]:
+                phrasings.append(text)
+                labels.append(label)
+        self.matcher = FaqMatcher(phrasings, labels)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fall_throughs = 0
+
+    @classmethod
+    def load(cls, path: str, threshold: float = 0.8, margin: float = 0.15) -> "FaqIndex":
+        """
+        Load an index written by save_faq_index
+
+        Args:
+            path: Index file
+            threshold: Minimum similarity to the best entry
+            margin: Minimum lead of the best entry over the runner-up
+
+        Returns:
+            Loaded index
+        """
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported FAQ index version in {path}: {data.get('version')}")
+
+        entries = [FaqEntry(id=item["id"], question=item["question"], phrasings=item["phrasings"],
+                            answer=item["answer"], quality=ResponseQuality(**item["quality"]))
+                   for item in data["entries"]]
+        return cls(entries, data["content_hash"], threshold=threshold, margin=margin)
+
+    def match(self, query: str) -> Optional[FaqMatch]:
+        """
+        Route a query to a stored answer
+
+        Args:
+            query: User's question
+
+        Returns:
+            The matching entry, or None if the query should go to the LLM
+        """
+        match = None
+        if self.entries:
+            scores = self.matcher.scores(query)
+            best = int(scores.argmax())
+            runner_up = float(np.partition(scores, -2)[-2]) if len(scores) > 1 else 0.0
+            if scores[best] >= self.threshold and scores[best] - runner_up >= self.margin:
+                match = FaqMatch(self.entries[best], float(scores[best]))
+
+        with self._lock:
+            if match is None:
+                self.fall_throughs += 1
+            else:
+                self.hits += 1
+        return match
+
+    def stats(self) -> dict:
+        """Get routing statistics"""
+        with self._lock:
+            lookups = self.hits + self.fall_throughs
+            return {
+                "entries": len(self.entries),
+                "content_hash": self.content_hash,
+                "hits": self.hits,
+                "fall_throughs": self.fall_throughs,
+                "fall_through_rate": self.fall_throughs / lookups if lookups else 0.0
+            }
+
+
+def load_faq_index(path: str) -> Optional[FaqIndex]:
+    """Load the FAQ index if the file exists, or None"""
+    if not path or not os.path.exists(path):
+        logger.info(f"No FAQ index at {path}; every query goes to the LLM")
+        return None
+    try:
+        index = FaqIndex.load(path, threshold=Config.FAQ_MATCH_THRESHOLD, margin=Config.FAQ_MATCH_MARGIN)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load FAQ index {path}: {str(e)}")
+        return None
+    logger.info(f"Loaded FAQ index with {len(index.entries)} answers from {path}")
+    return index
+
+
+def save_faq_index(path: str, entries: List[FaqEntry], content_hash: str, model: str):
+    """
+    Write an FAQ index atomically
+
+    Args:
+        path: Index file
+        entries: Approved answers
+        content_hash: Content version the answers were generated from
+        model: Answer model, recorded for reference
+    """
+    data = {
+        "version": INDEX_VERSION,
+        "content_hash": content_hash,
+        "model": model,
+        "built_at": time.time(),
+        "entries": [{"id": entry.id, "question": entry.question, "phrasings": entry.phrasings,
+                     "answer": entry.answer, "quality": entry.quality.model_dump()}
+                    for entry in entries]
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+
+class FaqBuilder:
+    """
+    Generates and verifies FAQ answers through the regular pipeline
+
+    Each question is answered as the first turn of a fresh session (answer
+    model, Gemini quality gate, revision), then the final text is checked by
+    Gemini once more; only answers that pass with enough confidence are kept.
+    """
+
+    def __init__(self, system, min_confidence: float = 0.8, concurrency: int = 4):
+        """
+        Args:
+            system: AIAgentSystem to generate answers with
+            min_confidence: Minimum quality confidence of a stored answer
+            concurrency: Questions answered at once
+        """
+        self.system = system
+        self.min_confidence = min_confidence
+        self.concurrency = concurrency
+
+    async def build(self, faq: List[dict]) -> List[FaqEntry]:
+        """
+        Answer and verify the FAQ questions
+
+        Args:
+            faq: Entries with "id", "question" and optional "phrasings"
+
+        Returns:
+            Approved entries, in input order
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def build_one(item: dict) -> Optional[FaqEntry]:
+            async with semaphore:
+                return await self._build_entry(item)
+
+        results = await asyncio.gather(*(build_one(item) for item in faq))
+        return [entry for entry in results if entry is not None]
+
+    async def _build_entry(self, item: dict) -> Optional[FaqEntry]:
+        question = item["question"]
+        session_id = f"faq-build-{item['id']}"
+        trace = RequestTrace()
+        try:
+            answer, _ = await self.system.process_query(question, session_id=session_id, trace=trace)
+        finally:
+            self.system.reset_conversation(session_id)
+
+        if trace.attributes.get("outcome", "ok") != "ok":
+            logger.warning(f"FAQ {item['id']}: answer failed ({trace.attributes.get('outcome')})")
+            return None
+
+        # Verify the final text itself; a revised answer has not been checked yet
+        resume_index = self.system.resume_index
+        quality_prompt = PromptBuilder.create_quality_check_prompt(
+            user_query=question,
+            brian_response=answer,
+            resume_content=(resume_index.get_context(f"{question}\n{answer}", Config.RETRIEVAL_QUALITY_TOP_K)
+                            if resume_index is not None else self.system.resume_content),
+            personal_info=self.system.personal_info
+        )
+        quality = await self.system.gemini_client.get_quality_assessment(quality_prompt)
+
+        if quality.feedback.startswith("Quality check failed"):
+            # The client's fallback assessment when Gemini is unavailable; not an approval
+            logger.warning(f"FAQ {item['id']}: not verified: {quality.feedback}")
+            return None
+        if quality.requires_revision or quality.confidence_score < self.min_confidence:
+            logger.warning(f"FAQ {item['id']}: rejected (confidence {quality.confidence_score:.2f}): "
+                           f"{quality.feedback}")
+            return None
+
+        logger.info(f"FAQ {item['id']}: approved (confidence {quality.confidence_score:.2f})")
+        return FaqEntry(id=item["id"], question=question, phrasings=list(item.get("phrasings", [])),
+                        answer=answer, quality=quality)
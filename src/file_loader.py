@@ -1,43 +1,65 @@
 import PyPDF2
 import io
+import os
 import logging
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .config import Config
+from .content_cache import ContentCache
 
 logger = logging.getLogger(__name__)
 
 
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract text from pages [start, stop) of a PDF (runs in a worker process)"""
+    texts = []
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_num in range(start, stop):
+            try:
+                page_text = pdf_reader.pages[page_num].extract_text()
+                if page_text:
+                    texts.append(page_text)
+            except Exception as e:
+                logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
+    return texts
+
+
 class FileLoader:
     """Handles loading and processing of resume and personal info files"""
 
     @staticmethod
-    def load_pdf_content(file_path: str) -> str:
+    def load_pdf_content(file_path: str, cache: Optional[ContentCache] = None) -> str:
         """
         Extract text content from PDF resume
 
         Args:
             file_path: Path to the PDF file
+            cache: Optional on-disk cache; a warm entry skips PDF parsing
 
         Returns:
             Extracted text content
         """
         try:
+            if cache is not None:
+                cached = cache.get(file_path)
+                if cached is not None:
+                    logger.info(f"Loaded extracted PDF text from cache: {file_path}")
+                    return cached
+
             with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                content = ""
+                page_count = len(PyPDF2.PdfReader(file).pages)
+
+            page_texts = FileLoader._extract_pages(file_path, page_count)
+            content = "\n".join(page_texts).strip()
 
-                for page_num, page in enumerate(pdf_reader.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            content += page_text + "\n"
-                    except Exception as e:
-                        logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
-                        continue
+            if not content:
+                raise ValueError("No text content extracted from PDF")
 
-                if not content.strip():
-                    raise ValueError("No text content extracted from PDF")
+            if cache is not None:
+                cache.put(file_path, content)
 
-                return content.strip()
+            return content
 
         except FileNotFoundError:
             error_msg = f"PDF file not found: {file_path}"
@@ -48,6 +70,33 @@ class FileLoader:
             logger.error(error_msg)
             return f"Error: {error_msg}"
 
+    @staticmethod
+    def _extract_pages(file_path: str, page_count: int) -> List[str]:
+        """
+        Extract page texts, spreading page ranges over a process pool for large PDFs
+
+        Args:
+            file_path: Path to the PDF file
+            page_count: Number of pages in the PDF
+
+        Returns:
+            Non-empty page texts in page order
+        """
+        workers = min(Config.PDF_EXTRACT_WORKERS or os.cpu_count() or 1, page_count)
+        if page_count < Config.PDF_PARALLEL_MIN_PAGES or workers < 2:
+            return _extract_page_range(file_path, 0, page_count)
+
+        step = -(-page_count // workers)
+        ranges: List[Tuple[int, int]] = [(start, min(start + step, page_count))
+                                         for start in range(0, page_count, step)]
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_extract_page_range,
+                                   [file_path] * len(ranges),
+                                   [start for start, _ in ranges],
+                                   [stop for _, stop in ranges])
+            return [text for texts in results for text in texts]
+
     @staticmethod
     def load_txt_content(file_path: str) -> str:
         """
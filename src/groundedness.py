@@ -0,0 +1,263 @@
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Tuple
+from .text_similarity import STOPWORDS, tokenize
+
+# Capitalized phrases: names, employers, products ("ShawKwei & Partners", "NetSuite ERP")
+ENTITY_PATTERN = re.compile(r"[A-Z][\w'&-]*(?:(?:\s+(?:&|of|de)\s+|[ \t]+)[A-Z][\w'&-]*)*")
+# An entity introduced as a workplace ("at X", "joined X")
+EMPLOYER_PATTERN = re.compile(
+    r"\b(?:[Aa]t|[Ww]ith|[Ff]or|[Jj]oined|[Jj]oining|[Ff]rom)\s+(" + ENTITY_PATTERN.pattern + r")"
+)
+TITLE_PATTERN = re.compile(
+    r"\b(?:(?:Global|Group|Regional|Senior|Deputy|Interim)\s+)?"
+    r"(?:Chief\s+\w+\s+Officer|C[EFIOT]O|CISO|Vice\s+President(?:\s+of\s+[A-Z]\w*)?|VP(?:\s+of\s+[A-Z]\w*)?|"
+    r"(?:IT\s+)?Director(?:\s+of\s+[A-Z]\w*)?|Head\s+of\s+[A-Z]\w*|(?:IT\s+)?Manager|President)\b"
+)
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+NUMBER_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+# Where a capitalized word may just be the first word of a sentence or bullet
+SENTENCE_START = re.compile(r"(?:^|[.!?:;]\s+|\n\s*(?:[-*•]\s*)?)$")
+
+# Capitalized words that are not claims, in the forms tokenize produces ("I'm" -> "i", "am")
+NON_ENTITIES = frozenset(tokenize("I I'm I've I'd I'll Brian Veau LinkedIn AI IT", drop_stopwords=False))
+
+# Claim kinds a single unsupported instance of counts as a likely fabrication
+HIGH_RISK_KINDS = ("employer", "number", "date", "title")
+
+
+@dataclass(frozen=True)
+class GroundingIndex:
+    """Features of the source documents that answers are checked against"""
+    tokens: FrozenSet[str]
+    numbers: FrozenSet[str]
+    years: FrozenSet[str]
+
+    @classmethod
+    def build(cls, resume_content: str, personal_info: str) -> "GroundingIndex":
+        """
+        Precompute the features of the resume and personal info
+
+        Args:
+            resume_content: Resume text
+            personal_info: Personal information text
+
+        Returns:
+            Index of the source features
+        """
+        text = f"{resume_content}\n{personal_info}"
+        return cls(
+            tokens=frozenset(tokenize(text, drop_stopwords=False)),
+            numbers=frozenset(_numbers(text)),
+            years=frozenset(YEAR_PATTERN.findall(text))
+        )
+
+    def supports(self, claim: "Claim") -> bool:
+        """Whether the indexed text contains a claim"""
+        if claim.kind == "date":
+            return claim.text in self.years
+        if claim.kind == "number":
+            return claim.text in self.numbers
+        return all(word in self.tokens for word in claim.words)
+
+
+@dataclass(frozen=True)
+class Claim:
+    """A checkable statement in a response"""
+    kind: str
+    text: str
+    # Tokens that must all appear in the sources (titles and entities)
+    words: Tuple[str, ...] = ()
+
+
+@dataclass
+class GroundingResult:
+    """Claims found in a response and which of them the sources support"""
+    claims: int = 0
+    supported: int = 0
+    unsupported: List[Tuple[str, str]] = field(default_factory=list)
+    # Claims found only in the user's query, neither supported nor unsupported
+    echoed: List[Tuple[str, str]] = field(default_factory=list)
+    verdict: str = "uncertain"
+
+    @property
+    def score(self) -> float:
+        return self.supported / self.claims if self.claims else 1.0
+
+    @property
+    def feedback(self) -> str:
+        claims = ", ".join(f"{text} ({kind})" for kind, text in self.unsupported[:8])
+        return f"Local groundedness check: not found in the resume or personal info: {claims}"
+
+
+def _numbers(text: str) -> List[str]:
+    """Multi-digit numbers without thousands separators, years excluded"""
+    numbers = []
+    for match in NUMBER_PATTERN.findall(text):
+        number = match.replace(",", "").rstrip(".")
+        if len(number.replace(".", "")) >= 2 and not YEAR_PATTERN.fullmatch(number):
+            numbers.append(number)
+    return numbers
+
+
+def extract_claims(response: str) -> List[Claim]:
+    """
+    Extract the checkable claims of a response, each once
+
+    Args:
+        response: Answer text
+
+    Returns:
+        Years ("date"), figures ("number"), job titles ("title"), workplaces
+        ("employer") and other named entities ("entity"), in that order
+    """
+    claims = []
+    seen = set()
+
+    def add(claim: Claim):
+        key = claim.text.lower()
+        if key not in seen:
+            seen.add(key)
+            claims.append(claim)
+
+    for year in YEAR_PATTERN.findall(response):
+        add(Claim("date", year))
+    for number in _numbers(response):
+        add(Claim("number", number))
+
+    titles = set()
+    for match in TITLE_PATTERN.finditer(response):
+        titles.add(match.start())
+        add(Claim("title", match.group(), tuple(tokenize(match.group(), drop_stopwords=False))))
+
+    employers = {match.start(1) for match in EMPLOYER_PATTERN.finditer(response)}
+    for match in ENTITY_PATTERN.finditer(response):
+        if match.start() in titles:
+            continue
+        text = match.group().rstrip(".")
+        words = tokenize(text, drop_stopwords=False)
+        content = [word for word in words if word not in STOPWORDS and word not in NON_ENTITIES]
+        if not content:
+            continue
+        # A lone capitalized word opening a sentence is usually just grammar
+        if (len(content) == 1 and content[0] == words[0] and not text.split()[0].isupper()
+                and SENTENCE_START.search(response, 0, match.start())):
+            continue
+        # "At Microsoft" opening a sentence is matched as one entity
+        kind = "employer" if any(match.start() <= start < match.end() for start in employers) else "entity"
+        add(Claim(kind, text, tuple(content)))
+    return claims
+
+
+class GroundednessChecker:
+    """
+    CPU-only groundedness scoring of answers against the source documents
+
+    Extracts checkable claims from a response (numbers, years, job titles,
+    employers and other named entities) and looks each one up in a
+    GroundingIndex. Responses with enough claims that are all supported are
+    "grounded"; responses with several unsupported high-risk claims and a low
+    supported share are "fabricated"; everything else is "uncertain" and left
+    to the remote quality check.
+    Verdicts can be compared with Gemini's assessments to tune the thresholds.
+    """
+
+    def __init__(self, pass_threshold: float = 1.0, min_claims: int = 3,
+                 fail_threshold: float = 0.6, fail_min_unsupported: int = 2):
+        """
+        Args:
+            pass_threshold: Minimum share of supported claims for "grounded"
+            min_claims: Claims a response needs before it can be "grounded"
+            fail_threshold: Share of supported claims a "fabricated" response stays below
+            fail_min_unsupported: Unsupported high-risk claims a "fabricated" response needs at least
+        """
+        self.pass_threshold = pass_threshold
+        self.min_claims = min_claims
+        self.fail_threshold = fail_threshold
+        self.fail_min_unsupported = fail_min_unsupported
+
+        self._lock = threading.Lock()
+        # (verdict, "pass" | "fail") -> responses where Gemini also judged groundedness
+        self.agreement: Dict[Tuple[str, str], int] = {}
+        self.verdicts: Dict[str, int] = {}
+
+    def check(self, response: str, index: GroundingIndex, query: str = "") -> GroundingResult:
+        """
+        Score a response against the source features
+
+        Claims found only in the user's own query (a company or role a
+        recruiter named, a city they asked about) are not held against the
+        response, but they are not evidence either: a response echoing them
+        is never "grounded".
+
+        Args:
+            response: Answer to check
+            index: Features of the current source documents
+            query: User message the response answers
+
+        Returns:
+            GroundingResult with the verdict and the unsupported claims
+        """
+        result = GroundingResult()
+        asked = GroundingIndex.build(query, "") if query else None
+
+        for claim in extract_claims(response):
+            result.claims += 1
+            if index.supports(claim):
+                result.supported += 1
+            elif asked is not None and self._echoed(claim, index, asked):
+                result.echoed.append((claim.kind, claim.text))
+            else:
+                result.unsupported.append((claim.kind, claim.text))
+
+        # Only several unsupported employers, figures, dates or titles settle "fabricated";
+        # anything weaker is left to the remote check
+        unsupported_high_risk = sum(1 for kind, _ in result.unsupported if kind in HIGH_RISK_KINDS)
+        not_contradicted = (result.supported + len(result.echoed)) / result.claims if result.claims else 1.0
+        if unsupported_high_risk >= self.fail_min_unsupported and not_contradicted < self.fail_threshold:
+            result.verdict = "fabricated"
+        elif result.claims >= self.min_claims and result.score >= self.pass_threshold:
+            result.verdict = "grounded"
+
+        with self._lock:
+            self.verdicts[result.verdict] = self.verdicts.get(result.verdict, 0) + 1
+        return result
+
+    @staticmethod
+    def _echoed(claim: Claim, index: GroundingIndex, asked: GroundingIndex) -> bool:
+        """Whether the query, together with the sources, contains a claim the sources alone don't"""
+        if claim.kind in ("date", "number"):
+            return asked.supports(claim)
+        return all(word in index.tokens or word in asked.tokens for word in claim.words)
+
+    def record_agreement(self, result: GroundingResult, gemini_grounded: bool):
+        """
+        Record Gemini's groundedness judgement for a locally scored response
+
+        Args:
+            result: Local result for the response
+            gemini_grounded: Gemini's is_based_on_resume for the same response
+        """
+        key = (result.verdict, "pass" if gemini_grounded else "fail")
+        with self._lock:
+            self.agreement[key] = self.agreement.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        """Verdict counts and agreement with Gemini per verdict"""
+        with self._lock:
+            agreement = {}
+            for verdict in ("grounded", "uncertain", "fabricated"):
+                passed = self.agreement.get((verdict, "pass"), 0)
+                failed = self.agreement.get((verdict, "fail"), 0)
+                if passed + failed:
+                    agreement[verdict] = {"compared": passed + failed, "gemini_pass_rate": passed / (passed + failed)}
+
+            # Decisive verdicts Gemini agreed with: grounded/pass and fabricated/fail
+            agreed = self.agreement.get(("grounded", "pass"), 0) + self.agreement.get(("fabricated", "fail"), 0)
+            decisive = sum(count for (verdict, _), count in self.agreement.items() if verdict != "uncertain")
+            return {
+                "verdicts": dict(self.verdicts),
+                "agreement": agreement,
+                "decisive_agreement_rate": agreed / decisive if decisive else None
+            }
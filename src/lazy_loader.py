@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyLoader(Generic[T]):
+    """Builds an expensive object once, in a background thread or on first use"""
+
+    def __init__(self, factory: Callable[[], T], name: str = "component"):
+        self.factory = factory
+        self.name = name
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    def start(self) -> Future:
+        """Start loading in a background thread if not already started"""
+        with self._lock:
+            if self._future is None:
+                self._future = Future()
+                threading.Thread(target=self._run, name=f"load-{self.name}", daemon=True).start()
+            return self._future
+
+    def load(self) -> T:
+        """Load synchronously in the calling thread (or wait for a load in progress)"""
+        with self._lock:
+            if self._future is None:
+                self._future = Future()
+                run_here = True
+            else:
+                run_here = False
+
+        if run_here:
+            self._run()
+        return self._future.result()
+
+    async def get(self) -> T:
+        """Await the loaded object, starting the load if needed"""
+        return await asyncio.wrap_future(self.start())
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the object loaded successfully"""
+        future = self._future
+        return future is not None and future.done() and future.exception() is None
+
+    @property
+    def status(self) -> str:
+        """One of: idle, loading, ready, failed"""
+        future = self._future
+        if future is None:
+            return "idle"
+        if not future.done():
+            return "loading"
+        return "failed" if future.exception() is not None else "ready"
+
+    @property
+    def error(self) -> Optional[str]:
+        """Load failure message, if any"""
+        future = self._future
+        if future is None or not future.done() or future.exception() is None:
+            return None
+        return str(future.exception())
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            result = self.factory()
+        except BaseException as e:
+            logger.error(f"Failed to load {self.name}: {str(e)}")
+            self._future.set_exception(e)
+            return
+
+        self.load_seconds = time.perf_counter() - start
+        logger.info(f"Loaded {self.name} in {self.load_seconds:.2f}s")
+        self._future.set_result(result)
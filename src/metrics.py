@@ -0,0 +1,185 @@
+import bisect
+import json
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from .tracing import RequestTrace
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(key)} {value:g}")
+        return "\n".join(lines)
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    def set(self, value: float, labels: Optional[Dict[str, str]] = None):
+        self.values[_label_key(labels)] = value
+
+    def render(self) -> str:
+        return super().render().replace(f"# TYPE {self.name} counter", f"# TYPE {self.name} gauge")
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # label key -> (bucket counts, sum, count)
+        self.values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, labels: Optional[Dict[str, str]] = None):
+        key = _label_key(labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return "\n".join(lines)
+
+
+class MetricsRegistry:
+    """Process-wide request metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+        self.requests = self.counter("agent_requests_total", "Processed queries by outcome")
+        self.request_seconds = self.histogram("agent_request_seconds", "End-to-end query latency")
+        self.stage_seconds = self.histogram("agent_stage_seconds", "Time spent per pipeline stage")
+        self.tokens = self.counter("agent_llm_tokens_total", "LLM tokens reported by providers")
+        self.revisions = self.counter("agent_revisions_total", "Responses replaced by a revision")
+        self.llm_queue_depth = self.gauge("agent_llm_queue_depth", "Calls waiting for provider admission")
+        self.llm_queue_wait = self.histogram("agent_llm_queue_wait_seconds", "Time calls waited for admission")
+        self.llm_retries = self.counter("agent_llm_retries_total", "Retried LLM calls by provider and error")
+        self.llm_parse = self.counter("agent_llm_parse_total", "Structured LLM responses by parse result")
+        self.llm_calls = self.counter("agent_llm_calls_total", "Routed answer calls by provider and result")
+        self.llm_hedges = self.counter("agent_llm_hedges_total", "Hedged answer calls by provider and result")
+        self.llm_failovers = self.counter("agent_llm_failovers_total", "Answers moved to another provider")
+        self.llm_circuit_state = self.gauge("agent_llm_circuit_state",
+                                            "Provider circuit breaker (0 closed, 1 half-open, 2 open)")
+        self.prompt_tokens = self.counter("agent_prompt_tokens_total", "Answer prompt tokens by section")
+        self.prompt_tokens_dropped = self.counter("agent_prompt_tokens_dropped_total",
+                                                  "Prompt tokens left out to stay within the budget, by section")
+        self.faq_lookups = self.counter("agent_faq_lookups_total",
+                                        "First-turn FAQ lookups by result (hit or fall_through)")
+        self.grounding_verdicts = self.counter("agent_grounding_verdicts_total",
+                                               "Local groundedness verdicts (grounded, uncertain, fabricated)")
+        self.grounding_agreement = self.counter("agent_grounding_agreement_total",
+                                                "Local groundedness verdicts by Gemini's is_based_on_resume")
+        self.content_reloads = self.counter("agent_content_reloads_total", "Resume/personal info reloads applied")
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Register (or return the existing) counter"""
+        return self._register(name, Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        """Register (or return the existing) gauge"""
+        return self._register(name, Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Register (or return the existing) histogram"""
+        return self._register(name, Histogram(name, help_text, buckets))
+
+    def _register(self, name: str, metric):
+        with self._lock:
+            return self._metrics.setdefault(name, metric)
+
+    def observe_trace(self, trace: RequestTrace):
+        """
+        Fold a finished request trace into the aggregates
+
+        Args:
+            trace: Completed request trace
+        """
+        with self._lock:
+            outcome = str(trace.attributes.get("outcome", "ok"))
+            self.requests.inc(labels={"outcome": outcome})
+            self.request_seconds.observe(trace.elapsed(), labels={"outcome": outcome})
+
+            for stage, seconds in trace.spans.items():
+                self.stage_seconds.observe(seconds, labels={"stage": stage})
+
+            for (provider, kind), count in trace.tokens.items():
+                self.tokens.inc(count, labels={"provider": provider, "kind": kind})
+
+            if trace.attributes.get("revised"):
+                self.revisions.inc()
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        with self._lock:
+            return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+class TraceSink:
+    """Appends finished request traces to a JSONL file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, trace: RequestTrace):
+        line = json.dumps(trace.to_dict())
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as file:
+                file.write(line + "\n")
+        except OSError as e:
+            logger.warning(f"Failed to write trace to {self.path}: {str(e)}")
+
+
+# Default registry shared by the agent system and the /metrics endpoint
+METRICS = MetricsRegistry()
@@ -1,5 +1,9 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Tuple
+import itertools
+from collections import deque
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+from .config import Config
+from .token_budget import MESSAGE_OVERHEAD, get_token_counter
 
 
 class ResponseQuality(BaseModel):
@@ -12,34 +16,239 @@ class ResponseQuality(BaseModel):
     requires_revision: bool = Field(description="Whether response needs revision")
 
 
+class CachedResponse(BaseModel):
+    """Model for a quality-approved response served from the response cache"""
+    response: str = Field(description="Approved response text")
+    quality_assessment: ResponseQuality = Field(description="Assessment that approved the response")
+    match: str = Field(default="exact", description="How the query matched: exact or similar")
+    similarity: float = Field(default=1.0, description="Similarity between the query and the cached query")
+
+
+class GeneratedResponse(BaseModel):
+    """Model for a pipeline run's answer before per-session post-processing"""
+    response: str = Field(description="Approved response text, or an error string")
+    quality_assessment: Optional[ResponseQuality] = Field(default=None, description="Assessment of the response")
+    revision_info: str = Field(default="", description="Revision note for the debug info")
+    error: bool = Field(default=False, description="Whether the OpenAI call failed")
+
+
+class PrescreenResult(BaseModel):
+    """Model for local pre-screen results"""
+    flags: List[str] = Field(default_factory=list, description="Problems detected locally")
+    likely_revision: bool = Field(description="Whether the quality gate is likely to request a revision")
+
+    @property
+    def feedback(self) -> str:
+        """Flags formatted as revision feedback"""
+        return "; ".join(self.flags)
+
+
+class QualityDecision(BaseModel):
+    """Model for the adaptive decision whether to run the quality check"""
+    run_check: bool = Field(description="Whether the Gemini quality check should run")
+    audit: bool = Field(default=False, description="Whether the check runs only as an audit sample")
+    reason: str = Field(description="Why the check runs or is skipped")
+    category: str = Field(description="Query category")
+    groundedness: float = Field(description="N-gram overlap between the response and the source documents")
+    pass_rate: Optional[float] = Field(default=None, description="Recent pass rate of the query category")
+
+
+def _new_exchange_buffer() -> Deque[Tuple[str, str]]:
+    return deque(maxlen=Config.HISTORY_MAX_EXCHANGES)
+
+
+# (user message, assistant message, estimated tokens) of one exchange
+ExchangeMessages = Tuple[Dict[str, str], Dict[str, str], int]
+
+
+def _trim_exchange(user_msg: Dict[str, str], assistant_msg: Dict[str, str],
+                   token_budget: int) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+    """Shorten an exchange's answer to fit a token budget, or None if even the question doesn't fit"""
+    counter = get_token_counter(Config.OPENAI_MODEL)
+    answer_budget = token_budget - counter.count_message(user_msg) - MESSAGE_OVERHEAD
+    if answer_budget < 16:
+        return None
+
+    return user_msg, {"role": "assistant", "content": counter.truncate(assistant_msg["content"], answer_budget)}
+
+
+class _HistoryWindow:
+    """
+    The latest exchanges that fit a count and token limit, as chat messages
+
+    Built once from the history, then updated as exchanges are added: the new
+    exchange is appended and the ones that no longer fit are dropped from the
+    front. The next older exchange is kept aside, trimmed to the tokens left.
+    """
+
+    def __init__(self, entries: Iterable[ExchangeMessages], limit: int, token_budget: Optional[int]):
+        """
+        Args:
+            entries: Exchanges newest first
+            limit: Maximum number of exchanges
+            token_budget: Optional cap on the estimated tokens of the window
+        """
+        self.limit = limit
+        self.token_budget = token_budget
+        self.entries: Deque[ExchangeMessages] = deque()
+        self.tokens = 0
+        # Next older exchange, included trimmed if enough of the budget is left
+        self.partial: Optional[ExchangeMessages] = None
+
+        for entry in itertools.islice(entries, limit):
+            if token_budget is not None and self.tokens + entry[2] > token_budget:
+                self.partial = entry
+                break
+            self.entries.appendleft(entry)
+            self.tokens += entry[2]
+
+        self.messages: List[Dict[str, str]] = [message for user_msg, assistant_msg, _ in self.entries
+                                               for message in (user_msg, assistant_msg)]
+        self._trimmed = self._trim()
+        if self._trimmed is not None:
+            self.messages = [*self._trimmed, *self.messages]
+
+    def add(self, entry: ExchangeMessages):
+        """Append a new exchange, dropping the oldest ones that no longer fit"""
+        kept = len(self.entries)
+        self.entries.append(entry)
+        self.tokens += entry[2]
+
+        while len(self.entries) > self.limit or (self.token_budget is not None and self.tokens > self.token_budget):
+            self.partial = self.entries.popleft()
+            self.tokens -= self.partial[2]
+            kept -= 1
+        if len(self.entries) >= self.limit:
+            self.partial = None
+
+        # A new list, since callers may still hold the previous one
+        self._trimmed = self._trim()
+        if kept < 0:
+            # The new exchange alone is over the budget
+            self.messages = list(self._trimmed or ())
+        else:
+            self.messages = [*(self._trimmed or ()), *self.messages[len(self.messages) - 2 * kept:],
+                             entry[0], entry[1]]
+
+    def _trim(self) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+        if self.partial is None or self.token_budget is None:
+            return None
+        return _trim_exchange(self.partial[0], self.partial[1], self.token_budget - self.tokens)
+
+
 class ConversationHistory(BaseModel):
     """Model for storing conversation history"""
-    exchanges: List[Tuple[str, str]] = Field(default_factory=list,
-                                             description="List of (user_message, assistant_response) tuples")
+    exchanges: Deque[Tuple[str, str]] = Field(default_factory=_new_exchange_buffer,
+                                              description="Bounded buffer of (user_message, assistant_response) tuples")
     interaction_count: int = Field(default=0, description="Total number of interactions")
+    summary: str = Field(default="", description="Rolling summary of exchanges older than the raw prompt window")
+    summarized_through: int = Field(default=0, description="Number of interactions the summary covers")
+
+    # Chat messages and token estimate per exchange, kept aligned with exchanges
+    _messages: Deque[ExchangeMessages] = PrivateAttr(default=None)
+    # Prompt windows keyed by (limit, token_budget); updated as exchanges are added
+    _windows: Dict[Tuple[int, Optional[int]], _HistoryWindow] = PrivateAttr(default_factory=dict)
+
+    @field_validator("exchanges", mode="after")
+    @classmethod
+    def _bound_exchanges(cls, exchanges: Deque[Tuple[str, str]]) -> Deque[Tuple[str, str]]:
+        if exchanges.maxlen == Config.HISTORY_MAX_EXCHANGES:
+            return exchanges
+        return deque(exchanges, maxlen=Config.HISTORY_MAX_EXCHANGES)
+
+    def model_post_init(self, __context: Any):
+        self._messages = deque((self._exchange_messages(user_msg, assistant_msg)
+                                for user_msg, assistant_msg in self.exchanges),
+                               maxlen=Config.HISTORY_MAX_EXCHANGES)
+
+    @staticmethod
+    def _exchange_messages(user_message: str, assistant_response: str) -> ExchangeMessages:
+        user_msg = {"role": "user", "content": user_message}
+        assistant_msg = {"role": "assistant", "content": assistant_response}
+        counter = get_token_counter(Config.OPENAI_MODEL)
+        return user_msg, assistant_msg, counter.count_message(user_msg) + counter.count_message(assistant_msg)
 
     def add_exchange(self, user_message: str, assistant_response: str):
-        """Add a new exchange to the history"""
+        """Add a new exchange to the history (the oldest is dropped once the buffer is full)"""
+        entry = self._exchange_messages(user_message, assistant_response)
         self.exchanges.append((user_message, assistant_response))
+        self._messages.append(entry)
+        for window in self._windows.values():
+            window.add(entry)
         self.interaction_count += 1
 
-    def get_recent_history(self, limit: int = 5) -> str:
-        """Get formatted recent conversation history"""
-        if not self.exchanges:
-            return "No previous conversation."
+    def get_recent_message_pairs(self, limit: int = 5) -> List[Tuple[Dict[str, str], Dict[str, str]]]:
+        """Get the most recent exchanges as (user, assistant) chat message pairs, oldest first"""
+        start = max(len(self._messages) - limit, 0)
+        return [(user_msg, assistant_msg)
+                for user_msg, assistant_msg, _ in itertools.islice(self._messages, start, None)]
+
+    def get_recent_messages(self, limit: int = 5, token_budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Get recent exchanges as alternating user/assistant chat messages
+
+        The window is kept up to date as exchanges are added, so repeated
+        prompt builds cost nothing. Message dicts are shared; callers must not
+        modify them.
+
+        Args:
+            limit: Maximum number of exchanges
+            token_budget: Optional cap on the estimated tokens of the window;
+                older exchanges are dropped first and the oldest one kept is
+                trimmed to fit
+
+        Returns:
+            List of chat messages, oldest first
+        """
+        # Exchanges that left the buffer can't be in the window either
+        key = (min(limit, self._messages.maxlen), token_budget)
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _HistoryWindow(reversed(self._messages), *key)
+        return window.messages
+
+    def get_unsummarized_exchanges(self, keep_recent: int) -> Tuple[List[Tuple[str, str]], int]:
+        """
+        Get the exchanges that left the raw prompt window but are not in the summary yet
+
+        Args:
+            keep_recent: Exchanges kept raw in prompts
+
+        Returns:
+            Tuple of (exchanges oldest first, summarized_through once they are summarized)
+        """
+        through = self.interaction_count - keep_recent
+        first = self.interaction_count - len(self.exchanges)  # interaction number of exchanges[0]
+        start = max(self.summarized_through, first)
+        if through <= start:
+            return [], self.summarized_through
+        return list(itertools.islice(self.exchanges, start - first, through - first)), through
 
-        history = ""
-        recent_exchanges = self.exchanges[-limit:]
+    def set_summary(self, summary: str, summarized_through: int) -> bool:
+        """
+        Replace the rolling summary unless a newer one is already in place
 
-        for i, (user_msg, assistant_msg) in enumerate(recent_exchanges, 1):
-            history += f"Exchange {i}:\nUser: {user_msg}\nBrian: {assistant_msg}\n\n"
+        Args:
+            summary: Summary text
+            summarized_through: Number of interactions it covers
 
-        return history
+        Returns:
+            Whether the summary was applied
+        """
+        if summarized_through <= self.summarized_through or summarized_through > self.interaction_count:
+            return False
+        self.summary = summary
+        self.summarized_through = summarized_through
+        return True
 
     def clear(self):
         """Clear conversation history"""
         self.exchanges.clear()
+        self._messages.clear()
+        self._windows.clear()
         self.interaction_count = 0
+        self.summary = ""
+        self.summarized_through = 0
 
 
 class ProcessingResult(BaseModel):
@@ -0,0 +1,63 @@
+import logging
+from .config import Config
+from .groundedness import GroundingIndex, extract_claims
+from .models import PrescreenResult
+
+logger = logging.getLogger(__name__)
+
+# Phrases that usually mean the answer broke character or apologised
+OFF_ROLE_PHRASES = (
+    "as an ai",
+    "language model",
+    "i cannot",
+    "i can't help",
+    "i don't have access",
+    "i apologize",
+)
+
+
+class ResponsePrescreen:
+    """
+    Cheap local checks that predict whether the quality gate will ask for a revision
+
+    Figures are extracted and looked up the same way as in the groundedness
+    check, so both agree on which ones the sources support.
+    """
+
+    def __init__(self, grounding: GroundingIndex):
+        """
+        Args:
+            grounding: Features of the resume and personal info
+        """
+        self.grounding = grounding
+
+    def screen(self, user_query: str, response: str) -> PrescreenResult:
+        """
+        Screen a response for likely quality problems
+
+        Args:
+            user_query: User's question
+            response: Response to screen
+
+        Returns:
+            PrescreenResult listing the problems found
+        """
+        flags = []
+        lowered = response.lower()
+
+        word_count = len(response.split())
+        if word_count > Config.PRESCREEN_MAX_WORDS:
+            flags.append(f"Response is too long ({word_count} words)")
+        elif word_count < Config.PRESCREEN_MIN_WORDS:
+            flags.append(f"Response is too brief ({word_count} words)")
+
+        off_role = [phrase for phrase in OFF_ROLE_PHRASES if phrase in lowered]
+        if off_role:
+            flags.append(f"Response breaks the Brian VEAU persona ({', '.join(off_role)})")
+
+        unknown_numbers = [claim.text for claim in extract_claims(response)
+                           if claim.kind in ("date", "number") and not self.grounding.supports(claim)]
+        if unknown_numbers:
+            flags.append(f"Figures not found in resume or personal info: {', '.join(unknown_numbers)}")
+
+        return PrescreenResult(flags=flags, likely_revision=bool(flags))
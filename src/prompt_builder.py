@@ -1,61 +1,220 @@
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, List, Optional
+from .config import Config
 from .models import ConversationHistory
 
+# Prompts are laid out static-first: the system message depends only on the
+# loaded documents, so provider-side prompt caching can reuse it across turns
+# and users. Everything that changes per turn comes after it.
+
+BRIAN_INSTRUCTIONS = """You are Brian VEAU, a Global CIO and Vice President of IT currently working at ShawKwei & Partners. You are responding to professional inquiries from recruiters and potential employers interested in CIO or CTO positions.
+
+STRICT GUIDELINES:
+- Only answer professional questions related to your career, experience, skills, and achievements
+- Base ALL responses ONLY on the information provided in your resume and personal details
+- Do NOT invent or extrapolate information not present in your documents
+- If asked about something not in your resume, politely redirect to what IS in your resume
+- Maintain a professional, confident, and engaging tone
+- Keep responses concise but informative (max 3-4 paragraphs)
+- Do NOT discuss personal topics unrelated to professional qualifications
+- Focus on leadership achievements, technical expertise, and business impact"""
+
+RESUME_SECTION = "\n\nRESUME CONTENT:\n"
+PERSONAL_INFO_SECTION = "\n\nPERSONAL INFORMATION:\n"
+RESUME_EXCERPTS_SECTION = "RELEVANT RESUME EXCERPTS:\n"
+LINKEDIN_INSTRUCTION = "IMPORTANT: At the end of your response, suggest connecting on LinkedIn for further discussion.\n\n"
+QUERY_SECTION = "USER QUERY: "
+QUERY_FOOTER = ("\n\nRespond as Brian VEAU would, focusing only on professional matters and "
+                "information contained in the provided documents.")
+
+SUMMARY_SECTION = "SUMMARY OF THE EARLIER CONVERSATION:\n"
+
+SUMMARY_INSTRUCTIONS = """You maintain a running summary of a conversation between a recruiter and an assistant answering as Brian VEAU.
+
+Rewrite the summary so it also covers the new exchanges. Keep what later answers may need:
+- Topics and questions the recruiter raised, and any role, company or requirements they mentioned
+- Facts about Brian the assistant stated
+- Anything promised, suggested (e.g. connecting on LinkedIn) or left open
+
+Write plain prose of at most {max_words} words, in the third person, with no preamble."""
+
+QUALITY_CHECK_INSTRUCTIONS = """Evaluate a response from an AI agent acting as Brian VEAU (CIO/CTO professional) responding to a recruiter query.
+
+EVALUATION CRITERIA:
+1. Professional tone and appropriateness for recruiter audience
+2. Relevance to the user's query
+3. Based solely on resume/personal information provided (no invented facts)
+4. Accuracy and consistency with source material
+5. Appropriate length and engagement level
+6. Maintains focus on professional qualifications only
+
+SPECIFIC ISSUES TO CHECK:
+- Does the response invent any facts not in the source materials?
+- Is the tone appropriate for a senior executive speaking to recruiters?
+- Does it stay focused on professional topics only?
+- Is the response length appropriate (not too brief, not too verbose)?
+- Does it adequately address the user's specific question?
+
+Provide evaluation in this exact JSON format (no additional text):
+{
+    "is_professional": true/false,
+    "is_relevant": true/false,
+    "is_based_on_resume": true/false,
+    "confidence_score": 0.0-1.0,
+    "feedback": "specific feedback for improvement",
+    "requires_revision": true/false
+}
+
+PERSONAL INFO REFERENCE:
+"""
+
+REVISION_INSTRUCTIONS = """
+
+Please provide an improved response addressing the feedback while maintaining your role as Brian VEAU. Focus on:
+- Addressing the specific issues mentioned in the feedback
+- Maintaining professional tone and accuracy
+- Staying within the bounds of information provided in your resume and personal details
+- Keeping the response appropriately concise and engaging"""
+
+
+@lru_cache(maxsize=8)
+def _system_message(personal_info: str, static_resume: str) -> Dict[str, str]:
+    """Build the static system message once per content version"""
+    content = BRIAN_INSTRUCTIONS
+    if static_resume:
+        content += RESUME_SECTION + static_resume
+    content += PERSONAL_INFO_SECTION + personal_info
+    return {"role": "system", "content": content}
+
 
 class PromptBuilder:
     """Builds prompts for AI interactions"""
 
+    @staticmethod
+    def system_message(personal_info: str, static_resume: str = "") -> Dict[str, str]:
+        """
+        Static system message for a content version (cached)
+
+        Args:
+            personal_info: Personal information from text file
+            static_resume: Full resume when retrieval is not used
+
+        Returns:
+            System chat message
+        """
+        return _system_message(personal_info, static_resume)
+
     @staticmethod
     def create_brian_prompt(
             user_query: str,
             resume_content: str,
             personal_info: str,
             conversation_history: ConversationHistory,
-            suggest_linkedin: bool = False
-    ) -> str:
+            suggest_linkedin: bool = False,
+            static_resume: str = "",
+            history_messages: Optional[List[Dict[str, str]]] = None
+    ) -> List[Dict[str, str]]:
         """
-        Create the prompt for OpenAI to act as Brian
+        Create the chat messages for OpenAI to act as Brian
+
+        Layout: static system message, previous exchanges as chat turns, then
+        the per-turn resume excerpts and query.
 
         Args:
             user_query: User's question
-            resume_content: Content from resume PDF
+            resume_content: Resume excerpts relevant to the query (may be empty)
             personal_info: Personal information from text file
             conversation_history: Previous conversation exchanges
             suggest_linkedin: Whether to suggest LinkedIn connection
+            static_resume: Full resume to place in the system message when
+                retrieval is not used
+            history_messages: History already selected by a prompt budget;
+                by default the recent exchanges are taken from the history
 
         Returns:
-            Formatted prompt string
+            List of chat messages
         """
-        linkedin_instruction = ""
-        if suggest_linkedin:
-            linkedin_instruction = "\nIMPORTANT: At the end of your response, suggest connecting on LinkedIn for further discussion."
+        messages = [_system_message(personal_info, static_resume)]
+        if history_messages is None:
+            if Config.SUMMARY_ENABLED:
+                # Older turns are represented by the rolling summary
+                if conversation_history.summary:
+                    messages.append(PromptBuilder.create_summary_message(conversation_history.summary))
+                limit = Config.SUMMARY_RAW_EXCHANGES
+            else:
+                limit = Config.HISTORY_PROMPT_EXCHANGES
+            history_messages = conversation_history.get_recent_messages(
+                limit=limit,
+                token_budget=Config.HISTORY_TOKEN_BUDGET or None
+            )
+        messages.extend(history_messages)
+        messages.append(PromptBuilder.create_query_message(user_query, resume_content, suggest_linkedin))
+        return messages
 
-        return f"""
-You are Brian VEAU, a Global CIO and Vice President of IT currently working at ShawKwei & Partners. You are responding to professional inquiries from recruiters and potential employers interested in CIO or CTO positions.
+    @staticmethod
+    def create_query_message(user_query: str, resume_content: str = "",
+                             suggest_linkedin: bool = False) -> Dict[str, str]:
+        """
+        Create the final user message carrying the resume excerpts and query
 
-STRICT GUIDELINES:
-- Only answer professional questions related to your career, experience, skills, and achievements
-- Base ALL responses ONLY on the information provided in your resume and personal details
-- Do NOT invent or extrapolate information not present in your documents
-- If asked about something not in your resume, politely redirect to what IS in your resume
-- Maintain a professional, confident, and engaging tone
-- Keep responses concise but informative (max 3-4 paragraphs)
-- Do NOT discuss personal topics unrelated to professional qualifications
-- Focus on leadership achievements, technical expertise, and business impact{linkedin_instruction}
+        Args:
+            user_query: User's question
+            resume_content: Resume excerpts relevant to the query (may be empty)
+            suggest_linkedin: Whether to suggest LinkedIn connection
 
-RESUME CONTENT:
-{resume_content}
+        Returns:
+            User chat message
+        """
+        parts = []
+        if resume_content:
+            parts.append(RESUME_EXCERPTS_SECTION)
+            parts.append(resume_content)
+            parts.append("\n\n")
+        if suggest_linkedin:
+            parts.append(LINKEDIN_INSTRUCTION)
+        parts.append(QUERY_SECTION)
+        parts.append(user_query)
+        parts.append(QUERY_FOOTER)
+        return {"role": "user", "content": "".join(parts)}
 
-PERSONAL INFORMATION:
-{personal_info}
+    @staticmethod
+    def create_summary_message(summary: str) -> Dict[str, str]:
+        """
+        Create the message carrying the summary of earlier turns
 
-CONVERSATION HISTORY:
-{conversation_history.get_recent_history()}
+        Args:
+            summary: Rolling conversation summary
 
-USER QUERY: {user_query}
+        Returns:
+            System chat message
+        """
+        return {"role": "system", "content": SUMMARY_SECTION + summary}
 
-Respond as Brian VEAU would, focusing only on professional matters and information contained in the provided documents.
-"""
+    @staticmethod
+    def create_summary_prompt(
+            previous_summary: str,
+            exchanges: List[tuple],
+            max_words: int = 150
+    ) -> List[Dict[str, str]]:
+        """
+        Create the prompt that folds exchanges into the rolling summary
+
+        Args:
+            previous_summary: Current summary (may be empty)
+            exchanges: (user_message, assistant_response) pairs to add, oldest first
+            max_words: Length limit for the summary
+
+        Returns:
+            List of chat messages
+        """
+        parts = [f"CURRENT SUMMARY:\n{previous_summary or '(none yet)'}\n\nNEW EXCHANGES:\n"]
+        for user_msg, assistant_msg in exchanges:
+            parts.append(f"Recruiter: {user_msg}\nBrian: {assistant_msg}\n\n")
+        parts.append("UPDATED SUMMARY:")
+        return [
+            {"role": "system", "content": SUMMARY_INSTRUCTIONS.format(max_words=max_words)},
+            {"role": "user", "content": "".join(parts)}
+        ]
 
     @staticmethod
     def create_quality_check_prompt(
@@ -70,81 +229,45 @@ Respond as Brian VEAU would, focusing only on professional matters and informati
         Args:
             user_query: Original user question
             brian_response: Brian's response to evaluate
-            resume_content: Resume content for reference (truncated)
+            resume_content: Resume excerpts relevant to the query and response
             personal_info: Personal information for reference
 
         Returns:
             Formatted quality check prompt
         """
-        # Truncate resume content to avoid token limits
-        truncated_resume = resume_content[:1500] + "..." if len(resume_content) > 1500 else resume_content
-
-        return f"""
-Evaluate this response from an AI agent acting as Brian VEAU (CIO/CTO professional) responding to a recruiter query.
-
-EVALUATION CRITERIA:
-1. Professional tone and appropriateness for recruiter audience
-2. Relevance to the user's query
-3. Based solely on resume/personal information provided (no invented facts)
-4. Accuracy and consistency with source material
-5. Appropriate length and engagement level
-6. Maintains focus on professional qualifications only
-
-USER QUERY: {user_query}
-
-BRIAN'S RESPONSE: {brian_response}
-
-RESUME REFERENCE MATERIAL:
-{truncated_resume}
-
-PERSONAL INFO REFERENCE:
-{personal_info}
-
-SPECIFIC ISSUES TO CHECK:
-- Does the response invent any facts not in the source materials?
-- Is the tone appropriate for a senior executive speaking to recruiters?
-- Does it stay focused on professional topics only?
-- Is the response length appropriate (not too brief, not too verbose)?
-- Does it adequately address the user's specific question?
-
-Provide evaluation in this exact JSON format (no additional text):
-{{
-    "is_professional": true/false,
-    "is_relevant": true/false,
-    "is_based_on_resume": true/false,
-    "confidence_score": 0.0-1.0,
-    "feedback": "specific feedback for improvement",
-    "requires_revision": true/false
-}}
-"""
+        return "".join((
+            QUALITY_CHECK_INSTRUCTIONS,
+            personal_info,
+            "\n\nRESUME REFERENCE MATERIAL:\n",
+            resume_content,
+            "\n\nUSER QUERY: ",
+            user_query,
+            "\n\nBRIAN'S RESPONSE: ",
+            brian_response,
+            "\n"
+        ))
 
     @staticmethod
     def create_revision_prompt(
-            original_prompt: str,
+            original_prompt: List[Dict[str, str]],
             initial_response: str,
             quality_feedback: str
-    ) -> str:
+    ) -> List[Dict[str, str]]:
         """
         Create prompt for response revision
 
+        The original messages are reused as-is (sharing their cached prefix)
+        and the initial response and feedback are appended as new turns.
+
         Args:
-            original_prompt: The original Brian prompt
+            original_prompt: The original Brian messages
             initial_response: The initial response that needs revision
             quality_feedback: Feedback from quality assessment
 
         Returns:
-            Revision prompt
+            List of chat messages
         """
-        return f"""
-{original_prompt}
-
-PREVIOUS RESPONSE: {initial_response}
-
-QUALITY FEEDBACK: {quality_feedback}
-
-Please provide an improved response addressing the feedback while maintaining your role as Brian VEAU. Focus on:
-- Addressing the specific issues mentioned in the feedback
-- Maintaining professional tone and accuracy
-- Staying within the bounds of information provided in your resume and personal details
-- Keeping the response appropriately concise and engaging
-"""
\ No newline at end of file
+        return original_prompt + [
+            {"role": "assistant", "content": initial_response},
+            {"role": "user", "content": f"QUALITY FEEDBACK: {quality_feedback}{REVISION_INSTRUCTIONS}"}
+        ]
@@ -0,0 +1,419 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Optional
+from .metrics import METRICS
+from .rate_limiter import PRIORITY_ANSWER
+from .tracing import RequestTrace
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_HALF_OPEN = "half_open"
+CIRCUIT_OPEN = "open"
+
+_CIRCUIT_GAUGE = {CIRCUIT_CLOSED: 0, CIRCUIT_HALF_OPEN: 1, CIRCUIT_OPEN: 2}
+
+
+def _is_error(response: Optional[str]) -> bool:
+    """Whether a client result is a failure (clients return "Error: ..." strings)"""
+    return not response or response.startswith("Error:")
+
+
+class ProviderHealth:
+    """
+    Rolling latency/error statistics and circuit breaker for one provider
+
+    The circuit opens after `failure_threshold` consecutive failures, or when
+    the error rate over the window reaches `error_rate_threshold`. After
+    `open_seconds` one probe call is let through (half-open); its success
+    closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, name: str, window: int = 100, min_samples: int = 20, failure_threshold: int = 5,
+                 error_rate_threshold: float = 0.5, open_seconds: float = 30.0):
+        self.name = name
+        self.min_samples = min_samples
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.open_seconds = open_seconds
+
+        # Seconds until a complete answer / until the first streamed delta
+        self.latencies: deque = deque(maxlen=window)
+        self.first_token_latencies: deque = deque(maxlen=window)
+        # True for a successful call
+        self.outcomes: deque = deque(maxlen=window)
+
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+        self.calls = 0
+        self.failures = 0
+        self.circuit_opens = 0
+        self._publish_state()
+
+    def available(self) -> bool:
+        """
+        Whether calls should be sent to the provider
+
+        Returns:
+            False while the circuit is open or a half-open probe is in flight
+        """
+        if self.state == CIRCUIT_OPEN:
+            return time.monotonic() - self.opened_at >= self.open_seconds
+        if self.state == CIRCUIT_HALF_OPEN:
+            return not self._probe_in_flight
+        return True
+
+    def begin(self):
+        """Note that a call is being sent; the first call after the open period is the probe"""
+        if self.state == CIRCUIT_OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+            self._set_state(CIRCUIT_HALF_OPEN)
+        if self.state == CIRCUIT_HALF_OPEN:
+            self._probe_in_flight = True
+
+    def record_success(self, latency: float, first_token: bool = False):
+        """Record a successful call and its latency"""
+        self.calls += 1
+        (self.first_token_latencies if first_token else self.latencies).append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        METRICS.llm_calls.inc(labels={"provider": self.name, "result": "ok"})
+
+        if self.state != CIRCUIT_CLOSED:
+            logger.info(f"{self.name} circuit closed after a successful probe")
+            # Start from a clean window so the outage's errors don't reopen it
+            self.outcomes.clear()
+            self._set_state(CIRCUIT_CLOSED)
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the circuit when the thresholds are reached"""
+        self.calls += 1
+        self.failures += 1
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        METRICS.llm_calls.inc(labels={"provider": self.name, "result": "error"})
+
+        if (self.state == CIRCUIT_HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+                or (len(self.outcomes) >= self.min_samples and self.error_rate() >= self.error_rate_threshold)):
+            if self.state != CIRCUIT_OPEN:
+                self.circuit_opens += 1
+                logger.warning(f"{self.name} circuit opened for {self.open_seconds:g}s "
+                               f"({self.consecutive_failures} consecutive failures, "
+                               f"error rate {self.error_rate():.0%})")
+            self.opened_at = time.monotonic()
+            self._set_state(CIRCUIT_OPEN)
+        self._probe_in_flight = False
+
+    def record_cancelled(self):
+        """Release the probe slot of a call abandoned by a hedge; latency is unknown"""
+        METRICS.llm_calls.inc(labels={"provider": self.name, "result": "cancelled"})
+        self._probe_in_flight = False
+
+    def error_rate(self) -> float:
+        """Fraction of failed calls in the window"""
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def latency_quantile(self, quantile: float, first_token: bool = False) -> Optional[float]:
+        """
+        Latency quantile over the window
+
+        Args:
+            quantile: Fraction between 0 and 1 (e.g. 0.95)
+            first_token: Use time-to-first-delta of streamed calls
+
+        Returns:
+            Latency in seconds, or None with fewer than min_samples observations
+        """
+        samples = self.first_token_latencies if first_token else self.latencies
+        if len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._publish_state()
+
+    def _publish_state(self):
+        METRICS.llm_circuit_state.set(_CIRCUIT_GAUGE[self.state], labels={"provider": self.name})
+
+    def stats(self) -> dict:
+        """Circuit state, error rate and latency quantiles"""
+        p50 = self.latency_quantile(0.5)
+        p95 = self.latency_quantile(0.95)
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "error_rate": round(self.error_rate(), 4),
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "circuit_opens": self.circuit_opens
+        }
+
+
+class ProviderRouter:
+    """
+    Sends answer-generation calls to the healthiest provider
+
+    Providers are tried in preference order, skipping those whose circuit is
+    open. A call still unanswered after the primary's hedge-quantile latency is
+    duplicated on the next provider and whichever succeeds first is used; a
+    failed call fails over to the next provider at once.
+
+    Clients must provide get_response(prompt, timeout, trace, priority) and
+    report failures as "Error: ..." strings; stream_response is used when present.
+    """
+
+    def __init__(self, clients: Dict[str, object], order: List[str], hedging: bool = True,
+                 hedge_quantile: float = 0.95, hedge_min_delay: float = 0.5, hedge_default_delay: float = 5.0,
+                 window: int = 100, min_samples: int = 20, failure_threshold: int = 5,
+                 error_rate_threshold: float = 0.5, open_seconds: float = 30.0):
+        """
+        Args:
+            clients: Provider name -> client
+            order: Provider names in order of preference
+            hedging: Whether slow calls are hedged on the next provider
+            hedge_quantile: Latency quantile of the primary after which to hedge
+            hedge_min_delay: Lower bound for the hedge delay in seconds
+            hedge_default_delay: Hedge delay until enough latencies are observed
+            window: Calls kept per provider for latency and error statistics
+            min_samples: Observations needed before quantiles and error rates are used
+            failure_threshold: Consecutive failures that open a circuit
+            error_rate_threshold: Windowed error rate that opens a circuit
+            open_seconds: Time an open circuit waits before a probe call
+        """
+        self.clients = {name: clients[name] for name in order}
+        self.order = list(order)
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.health = {
+            name: ProviderHealth(name, window, min_samples, failure_threshold, error_rate_threshold, open_seconds)
+            for name in self.order
+        }
+
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    def hedge_delay(self, provider: str, first_token: bool = False) -> float:
+        """Seconds to wait on a provider before hedging"""
+        latency = self.health[provider].latency_quantile(self.hedge_quantile, first_token)
+        if latency is None:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, latency)
+
+    def _candidates(self) -> List[str]:
+        """Providers to try, in order; the preferred one is used even if every circuit is open"""
+        available = [name for name in self.order if self.health[name].available()]
+        return available or self.order[:1]
+
+    async def _call(self, provider: str, prompt, timeout: Optional[float], trace: Optional[RequestTrace],
+                    priority: int) -> str:
+        """Call one provider and record the outcome in its health"""
+        health = self.health[provider]
+        health.begin()
+        start = time.perf_counter()
+        try:
+            response = await self.clients[provider].get_response(prompt, timeout=timeout, trace=trace,
+                                                                 priority=priority)
+        except asyncio.CancelledError:
+            health.record_cancelled()
+            raise
+        except Exception as e:
+            health.record_failure()
+            return f"Error: {provider} call failed: {str(e)}"
+
+        if _is_error(response):
+            health.record_failure()
+        else:
+            health.record_success(time.perf_counter() - start)
+        return response
+
+    async def get_response(self, prompt, timeout: Optional[float] = None, trace: Optional[RequestTrace] = None,
+                           priority: int = PRIORITY_ANSWER) -> str:
+        """
+        Generate a response on the fastest healthy provider
+
+        Args:
+            prompt: Prompt string or chat messages
+            timeout: Per-call timeout in seconds (provider default if None)
+            trace: Optional trace; receives the provider and routing outcome
+            priority: Admission priority
+
+        Returns:
+            Generated response text, or the last provider's "Error: ..." string
+        """
+        candidates = self._candidates()
+        tasks: Dict[asyncio.Task, str] = {}
+
+        def launch(provider: str):
+            task = asyncio.create_task(self._call(provider, prompt, timeout, trace, priority))
+            tasks[task] = provider
+
+        launch(candidates[0])
+        remaining = candidates[1:]
+        routing = "primary"
+        response = ""
+
+        try:
+            while tasks:
+                wait_timeout = None
+                if self.hedging and remaining and len(tasks) == 1:
+                    wait_timeout = self.hedge_delay(next(iter(tasks.values())))
+
+                done, _ = await asyncio.wait(tasks, timeout=wait_timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # The call is slower than usual: race it against the next provider
+                    provider = remaining.pop(0)
+                    self._count_hedge(provider, "sent")
+                    routing = "hedged"
+                    launch(provider)
+                    continue
+
+                for task in done:
+                    provider = tasks.pop(task)
+                    response = task.result()
+                    if not _is_error(response):
+                        if routing == "hedged" and provider != candidates[0]:
+                            self._count_hedge(provider, "won")
+                        self._annotate(trace, provider, routing)
+                        return response
+
+                if not tasks and remaining:
+                    # Everything in flight failed: fail over to the next provider now
+                    provider = remaining.pop(0)
+                    self._count_failover(candidates[0], provider)
+                    routing = "failover"
+                    launch(provider)
+
+            return response
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream_response(self, prompt, timeout: Optional[float] = None, trace: Optional[RequestTrace] = None,
+                              priority: int = PRIORITY_ANSWER) -> AsyncIterator[str]:
+        """
+        Stream a response from the preferred healthy provider
+
+        If no delta arrives within the primary's hedge-quantile time to first
+        token, a complete answer is requested from the next provider and
+        whichever produces text first is used. A stream that fails before its
+        first delta fails over to the next provider.
+
+        Yields:
+            Response text deltas (a hedged or failed-over answer arrives as one
+            delta); a single "Error: ..." item if every provider failed
+        """
+        candidates = self._candidates()
+        primary = candidates[0]
+        client = self.clients[primary]
+        if not hasattr(client, "stream_response"):
+            yield await self.get_response(prompt, timeout, trace, priority)
+            return
+
+        health = self.health[primary]
+        health.begin()
+        stream = client.stream_response(prompt, timeout=timeout, trace=trace, priority=priority)
+        start = time.perf_counter()
+        first_task = asyncio.ensure_future(stream.__anext__())
+        hedge_task = None
+        routing = "primary"
+
+        try:
+            if self.hedging and len(candidates) > 1:
+                done, _ = await asyncio.wait({first_task}, timeout=self.hedge_delay(primary, first_token=True))
+                if not done:
+                    self._count_hedge(candidates[1], "sent")
+                    routing = "hedged"
+                    hedge_task = asyncio.create_task(self._call(candidates[1], prompt, timeout, trace, priority))
+                    await asyncio.wait({first_task, hedge_task}, return_when=asyncio.FIRST_COMPLETED)
+
+            if hedge_task is not None and hedge_task.done() and not first_task.done() \
+                    and not _is_error(hedge_task.result()):
+                self._count_hedge(candidates[1], "won")
+                self._annotate(trace, candidates[1], routing)
+                yield hedge_task.result()
+                return
+
+            try:
+                first = await first_task
+            except StopAsyncIteration:
+                first = ""
+
+            if not _is_error(first):
+                health.record_success(time.perf_counter() - start, first_token=True)
+                self._annotate(trace, primary, routing)
+                if hedge_task is not None:
+                    hedge_task.cancel()
+                yield first
+                async for delta in stream:
+                    yield delta
+                return
+
+            health.record_failure()
+            if len(candidates) == 1:
+                yield first or "Error: Empty response"
+                return
+
+            # The primary failed before producing text
+            self._count_failover(primary, candidates[1])
+            if hedge_task is None:
+                hedge_task = asyncio.create_task(self._call(candidates[1], prompt, timeout, trace, priority))
+            response = await hedge_task
+            if _is_error(response):
+                yield first or response
+                return
+            self._annotate(trace, candidates[1], "failover")
+            yield response
+
+        finally:
+            if not first_task.done():
+                first_task.cancel()
+                health.record_cancelled()
+                # The generator cannot be closed while its pending step is running
+                await asyncio.gather(first_task, return_exceptions=True)
+            if hedge_task is not None and not hedge_task.done():
+                hedge_task.cancel()
+            await stream.aclose()
+
+    def _count_hedge(self, provider: str, result: str):
+        if result == "sent":
+            self.hedges += 1
+        elif result == "won":
+            self.hedge_wins += 1
+        METRICS.llm_hedges.inc(labels={"provider": provider, "result": result})
+
+    def _count_failover(self, source: str, target: str):
+        self.failovers += 1
+        logger.warning(f"Failing over from {source} to {target}")
+        METRICS.llm_failovers.inc(labels={"source": source, "target": target})
+
+    @staticmethod
+    def _annotate(trace: Optional[RequestTrace], provider: str, routing: str):
+        if trace is not None:
+            trace.set("provider", provider)
+            trace.set("routing", routing)
+
+    def stats(self) -> dict:
+        """Per-provider health and hedging/failover counters"""
+        return {
+            "order": self.order,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "providers": {name: health.stats() for name, health in self.health.items()}
+        }
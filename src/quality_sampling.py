@@ -0,0 +1,191 @@
+import random
+import re
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+from .models import PrescreenResult, QualityDecision, ResponseQuality
+from .text_similarity import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Ordered keyword rules; the first matching category wins
+QUERY_CATEGORIES = (
+    ("compensation", re.compile(r"\b(salary|salaries|compensation|pay|paid|bonus|equity|expectations?)\b")),
+    ("personal", re.compile(r"\b(family|married|wife|husband|kids?|children|age|old|religion|politic\w*|hobby|hobbies|health)\b")),
+    ("hypothetical", re.compile(r"\b(would you|what if|how would|imagine|suppose|if you were|opinion|think about)\b")),
+    ("availability", re.compile(r"\b(available|availability|notice|relocat\w*|open to|start|visa|remote)\b")),
+    ("education", re.compile(r"\b(education|degree|university|school|studied|certifi\w*|diploma|mba)\b")),
+    ("skills", re.compile(r"\b(skills?|technolog\w*|stack|cloud|erp|security|cyber\w*|platforms?|tools?|languages?)\b")),
+    ("experience", re.compile(r"\b(experience|role|roles|career|led|lead|leadership|manage\w*|team|teams|achiev\w*|"
+                              r"project|projects|company|companies|worked|work|responsib\w*|background)\b")),
+)
+
+# Categories answered straight from the resume; anything else is always checked
+LOW_RISK_CATEGORIES = frozenset({"experience", "skills", "education", "availability"})
+
+# Prefix of the assessment GeminiClient returns when the check itself failed
+FAILED_CHECK_PREFIX = "Quality check failed"
+
+
+def classify_query(user_query: str) -> str:
+    """
+    Assign a query to a coarse category
+
+    Args:
+        user_query: User's question
+
+    Returns:
+        Category name, or "general" when no rule matches
+    """
+    lowered = user_query.lower()
+    for category, pattern in QUERY_CATEGORIES:
+        if pattern.search(lowered):
+            return category
+    return "general"
+
+
+class QualitySampler:
+    """Decides per response whether the Gemini quality check is worth running"""
+
+    def __init__(self, resume_content: str, personal_info: str, audit_rate: float = 0.1,
+                 min_groundedness: float = 0.45, min_pass_rate: float = 0.9,
+                 window: int = 50, min_samples: int = 10, seed: Optional[int] = None):
+        """
+        Args:
+            resume_content: Resume text answers should be grounded in
+            personal_info: Personal information answers may also draw on
+            audit_rate: Fraction of skippable responses checked anyway
+            min_groundedness: Minimum n-gram overlap with the source documents to skip
+            min_pass_rate: Minimum recent pass rate of the query category to skip
+            window: Number of recent check results kept per category
+            min_samples: Results a category needs before it may be skipped
+            seed: Random seed for audit sampling
+        """
+        self._set_source(resume_content, personal_info)
+
+        self.audit_rate = audit_rate
+        self.min_groundedness = min_groundedness
+        self.min_pass_rate = min_pass_rate
+        self.window = window
+        self.min_samples = min_samples
+        self.rng = random.Random(seed)
+
+        self.results: Dict[str, Deque[bool]] = {}
+        self.checked = 0
+        self.skipped = 0
+        self.audited = 0
+
+    def _set_source(self, resume_content: str, personal_info: str):
+        source_tokens = tokenize(f"{resume_content}\n{personal_info}")
+        self.source_unigrams = frozenset(source_tokens)
+        self.source_bigrams = frozenset(zip(source_tokens, source_tokens[1:]))
+
+    def update_content(self, resume_content: str, personal_info: str):
+        """
+        Ground future decisions in reloaded documents
+
+        Past check results describe answers from the old content, so the
+        categories start collecting samples again.
+
+        Args:
+            resume_content: New resume text
+            personal_info: New personal information
+        """
+        self._set_source(resume_content, personal_info)
+        self.results = {}
+
+    def groundedness(self, response: str) -> float:
+        """
+        Share of the response's words and word pairs that occur in the source documents
+
+        Args:
+            response: Response to score
+
+        Returns:
+            Score between 0 and 1 (the mean of unigram and bigram overlap)
+        """
+        tokens = tokenize(response)
+        if len(tokens) < 2:
+            return 0.0
+
+        bigrams = list(zip(tokens, tokens[1:]))
+        unigram_overlap = sum(token in self.source_unigrams for token in tokens) / len(tokens)
+        bigram_overlap = sum(bigram in self.source_bigrams for bigram in bigrams) / len(bigrams)
+        return (unigram_overlap + bigram_overlap) / 2
+
+    def pass_rate(self, category: str) -> Optional[float]:
+        """Recent pass rate of a category, or None until it has enough samples"""
+        results = self.results.get(category)
+        if not results or len(results) < self.min_samples:
+            return None
+        return sum(results) / len(results)
+
+    def decide(self, user_query: str, response: str, prescreen: PrescreenResult) -> QualityDecision:
+        """
+        Decide whether to run the quality check on a response
+
+        Args:
+            user_query: User's question
+            response: Response to be checked
+            prescreen: Local pre-screen findings for the response
+
+        Returns:
+            QualityDecision with the verdict and the signals behind it
+        """
+        category = classify_query(user_query)
+        groundedness = self.groundedness(response)
+        pass_rate = self.pass_rate(category)
+
+        if prescreen.likely_revision:
+            reason = f"pre-screen flagged: {prescreen.feedback}"
+        elif category not in LOW_RISK_CATEGORIES:
+            reason = f"{category} queries are always checked"
+        elif groundedness < self.min_groundedness:
+            reason = f"low groundedness ({groundedness:.2f})"
+        elif pass_rate is None:
+            reason = f"warming up {category} pass rate"
+        elif pass_rate < self.min_pass_rate:
+            reason = f"{category} pass rate {pass_rate:.2f} below {self.min_pass_rate:.2f}"
+        elif self.rng.random() < self.audit_rate:
+            self.audited += 1
+            self.checked += 1
+            return QualityDecision(run_check=True, audit=True, reason="audit sample", category=category,
+                                   groundedness=groundedness, pass_rate=pass_rate)
+        else:
+            self.skipped += 1
+            return QualityDecision(run_check=False, reason="low risk", category=category,
+                                   groundedness=groundedness, pass_rate=pass_rate)
+
+        self.checked += 1
+        return QualityDecision(run_check=True, reason=reason, category=category,
+                               groundedness=groundedness, pass_rate=pass_rate)
+
+    def record(self, decision: QualityDecision, quality_assessment: ResponseQuality):
+        """
+        Feed a quality check result into the category's rolling pass rate
+
+        Args:
+            decision: Decision that led to the check
+            quality_assessment: Result of the check
+        """
+        # A failed Gemini call says nothing about the answer
+        if quality_assessment.feedback.startswith(FAILED_CHECK_PREFIX):
+            return
+
+        results = self.results.get(decision.category)
+        if results is None:
+            results = self.results[decision.category] = deque(maxlen=self.window)
+        results.append(not quality_assessment.requires_revision)
+
+    def stats(self) -> dict:
+        """Sampling counters and the current pass rate per category"""
+        total = self.checked + self.skipped
+        return {
+            "checked": self.checked,
+            "skipped": self.skipped,
+            "audited": self.audited,
+            "skip_rate": round(self.skipped / total, 3) if total else 0.0,
+            "pass_rates": {category: round(sum(results) / len(results), 3)
+                           for category, results in self.results.items() if results}
+        }
+
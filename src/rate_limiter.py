@@ -0,0 +1,214 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Mapping, Optional, Tuple
+from .metrics import METRICS
+from .shared_state import InProcessBackend, SharedBackend
+
+logger = logging.getLogger(__name__)
+
+# Lower values are admitted first
+PRIORITY_ANSWER = 0
+PRIORITY_QUALITY_CHECK = 1
+PRIORITY_REVISION = 2
+PRIORITY_BACKGROUND = 3
+
+
+class ProviderLimiter:
+    """
+    Admission control for one LLM provider
+
+    Calls wait in a priority queue until a concurrency slot is free and the
+    request and token buckets have budget. Waiters are admitted strictly in
+    priority order, so queued revisions never take budget ahead of first answers.
+    The buckets live in a SharedBackend, so workers sharing a backend share the
+    per-minute budgets; the concurrency limit applies per process. Budget is
+    taken inline on the event loop to keep admission strictly ordered, so each
+    take blocks the loop for at most the backend timeout
+    (SHARED_BACKEND_TIMEOUT_SECONDS), and not at all while a failed Redis
+    backend fails fast; calls are then admitted without a shared budget.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 0, backend: Optional[SharedBackend] = None):
+        """
+        Args:
+            name: Provider name used in stats and metrics labels
+            requests_per_minute: Request budget (0 disables)
+            tokens_per_minute: Token budget (0 disables)
+            max_concurrency: Maximum in-flight calls (0 for unlimited)
+            backend: Where the token buckets are kept (defaults to this process)
+        """
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.backend = backend or InProcessBackend()
+
+        self._waiters: List[Tuple[int, int, asyncio.Future, int]] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.active = 0
+
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.retries = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future, _ in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0, priority: int = PRIORITY_ANSWER) -> AsyncIterator[float]:
+        """
+        Hold an admission slot for the duration of one API call
+
+        Args:
+            tokens: Estimated tokens the call will consume
+            priority: Queue priority (PRIORITY_* constant)
+
+        Yields:
+            Seconds spent waiting for admission
+        """
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future, tokens))
+        self._admit()
+        self._publish_depth()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled; hand the slot back
+                self._release()
+            raise
+        finally:
+            self._publish_depth()
+
+        wait = time.perf_counter() - start
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        METRICS.llm_queue_wait.observe(wait, labels={"provider": self.name})
+
+        try:
+            yield wait
+        finally:
+            self._release()
+
+    def _release(self):
+        self.active -= 1
+        self._admit()
+
+    def _admit(self):
+        """Admit queued calls in priority order while slots and budget allow"""
+        while self._waiters:
+            if self.max_concurrency and self.active >= self.max_concurrency:
+                return
+
+            _, _, future, tokens = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)  # cancelled while queued
+                continue
+
+            delay = self._take_budget(tokens)
+            if delay > 0:
+                # The head of the queue waits for budget and nothing overtakes it
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+                return
+
+            heapq.heappop(self._waiters)
+            self.active += 1
+            future.set_result(None)
+
+    def _take_budget(self, tokens: int) -> float:
+        """Take one request and the call's tokens from the buckets; returns the wait if short"""
+        costs = {}
+        if self.requests_per_minute > 0:
+            costs["requests"] = (1, self.requests_per_minute)
+        if self.tokens_per_minute > 0 and tokens:
+            costs["tokens"] = (tokens, self.tokens_per_minute)
+        if not costs:
+            return 0.0
+
+        try:
+            return self.backend.take_budget(f"limiter:{self.name}", costs)
+        except Exception as e:
+            # An unreachable backend must not stall every LLM call
+            logger.warning(f"Rate-limit backend unavailable, admitting {self.name} call: {str(e)}")
+            return 0.0
+
+    def _on_timer(self):
+        self._timer = None
+        self._admit()
+        self._publish_depth()
+
+    def _publish_depth(self):
+        METRICS.llm_queue_depth.set(self.queue_depth, labels={"provider": self.name})
+
+    def record_retry(self, reason: str):
+        """Count a retried call"""
+        self.retries += 1
+        METRICS.llm_retries.inc(labels={"provider": self.name, "reason": reason})
+
+    def stats(self) -> dict:
+        """Queue depth, in-flight calls and admission wait times"""
+        return {
+            "queue_depth": self.queue_depth,
+            "active": self.active,
+            "admitted": self.admitted,
+            "mean_wait": round(self.total_wait / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait": round(self.max_wait, 4),
+            "retries": self.retries
+        }
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Read the server's requested retry delay from response headers
+
+    Args:
+        headers: HTTP response headers
+
+    Returns:
+        Delay in seconds, or None if the server did not specify one
+    """
+    if not headers:
+        return None
+
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue  # HTTP-date form; fall back to our own backoff
+
+    return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """
+    Delay before a retry: full-jitter exponential backoff, never shorter than retry-after
+
+    Args:
+        attempt: Zero-based retry number
+        base: Delay scale of the first retry in seconds
+        cap: Maximum backoff in seconds
+        retry_after: Delay requested by the server, if any
+
+    Returns:
+        Seconds to sleep
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
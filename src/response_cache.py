@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from typing import Optional, Tuple
+from .models import CachedResponse, ResponseQuality
+from .shared_state import SharedBackend
+from .text_similarity import HashingVectorizer, normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    LRU/TTL cache of quality-approved responses keyed by normalized query
+
+    With a shared backend, approved answers are also published there and
+    exact-match misses fall back to it, so workers reuse each other's answers.
+    Similarity matching only sees entries this worker has stored or fetched.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float,
+                 similarity_threshold: Optional[float] = None,
+                 backend: Optional[SharedBackend] = None):
+        """
+        Args:
+            max_entries: Maximum number of cached responses
+            ttl_seconds: Maximum age of a cached response
+            similarity_threshold: Minimum cosine similarity for a fuzzy match;
+                None disables similarity matching
+            backend: Shared backend to publish answers to (ignored unless shared)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.backend = backend if backend is not None and backend.shared else None
+        self.vectorizer = HashingVectorizer()
+
+        # (scope, normalized_query) -> (cached_response, created_at, query_vector)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[CachedResponse, float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Stacked vectors per scope, rebuilt lazily after the entries change
+        self._matrix_cache = {}
+
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query: str, scope: str) -> Optional[CachedResponse]:
+        """
+        Look up a cached response
+
+        Args:
+            query: User query
+            scope: Content version the answer must belong to
+
+        Returns:
+            CachedResponse, or None on a miss
+        """
+        key = (scope, normalize_text(query))
+        now = time.time()
+        cached = self._get_exact(key, now)
+        if cached is not None:
+            return cached
+        return self._get_fallback(key, self._get_shared(key), now)
+
+    async def aget(self, query: str, scope: str) -> Optional[CachedResponse]:
+        """Like get, reading the shared backend in a thread instead of on the event loop"""
+        key = (scope, normalize_text(query))
+        now = time.time()
+        cached = self._get_exact(key, now)
+        if cached is not None:
+            return cached
+        shared = await asyncio.to_thread(self._get_shared, key) if self.backend is not None else None
+        return self._get_fallback(key, shared, now)
+
+    def _get_exact(self, key: Tuple[str, str], now: float) -> Optional[CachedResponse]:
+        """Exact match among this worker's entries"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].model_copy(update={"match": "exact", "similarity": 1.0})
+
+            if entry is not None:
+                self._remove(key)
+        return None
+
+    def _get_fallback(self, key: Tuple[str, str], shared: Optional[Tuple[CachedResponse, float]],
+                      now: float) -> Optional[CachedResponse]:
+        """Use an answer another worker published, else the most similar local entry"""
+        if shared is not None:
+            cached, created_at = shared
+            self._store(key, cached, created_at)
+            with self._lock:
+                self.hits += 1
+            return cached.model_copy(update={"match": "exact", "similarity": 1.0})
+
+        with self._lock:
+            if self.similarity_threshold is not None:
+                match = self._similar_entry(key, now)
+                if match is not None:
+                    self.similar_hits += 1
+                    return match
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, scope: str, response: str, quality_assessment: ResponseQuality):
+        """
+        Store an approved response
+
+        Args:
+            query: User query
+            scope: Content version the answer was generated from
+            response: Approved response text
+            quality_assessment: Quality assessment that approved the response
+        """
+        normalized = normalize_text(query)
+        if not normalized:
+            return
+
+        key = (scope, normalized)
+        cached = CachedResponse(response=response, quality_assessment=quality_assessment)
+        created_at = time.time()
+        self._store(key, cached, created_at)
+
+        if self.backend is not None:
+            record = {"cached": cached.model_dump(), "created_at": created_at}
+            self.backend.write_behind(lambda: self._publish(f"{scope}:{normalized}", record))
+
+    def _publish(self, key: str, record: dict):
+        try:
+            self.backend.set("response_cache", key, record, ttl_seconds=self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Failed to publish cached response: {str(e)}")
+
+    def _store(self, key: Tuple[str, str], cached: CachedResponse, created_at: float):
+        """Insert an entry locally, evicting the least recently used beyond max_entries"""
+        vector = self.vectorizer.transform([key[1]])[0]
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (cached, created_at, vector)
+            self._matrix_cache.pop(key[0], None)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _get_shared(self, key: Tuple[str, str]) -> Optional[Tuple[CachedResponse, float]]:
+        """Fetch an answer another worker published"""
+        if self.backend is None:
+            return None
+        try:
+            record = self.backend.get("response_cache", f"{key[0]}:{key[1]}")
+        except Exception as e:
+            logger.warning(f"Failed to read shared response cache: {str(e)}")
+            return None
+        if record is None:
+            return None
+        return CachedResponse(**record["cached"]), record["created_at"]
+
+    def invalidate_scope(self, scope: str) -> int:
+        """
+        Drop every entry belonging to a content version
+
+        Args:
+            scope: Content version to invalidate
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == scope]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self) -> dict:
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.similar_hits) / lookups if lookups else 0.0
+            }
+
+    def _remove(self, key: Tuple[str, str]):
+        del self._entries[key]
+        self._matrix_cache.pop(key[0], None)
+
+    def _similar_entry(self, key: Tuple[str, str], now: float) -> Optional[CachedResponse]:
+        """Find the most similar live entry in the same scope"""
+        scope, normalized = key
+        if scope not in self._matrix_cache:
+            keys = [k for k in self._entries if k[0] == scope]
+            matrix = np.stack([self._entries[k][2] for k in keys]) if keys else None
+            self._matrix_cache[scope] = (keys, matrix)
+
+        keys, matrix = self._matrix_cache[scope]
+        if matrix is None:
+            return None
+
+        scores = matrix @ self.vectorizer.transform([normalized])[0]
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        if similarity < self.similarity_threshold:
+            return None
+
+        best_key = keys[best]
+        cached, created_at, _ = self._entries[best_key]
+        if now - created_at >= self.ttl_seconds:
+            self._remove(best_key)
+            return None
+
+        self._entries.move_to_end(best_key)
+        return cached.model_copy(update={"match": "similar", "similarity": similarity})
@@ -0,0 +1,163 @@
+import re
+import logging
+import numpy as np
+from typing import List
+from .text_similarity import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Lines that open a new resume section, e.g. "SKILLS", "KEY ACHIEVEMENTS:", "EDUCATION"
+SECTION_HEADER = re.compile(r"^[A-Z][A-Z &/'-]{3,}:?\s*$")
+BULLET = "•"
+
+
+class ResumeIndex:
+    """BM25 index over paragraph-sized chunks of the resume text"""
+
+    def __init__(self, chunks: List[str], k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            chunks: Text chunks in document order
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+        """
+        self.chunks = chunks
+
+        tokenized = [tokenize(chunk) for chunk in chunks]
+        self.vocabulary = {}
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        term_freq = np.zeros((len(chunks), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                term_freq[row, self.vocabulary[token]] += 1.0
+
+        doc_len = term_freq.sum(axis=1, keepdims=True)
+        avg_len = float(doc_len.mean()) if len(chunks) else 0.0
+        doc_freq = (term_freq > 0).sum(axis=0)
+        idf = np.log(1.0 + (len(chunks) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        # Precompute per-(chunk, term) BM25 weights so a query is a column sum
+        norm = k1 * (1.0 - b + b * doc_len / max(avg_len, 1e-9))
+        self.weights = (idf * term_freq * (k1 + 1.0) / (term_freq + norm)).astype(np.float32)
+
+    @classmethod
+    def from_text(cls, text: str, max_chunk_chars: int = 600) -> "ResumeIndex":
+        """
+        Build an index from extracted resume text
+
+        Args:
+            text: Full resume text
+            max_chunk_chars: Target maximum size of a chunk
+
+        Returns:
+            ResumeIndex over the chunked text
+        """
+        chunks = cls.chunk_text(text, max_chunk_chars)
+        logger.info(f"Built resume index: {len(chunks)} chunks")
+        return cls(chunks)
+
+    @staticmethod
+    def chunk_text(text: str, max_chunk_chars: int = 600) -> List[str]:
+        """
+        Split text into chunks at section headers and bullet points
+
+        Bullet points keep their continuation lines, and consecutive short
+        paragraphs are merged up to max_chunk_chars.
+
+        Args:
+            text: Text to split
+            max_chunk_chars: Target maximum size of a chunk
+
+        Returns:
+            List of chunks in document order
+        """
+        paragraphs = []
+        current = []
+
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+
+            starts_paragraph = stripped.startswith(BULLET) or SECTION_HEADER.match(stripped)
+            too_long = sum(len(part) + 1 for part in current) + len(stripped) > max_chunk_chars
+            if current and (starts_paragraph or too_long):
+                paragraphs.append("\n".join(current))
+                current = []
+            current.append(stripped)
+
+        if current:
+            paragraphs.append("\n".join(current))
+
+        chunks = []
+        for paragraph in paragraphs:
+            if chunks and len(chunks[-1]) + len(paragraph) + 1 <= max_chunk_chars:
+                chunks[-1] = f"{chunks[-1]}\n{paragraph}"
+            else:
+                chunks.append(paragraph)
+
+        return chunks
+
+    def search(self, query: str, top_k: int) -> List[int]:
+        """
+        Rank chunks against a query
+
+        Args:
+            query: Free-text query
+            top_k: Number of chunks to return
+
+        Returns:
+            Indices of the top_k chunks, best first
+        """
+        term_ids = [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary]
+        if not term_ids or not self.chunks:
+            return []
+
+        scores = self.weights[:, term_ids].sum(axis=1)
+        top_k = min(top_k, len(self.chunks))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        ranked = candidates[np.argsort(-scores[candidates])]
+        return [int(i) for i in ranked if scores[i] > 0]
+
+    def select(self, query: str, top_k: int) -> List[int]:
+        """
+        Choose the chunks to show for a query, most important first
+
+        The opening chunk (name, title and summary) always comes first. A query
+        that matches nothing (e.g. "tell me about yourself") gets every chunk.
+
+        Args:
+            query: Free-text query
+            top_k: Number of matching chunks to include
+
+        Returns:
+            Chunk indices in priority order
+        """
+        if not self.chunks:
+            return []
+
+        ranked = self.search(query, top_k)
+        if not ranked:
+            return list(range(len(self.chunks)))
+
+        return [0] + [i for i in ranked if i != 0]
+
+    def render(self, indices: List[int]) -> str:
+        """Join chunks in document order so related lines stay together"""
+        return "\n\n".join(self.chunks[i] for i in sorted(indices))
+
+    def get_context(self, query: str, top_k: int) -> str:
+        """
+        Get the most relevant chunks for a query as prompt context
+
+        Args:
+            query: Free-text query
+            top_k: Number of chunks to include
+
+        Returns:
+            Selected chunks in document order, joined by blank lines
+        """
+        return self.render(self.select(query, top_k))
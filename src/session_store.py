@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from .models import ConversationHistory
+from .shared_state import SharedBackend
+
+logger = logging.getLogger(__name__)
+
+# Returned by _load_record when the shared backend cannot be read
+_UNAVAILABLE = object()
+
+
+class SessionStore:
+    """
+    Per-session conversation state with TTL, LRU eviction and a memory cap
+
+    With a shared backend every change is written through and each access
+    picks up changes other workers made, so a session can move between
+    worker processes. The in-memory sessions then act as a local cache.
+    Writes go through the backend's write-behind thread; code on the event
+    loop reads with aget so backend reads don't block it either.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, max_memory_bytes: int,
+                 backend: Optional[SharedBackend] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_memory_bytes = max_memory_bytes
+        self.backend = backend if backend is not None and backend.shared else None
+        # session_id -> version of the shared record the local copy reflects
+        self._versions: Dict[str, int] = {}
+        # session_id -> writes to the shared record still in flight
+        self._pending: Dict[str, int] = {}
+
+        # session_id -> (history, last_access, estimated_size); ordered oldest access first
+        self._sessions: "OrderedDict[str, Tuple[ConversationHistory, float, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str,
+            seed_exchanges: Optional[List[Tuple[str, str]]] = None) -> ConversationHistory:
+        """
+        Get the conversation for a session, creating it if needed
+
+        Args:
+            session_id: Session identifier (e.g. Gradio session hash)
+            seed_exchanges: (user_message, assistant_response) pairs used to
+                rebuild the session when it is unknown or has expired
+
+        Returns:
+            ConversationHistory for the session
+        """
+        return self._resolve(session_id, self._load_record(session_id), seed_exchanges)
+
+    async def aget(self, session_id: str,
+                   seed_exchanges: Optional[List[Tuple[str, str]]] = None) -> ConversationHistory:
+        """Like get, reading the shared record in a thread instead of on the event loop"""
+        record = await asyncio.to_thread(self._load_record, session_id) if self.backend is not None else None
+        return self._resolve(session_id, record, seed_exchanges)
+
+    def _resolve(self, session_id: str, record,
+                 seed_exchanges: Optional[List[Tuple[str, str]]]) -> ConversationHistory:
+        """Serve the local copy if it reflects the shared record, otherwise rebuild the session"""
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire(now)
+            if self._pending.get(session_id):
+                # Our own write is still in flight, so the local state is newer than the record
+                record = _UNAVAILABLE
+
+            entry = self._sessions.get(session_id)
+            # Keep serving the local copy if the backend is briefly unreachable
+            if entry is not None and (self.backend is None or record is _UNAVAILABLE
+                                      or self._is_current(session_id, record)):
+                history, _, size = entry
+                self._sessions[session_id] = (history, now, size)
+                self._sessions.move_to_end(session_id)
+                return history
+
+            if entry is not None:
+                # Another worker changed or dropped the session since we cached it
+                self._memory_bytes -= entry[2]
+                del self._sessions[session_id]
+
+            history = ConversationHistory()
+            if record is not None and record is not _UNAVAILABLE:
+                for user_msg, assistant_msg in record["exchanges"]:
+                    history.add_exchange(user_msg, assistant_msg)
+                history.interaction_count = record["interaction_count"]
+                history.set_summary(record.get("summary", ""), record.get("summarized_through", 0))
+                self._versions[session_id] = record["version"]
+            else:
+                for user_msg, assistant_msg in seed_exchanges or []:
+                    history.add_exchange(user_msg, assistant_msg)
+
+            size = self._estimate_size(history)
+            self._sessions[session_id] = (history, now, size)
+            self._memory_bytes += size
+            self._evict()
+
+        if record is None and self.backend is not None:
+            self._save_record(session_id, history)
+        return history
+
+    def touch(self, session_id: str):
+        """
+        Refresh the size estimate of a session after it has been modified
+
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return
+
+            history, _, old_size = entry
+            new_size = self._estimate_size(history)
+            self._sessions[session_id] = (history, time.monotonic(), new_size)
+            self._sessions.move_to_end(session_id)
+            self._memory_bytes += new_size - old_size
+            self._evict()
+
+        if self.backend is not None:
+            self._save_record(session_id, history)
+
+    def reset(self, session_id: str):
+        """Drop a session"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is not None:
+                self._memory_bytes -= entry[2]
+            self._versions.pop(session_id, None)
+
+        if self.backend is not None:
+            self._write_behind(session_id, lambda: self.backend.delete("sessions", session_id))
+
+    def _load_record(self, session_id: str):
+        """Read a session's shared record (None if absent, _UNAVAILABLE on backend errors)"""
+        if self.backend is None:
+            return None
+        try:
+            return self.backend.get("sessions", session_id)
+        except Exception as e:
+            logger.warning(f"Failed to read shared session {session_id}: {str(e)}")
+            return _UNAVAILABLE
+
+    def _is_current(self, session_id: str, record: Optional[dict]) -> bool:
+        """Whether the local copy reflects the shared record"""
+        return record is not None and record["version"] == self._versions.get(session_id)
+
+    def _save_record(self, session_id: str, history: ConversationHistory):
+        """Write a session through to the shared backend under a new version (in the background)"""
+        record = {
+            "version": time.time_ns(),
+            "exchanges": [list(exchange) for exchange in history.exchanges],
+            "interaction_count": history.interaction_count,
+            "summary": history.summary,
+            "summarized_through": history.summarized_through
+        }
+        def write():
+            self.backend.set("sessions", session_id, record, ttl_seconds=self.ttl_seconds)
+            with self._lock:
+                self._versions[session_id] = record["version"]
+
+        self._write_behind(session_id, write)
+
+    def _write_behind(self, session_id: str, operation):
+        """Queue a change to a session's shared record, tracking it until it lands"""
+        with self._lock:
+            self._pending[session_id] = self._pending.get(session_id, 0) + 1
+
+        def run():
+            try:
+                operation()
+            except Exception as e:
+                logger.warning(f"Failed to update shared session {session_id}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pending[session_id] -= 1
+                    if not self._pending[session_id]:
+                        del self._pending[session_id]
+
+        self.backend.write_behind(run)
+
+    def stats(self) -> dict:
+        """Get store statistics"""
+        with self._lock:
+            return {
+                "active_sessions": len(self._sessions),
+                "memory_bytes": self._memory_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expire(self, now: float):
+        """Remove sessions idle for longer than the TTL (oldest first)"""
+        while self._sessions:
+            session_id, (_, last_access, size) = next(iter(self._sessions.items()))
+            if now - last_access < self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self._versions.pop(session_id, None)
+            self._memory_bytes -= size
+            self.expirations += 1
+
+    def _evict(self):
+        """Evict least recently used sessions until within count and memory limits"""
+        # Always keep the most recent session even if it alone exceeds the cap
+        while len(self._sessions) > 1 and (
+                len(self._sessions) > self.max_sessions or self._memory_bytes > self.max_memory_bytes):
+            session_id, (_, _, size) = self._sessions.popitem(last=False)
+            self._versions.pop(session_id, None)
+            self._memory_bytes -= size
+            self.evictions += 1
+            logger.debug(f"Evicted session {session_id}")
+
+    @staticmethod
+    def _estimate_size(history: ConversationHistory) -> int:
+        """Approximate memory held by a session in bytes"""
+        # Fixed per-session overhead plus per-exchange tuple overhead and text
+        return 512 + len(history.summary) + sum(96 + len(user_msg) + len(assistant_msg)
+                                                for user_msg, assistant_msg in history.exchanges)
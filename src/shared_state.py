@@ -0,0 +1,346 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# name -> (amount to take, budget per minute)
+BudgetCosts = Dict[str, Tuple[float, float]]
+
+
+def _apply_budget(state: Dict[str, list], costs: BudgetCosts, now: float) -> float:
+    """
+    Refill token buckets and take the costs if every bucket can cover them
+
+    Args:
+        state: name -> [available, updated_at]; modified in place
+        costs: name -> (amount, per_minute)
+        now: Current wall-clock time
+
+    Returns:
+        0 if the costs were taken, otherwise seconds until all buckets can cover them
+    """
+    delay = 0.0
+    for name, (amount, per_minute) in costs.items():
+        rate = per_minute / 60.0
+        available, updated = state.get(name, (per_minute, now))
+        available = min(per_minute, available + max(0.0, now - updated) * rate)
+        state[name] = [available, now]
+
+        amount = min(amount, per_minute)
+        if available < amount:
+            delay = max(delay, (amount - available) / rate)
+
+    if delay == 0.0:
+        for name, (amount, per_minute) in costs.items():
+            state[name][0] -= min(amount, per_minute)
+    return delay
+
+
+class SharedBackend:
+    """
+    Key-value state (sessions, cached answers, rate-limit budgets) shared by app workers
+
+    Values are JSON-serializable; every key lives in a namespace and may carry a TTL.
+
+    Calls are synchronous and bounded by the backend's timeout. Code on the
+    event loop keeps them off it: reads run in a thread (asyncio.to_thread)
+    and writes whose result nobody waits for go through write_behind.
+    take_budget is the exception, being called inline by the rate limiter.
+    """
+
+    # Whether state is visible to other processes
+    shared = False
+
+    _writer: Optional[ThreadPoolExecutor] = None
+    _writer_lock = threading.Lock()
+
+    def write_behind(self, operation: Callable[[], Any]) -> Future:
+        """
+        Run a write in the background, after every write submitted before it
+
+        Args:
+            operation: Callable performing the write; exceptions end up in the future
+
+        Returns:
+            Future of the operation
+        """
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backend-writer")
+        return self._writer.submit(operation)
+
+    def flush(self, timeout: Optional[float] = None):
+        """Wait for the writes submitted so far"""
+        if self._writer is not None:
+            self.write_behind(lambda: None).result(timeout)
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        raise NotImplementedError
+
+    def take_budget(self, key: str, costs: BudgetCosts) -> float:
+        """
+        Atomically take from a set of token buckets
+
+        Args:
+            key: Budget identifier (e.g. "limiter:openai")
+            costs: Bucket name -> (amount, per_minute)
+
+        Returns:
+            0 if the budget was taken, otherwise seconds to wait before retrying
+        """
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+
+class InProcessBackend(SharedBackend):
+    """Backend for a single worker process"""
+
+    def __init__(self):
+        self._data: Dict[Tuple[str, str], Tuple[Any, Optional[float]]] = {}
+        self._budgets: Dict[str, Dict[str, list]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[(namespace, key)]
+                return None
+            return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._data[(namespace, key)] = (value, expires_at)
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.pop((namespace, key), None)
+
+    def take_budget(self, key: str, costs: BudgetCosts) -> float:
+        with self._lock:
+            return _apply_budget(self._budgets.setdefault(key, {}), costs, time.time())
+
+
+class SQLiteBackend(SharedBackend):
+    """
+    Backend for several workers on one host
+
+    A WAL-mode SQLite file; placing it on tmpfs (e.g. /dev/shm) keeps it in
+    shared memory.
+    """
+
+    shared = True
+
+    # Purge expired rows after this many writes
+    PURGE_INTERVAL = 256
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        """
+        Args:
+            path: Database file (created if missing)
+            timeout: Seconds a call waits for another worker's write lock
+        """
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection in autocommit mode"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), now + ttl_seconds if ttl_seconds else None)
+        )
+
+        self._writes += 1
+        if self._writes % self.PURGE_INTERVAL == 0:
+            connection.execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+    def delete(self, namespace: str, key: str):
+        self._connection().execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def take_budget(self, key: str, costs: BudgetCosts) -> float:
+        connection = self._connection()
+        # IMMEDIATE takes the write lock up front, serializing workers on the budget
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT value FROM kv WHERE namespace = 'budget' AND key = ?", (key,)
+            ).fetchone()
+            state = json.loads(row[0]) if row else {}
+            delay = _apply_budget(state, costs, time.time())
+            connection.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES ('budget', ?, ?, NULL)",
+                (key, json.dumps(state))
+            )
+            connection.execute("COMMIT")
+            return delay
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def describe(self) -> str:
+        return f"SQLiteBackend({self.path})"
+
+
+class RedisBackend(SharedBackend):
+    """
+    Backend for workers on one or more hosts, using a Redis-compatible server
+
+    Every call is bounded by the socket timeout. After a failure the backend
+    fails fast for retry_seconds, so an unreachable server costs one timeout
+    per interval rather than one per call.
+    """
+
+    shared = True
+
+    # Optimistic budget transactions tried before backing off
+    BUDGET_ATTEMPTS = 8
+    # Wait returned to the limiter when the budget stays contended
+    BUDGET_CONTENTION_DELAY = 0.01
+
+    def __init__(self, url: str, prefix: str = "agent:", timeout: float = 2.0, retry_seconds: float = 5.0):
+        """
+        Args:
+            url: Server URL (redis://, rediss:// or unix://)
+            prefix: Prefix of every key
+            timeout: Seconds a connect or call may take
+            retry_seconds: Seconds to fail fast after a failed call
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("The redis package is required for a redis:// SHARED_BACKEND_URL") from e
+
+        self.url = url
+        self.prefix = prefix
+        self.retry_seconds = retry_seconds
+        self._redis_module = redis
+        self.client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._down_until = 0.0
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def _call(self, operation: Callable[[], Any]) -> Any:
+        """Run a server call, failing fast while the server is considered down"""
+        if time.monotonic() < self._down_until:
+            raise ConnectionError(f"{self.describe()} unavailable after a recent failure")
+        try:
+            return operation()
+        except self._redis_module.RedisError:
+            self._down_until = time.monotonic() + self.retry_seconds
+            raise
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        raw = self._call(lambda: self.client.get(self._key(namespace, key)))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        px = int(ttl_seconds * 1000) if ttl_seconds else None
+        self._call(lambda: self.client.set(self._key(namespace, key), json.dumps(value), px=px))
+
+    def delete(self, namespace: str, key: str):
+        self._call(lambda: self.client.delete(self._key(namespace, key)))
+
+    def take_budget(self, key: str, costs: BudgetCosts) -> float:
+        return self._call(lambda: self._take_budget(self._key("budget", key), costs))
+
+    def _take_budget(self, redis_key: str, costs: BudgetCosts) -> float:
+        # Optimistic transaction: retried if another worker changes the budget concurrently
+        with self.client.pipeline() as pipe:
+            for _ in range(self.BUDGET_ATTEMPTS):
+                try:
+                    pipe.watch(redis_key)
+                    raw = pipe.get(redis_key)
+                    state = json.loads(raw) if raw is not None else {}
+                    delay = _apply_budget(state, costs, time.time())
+                    pipe.multi()
+                    pipe.set(redis_key, json.dumps(state))
+                    pipe.execute()
+                    return delay
+                except self._redis_module.WatchError:
+                    continue
+        # Let the limiter retry from a timer instead of spinning on the event loop
+        return self.BUDGET_CONTENTION_DELAY
+
+    def describe(self) -> str:
+        return f"RedisBackend({self.url})"
+
+
+def create_backend(url: str, timeout: float = 2.0, retry_seconds: float = 5.0) -> SharedBackend:
+    """
+    Create a backend from a URL
+
+    Args:
+        url: "memory://" (or empty), "sqlite:///path/to/file.db", or "redis://host:port/db"
+        timeout: Seconds a backend call may block
+        retry_seconds: Seconds a Redis backend fails fast after a failed call
+
+    Returns:
+        SharedBackend implementation
+    """
+    if not url or url.startswith("memory://"):
+        return InProcessBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):], timeout=timeout)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url, timeout=timeout, retry_seconds=retry_seconds)
+    raise ValueError(f"Unsupported SHARED_BACKEND_URL: {url}")
+
+
+@lru_cache(maxsize=None)
+def get_shared_backend(url: str) -> SharedBackend:
+    """Process-wide backend instance for a URL"""
+    backend = create_backend(url, timeout=Config.SHARED_BACKEND_TIMEOUT_SECONDS,
+                             retry_seconds=Config.SHARED_BACKEND_RETRY_SECONDS)
+    logger.info(f"Using shared state backend {backend.describe()}")
+    return backend
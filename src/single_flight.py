@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one shared run"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+
+    def join(self, key: Hashable) -> Optional[asyncio.Future]:
+        """
+        Attach to an in-flight call
+
+        Args:
+            key: Call key
+
+        Returns:
+            Future resolved with the leader's result, or None if nothing is in flight
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        return future
+
+    def lead(self, key: Hashable) -> asyncio.Future:
+        """
+        Register the caller as the leader for a key
+
+        The leader must call finish() once its result is known.
+
+        Args:
+            key: Call key
+
+        Returns:
+            Future that followers will await
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.leaders += 1
+        return future
+
+    def finish(self, key: Hashable, future: asyncio.Future, result: Any = None,
+               error: Optional[BaseException] = None):
+        """
+        Publish the leader's outcome to its followers and stop coalescing on the key
+
+        Args:
+            key: Call key
+            future: Future returned by lead()
+            result: Result to share
+            error: Failure of the leader; followers then run the call themselves
+        """
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if future.done():
+            return
+
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(RuntimeError(f"Coalesced call failed: {error!r}"))
+            # Followers are optional; don't warn about an unobserved failure
+            future.exception()
+
+    async def wait(self, future: asyncio.Future, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await a leader's result, running the call independently if the leader failed
+
+        Args:
+            future: Future returned by join()
+            fn: Call to run if the leader failed
+
+        Returns:
+            Tuple of (result, shared) where shared is False after a fallback
+        """
+        try:
+            return await asyncio.shield(future), True
+        except RuntimeError as e:
+            self.fallbacks += 1
+            logger.warning(f"{e}; running the call independently")
+            return await fn(), False
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run a call, or share the result of an identical call already in flight
+
+        Args:
+            key: Call key; concurrent calls with equal keys share one run
+            fn: Call to run
+
+        Returns:
+            Tuple of (result, shared) where shared is True if another caller ran it
+        """
+        future = self.join(key)
+        if future is not None:
+            return await self.wait(future, fn)
+
+        future = self.lead(key)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+
+        self.finish(key, future, result=result)
+        return result, False
+
+    def stats(self) -> dict:
+        """Coalescing counters"""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "fallbacks": self.fallbacks
+        }
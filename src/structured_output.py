@@ -0,0 +1,163 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+# JSON-schema keys the Gemini response_schema accepts
+_SCHEMA_KEYS = ("type", "format", "description", "nullable", "enum", "items", "properties", "required")
+
+# Characters that change the scanner's string/nesting state
+_STRUCTURAL = re.compile(r'[{}"\\]')
+
+# A comma directly before a closing bracket; only applied after a plain decode failed
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+@lru_cache(maxsize=None)
+def response_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Gemini response_schema for a pydantic model
+
+    The SDK rejects JSON-schema keywords it has no field for (titles, numeric
+    bounds), so the model's schema is reduced to the supported subset; the
+    bounds are still enforced when the response is validated.
+
+    Args:
+        model: Pydantic model the response must match
+
+    Returns:
+        Schema dict for GenerationConfig.response_schema
+    """
+    def reduce(schema: Dict[str, Any]) -> Dict[str, Any]:
+        reduced = {key: schema[key] for key in _SCHEMA_KEYS if key in schema}
+        if "properties" in reduced:
+            reduced["properties"] = {name: reduce(value) for name, value in reduced["properties"].items()}
+        if "items" in reduced:
+            reduced["items"] = reduce(reduced["items"])
+        return reduced
+
+    schema = reduce(model.model_json_schema())
+    schema.pop("description", None)  # the model's docstring is not an instruction
+    return schema
+
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the first JSON object in free-form model output
+
+    Scans once, tracking string and nesting state, so objects wrapped in
+    markdown fences or surrounded by prose are found without trying to decode
+    every prefix. Objects with trailing commas, and objects cut off at the
+    end of the text, are repaired.
+
+    Args:
+        text: Model output
+
+    Returns:
+        Decoded object, or None if the text holds no recoverable object
+    """
+    start = text.find("{")
+    if start == -1:
+        return None
+
+    # Common case: one object between the first and last brace (fences, prose)
+    last = text.rfind("}")
+    if last > start:
+        try:
+            decoded = json.loads(text[start:last + 1])
+            if isinstance(decoded, dict):
+                return decoded
+        except json.JSONDecodeError:
+            pass
+
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped_until = -1
+        end = -1
+
+        # Jump between structural characters instead of stepping through every one
+        for match in _STRUCTURAL.finditer(text, start):
+            index = match.start()
+            if index < escaped_until:
+                continue
+            char = match.group()
+            if in_string:
+                if char == "\\":
+                    escaped_until = index + 2
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    end = index + 1
+                    break
+
+        if end == -1:
+            # Truncated output: close the open string and objects
+            candidate = text[start:].rstrip().rstrip(",")
+            if in_string:
+                candidate += '"'
+            candidate += "}" * depth
+        else:
+            candidate = text[start:end]
+
+        decoded = _loads_object(candidate)
+        if decoded is not None:
+            return decoded
+        if end == -1:
+            return None
+        start = text.find("{", start + 1)
+
+    return None
+
+
+def _loads_object(candidate: str) -> Optional[Dict[str, Any]]:
+    """Decode a JSON object, retrying once without trailing commas"""
+    for attempt in (candidate, _TRAILING_COMMA.sub(r"\1", candidate)):
+        try:
+            decoded = json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(decoded, dict):
+            return decoded
+    return None
+
+
+def parse_model(text: str, model: Type[T]) -> Tuple[Optional[T], str]:
+    """
+    Parse model output into a pydantic model
+
+    Text that starts like a JSON object is validated directly (the
+    structured-output case); anything else, or text that fails, goes through
+    the tolerant extractor.
+
+    Args:
+        text: Model output
+        model: Pydantic model to validate against
+
+    Returns:
+        Tuple of (instance or None, result) where result is "ok", "recovered",
+        "invalid_json" or "invalid_schema"
+    """
+    if text.lstrip().startswith("{"):
+        try:
+            return model.model_validate_json(text), "ok"
+        except ValidationError:
+            pass
+
+    data = extract_json_object(text)
+    if data is None:
+        return None, "invalid_json"
+
+    try:
+        return model.model_validate(data), "recovered"
+    except ValidationError:
+        return None, "invalid_schema"
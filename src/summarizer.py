@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from .models import ConversationHistory
+from .prompt_builder import PromptBuilder
+from .rate_limiter import PRIORITY_BACKGROUND
+from .session_store import SessionStore
+from .token_budget import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationSummarizer:
+    """
+    Folds older exchanges into each session's rolling summary in the background
+
+    Runs as fire-and-forget tasks scheduled after a turn is recorded, so
+    requests never wait for it; until a summary run finishes, prompts keep
+    using the previous summary. At most one run is active per session, and
+    turns recorded meanwhile are folded in by the same task afterwards. A
+    failed run leaves the previous summary in place.
+    """
+
+    def __init__(self, client, sessions: SessionStore, keep_recent: int = 2, max_words: int = 150,
+                 max_tokens: int = 300, concurrency: int = 4, counter: Optional[TokenCounter] = None):
+        """
+        Args:
+            client: LLM client with get_response (OpenAIClient or GeminiClient)
+            sessions: Store the summarized sessions live in
+            keep_recent: Exchanges left raw in prompts and not summarized
+            max_words: Length requested from the model
+            max_tokens: Hard cap applied to the returned summary
+            concurrency: Summaries generated at once across all sessions
+            counter: Token counter used to enforce max_tokens
+        """
+        self.client = client
+        self.sessions = sessions
+        self.keep_recent = keep_recent
+        self.max_words = max_words
+        self.max_tokens = max_tokens
+        self.counter = counter
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self.runs = 0
+        self.failures = 0
+        self.seconds = 0.0
+
+    def schedule(self, session_id: str, history: ConversationHistory) -> bool:
+        """
+        Start summarizing a session if it has exchanges to fold in
+
+        Must be called from the event loop; returns immediately.
+
+        Args:
+            session_id: Session identifier
+            history: The session's conversation history
+
+        Returns:
+            Whether a new task was started
+        """
+        if session_id in self._tasks or not history.get_unsummarized_exchanges(self.keep_recent)[0]:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        task = loop.create_task(self._run(session_id, history))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+        return True
+
+    async def _run(self, session_id: str, history: ConversationHistory):
+        try:
+            while True:
+                exchanges, through = history.get_unsummarized_exchanges(self.keep_recent)
+                if not exchanges:
+                    return
+
+                prompt = PromptBuilder.create_summary_prompt(history.summary, exchanges, self.max_words)
+                start = time.perf_counter()
+                async with self._semaphore:
+                    summary = await self.client.get_response(prompt, priority=PRIORITY_BACKGROUND)
+                self.seconds += time.perf_counter() - start
+
+                if summary.startswith("Error:"):
+                    self.failures += 1
+                    logger.warning(f"Summarizing session {session_id} failed: {summary}")
+                    return
+
+                summary = summary.strip()
+                if self.counter is not None:
+                    summary = self.counter.truncate(summary, self.max_tokens)
+
+                # Rejected if the session was cleared or a newer summary landed meanwhile
+                if not history.set_summary(summary, through):
+                    return
+                self.runs += 1
+                self.sessions.touch(session_id)
+                logger.debug(f"Session {session_id} summarized through interaction {through}")
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Summarizing session {session_id} failed: {str(e)}")
+
+    async def wait_idle(self):
+        """Wait for every scheduled summary, including follow-up runs"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Get summarization statistics"""
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "in_flight": len(self._tasks),
+            "mean_seconds": self.seconds / (self.runs + self.failures) if self.runs + self.failures else 0.0
+        }
@@ -0,0 +1,111 @@
+import re
+import zlib
+import numpy as np
+from typing import List
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+
+CONTRACTIONS = {
+    "what's": "what is",
+    "who's": "who is",
+    "he's": "he is",
+    "she's": "she is",
+    "it's": "it is",
+    "you're": "you are",
+    "i'm": "i am",
+    "isn't": "is not",
+    "doesn't": "does not",
+    "don't": "do not",
+    "can't": "can not",
+    "won't": "will not",
+}
+
+# Function words plus the subject's name, which every query implies
+STOPWORDS = frozenset("""
+a about an and are as at be been brian by can could did do does for from had has have he her him his how i
+if in into is it its me my of on or our she so than that the their them then there these they this
+to tell us veau was we were what when where which who whom why will with would you your please
+""".split())
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize free text for exact matching
+
+    Lowercases, expands common contractions, drops punctuation and
+    collapses whitespace.
+
+    Args:
+        text: Text to normalize
+
+    Returns:
+        Normalized text
+    """
+    text = text.lower().replace("’", "'")
+    words = []
+    for word in text.split():
+        word = word.strip(".,!?;:\"()[]")
+        word = CONTRACTIONS.get(word, word)
+        if word.endswith("'s"):
+            word = word[:-2]
+        words.append(word)
+    return " ".join(TOKEN_PATTERN.findall(" ".join(words)))
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """
+    Split text into lowercase word tokens
+
+    Args:
+        text: Text to tokenize
+        drop_stopwords: Whether to drop common function words
+
+    Returns:
+        List of tokens
+    """
+    tokens = TOKEN_PATTERN.findall(normalize_text(text))
+    if drop_stopwords:
+        tokens = [token for token in tokens if token not in STOPWORDS]
+    return [_singular(token) for token in tokens]
+
+
+def _singular(token: str) -> str:
+    """Strip simple plural endings so plurals match their singular form"""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+class HashingVectorizer:
+    """Stateless bag-of-words vectorizer using the hashing trick"""
+
+    def __init__(self, n_features: int = 4096, ngram_range: tuple = (1, 2)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def transform(self, texts: List[str]) -> np.ndarray:
+        """
+        Vectorize texts into L2-normalized rows with sublinear term frequency
+
+        Args:
+            texts: Texts to vectorize
+
+        Returns:
+            Array of shape (len(texts), n_features)
+        """
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            low, high = self.ngram_range
+            for n in range(low, high + 1):
+                for i in range(len(tokens) - n + 1):
+                    gram = " ".join(tokens[i:i + n])
+                    matrix[row, zlib.crc32(gram.encode()) % self.n_features] += 1.0
+
+        np.log1p(matrix, out=matrix)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
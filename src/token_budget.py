@@ -0,0 +1,280 @@
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Pre-tokenizer split close to the one tiktoken's encodings use: contractions,
+# letter runs with their leading space, up to three digits, punctuation runs
+_PIECES = re.compile(r"'(?:s|t|re|ve|m|ll|d)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+", re.IGNORECASE)
+
+# Chat formatting overhead per message, and for priming the reply
+MESSAGE_OVERHEAD = 3
+REPLY_OVERHEAD = 3
+
+
+def _approximate_count(text: str) -> int:
+    """Offline token count: BPE-style pieces, long words split into several tokens"""
+    count = 0
+    for match in _PIECES.finditer(text):
+        piece = match.group()
+        stripped = piece.strip()
+        if not stripped:
+            count += 1
+        elif stripped[0].isalpha():
+            # Common words are one token; rarer long ones split every ~6 characters
+            count += max(1, math.ceil(len(stripped) / 6))
+        elif stripped[0].isdigit():
+            count += 1
+        else:
+            count += math.ceil(len(stripped) / 2)
+    return count
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken when it is installed, offline otherwise
+
+    The encoding is resolved once; if tiktoken is missing or cannot load its
+    BPE files (no network and no local cache), a regex approximation of the
+    same pre-tokenization is used. Counts are memoised, since the system
+    message and history turns are counted again on every request.
+    """
+
+    def __init__(self, model: str, cache_size: int = 4096):
+        """
+        Args:
+            model: Model whose encoding to use
+            cache_size: Number of distinct texts whose counts are kept
+        """
+        self.model = model
+        self.encoding = self._load_encoding(model)
+        self.backend = f"tiktoken:{self.encoding.name}" if self.encoding is not None else "approximate"
+        self._count = lru_cache(maxsize=cache_size)(self._count_uncached)
+
+    @staticmethod
+    def _load_encoding(model: str):
+        try:
+            import tiktoken
+        except ImportError:
+            logger.info("tiktoken not installed; using approximate token counts")
+            return None
+
+        try:
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"Could not load a tiktoken encoding ({str(e)}); using approximate token counts")
+            return None
+
+    def _count_uncached(self, text: str) -> int:
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return _approximate_count(text)
+
+    def count(self, text: str) -> int:
+        """Tokens in a text"""
+        return self._count(text) if text else 0
+
+    def count_message(self, message: Dict[str, str]) -> int:
+        """Tokens of one chat message, including its formatting overhead"""
+        return self.count(message["content"]) + MESSAGE_OVERHEAD
+
+    def count_messages(self, messages: Sequence[Dict[str, str]]) -> int:
+        """Tokens of a list of chat messages, including reply priming"""
+        return sum(self.count_message(message) for message in messages) + REPLY_OVERHEAD
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Shorten a text to at most max_tokens tokens at a word boundary
+
+        Args:
+            text: Text to shorten
+            max_tokens: Token limit
+
+        Returns:
+            The text itself if it fits, otherwise a prefix ending in " [...]"
+        """
+        if self.count(text) <= max_tokens:
+            return text
+
+        # Binary search on the character length; counts grow monotonically with it
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._count_uncached(text[:middle]) + 2 <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        prefix = text[:low].rsplit(" ", 1)[0] if " " in text[:low] else text[:low]
+        return f"{prefix} [...]" if prefix else ""
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model: str) -> TokenCounter:
+    """Process-wide counter for a model, so every estimate shares one encoding and count cache"""
+    return TokenCounter(model)
+
+
+@dataclass
+class PromptPlan:
+    """Sections selected for one prompt and the tokens each spends"""
+    resume_chunks: List[int] = field(default_factory=list)
+    history_messages: List[Dict[str, str]] = field(default_factory=list)
+    summary_message: Optional[Dict[str, str]] = None
+    spend: Dict[str, int] = field(default_factory=dict)
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.spend.values())
+
+
+class PromptBudgeter:
+    """
+    Fits prompt sections into an input token budget in priority order
+
+    The system message and the query are always kept. The remaining budget is
+    then spent on relevant resume chunks (best match first), the most recent
+    exchanges, and finally older exchanges; whatever does not fit is dropped.
+    A history exchange that only partly fits has its answer shortened.
+    """
+
+    def __init__(self, counter: TokenCounter, input_budget: int, recent_exchanges: int = 2):
+        """
+        Args:
+            counter: Token counter for the answer model
+            input_budget: Maximum prompt tokens
+            recent_exchanges: Exchanges counted as recent history
+        """
+        self.counter = counter
+        self.input_budget = input_budget
+        self.recent_exchanges = recent_exchanges
+
+    def plan(self, system_message: Dict[str, str], query_message: Dict[str, str],
+             resume_chunks: Sequence[Tuple[int, str]],
+             exchanges: Sequence[Tuple[Dict[str, str], Dict[str, str]]],
+             resume_header: str = "", summary_message: Optional[Dict[str, str]] = None) -> PromptPlan:
+        """
+        Select the sections of an answer prompt
+
+        Args:
+            system_message: Static system message
+            query_message: Final user message without resume excerpts
+            resume_chunks: (chunk id, text) candidates, most relevant first
+            exchanges: (user, assistant) message pairs, oldest first
+            resume_header: Text added to the query message along with the
+                first chunk
+            summary_message: Summary of turns older than the exchanges,
+                filled after them and shortened if only part of it fits
+
+        Returns:
+            Plan with the chosen chunk ids, the history messages (oldest first)
+            and the tokens spent and dropped per section
+        """
+        plan = PromptPlan()
+        plan.spend["system"] = self.counter.count_message(system_message) + REPLY_OVERHEAD
+        plan.spend["query"] = self.counter.count_message(query_message)
+        remaining = self.input_budget - plan.total
+
+        resume_tokens = 0
+        for chunk_id, text in resume_chunks:
+            # Chunks are joined by a blank line, roughly one token
+            tokens = self.counter.count(text) + 1
+            if not plan.resume_chunks:
+                tokens += self.counter.count(resume_header)
+            if tokens <= remaining:
+                plan.resume_chunks.append(chunk_id)
+                resume_tokens += tokens
+                remaining -= tokens
+            else:
+                plan.dropped["resume"] = plan.dropped.get("resume", 0) + tokens
+        plan.spend["resume"] = resume_tokens
+
+        selected = []
+        split = max(len(exchanges) - self.recent_exchanges, 0)
+        for section, pairs in (("history_recent", exchanges[split:]), ("history_older", exchanges[:split])):
+            offered = spent = 0
+            for user_msg, assistant_msg in reversed(pairs):
+                tokens = self.counter.count_message(user_msg) + self.counter.count_message(assistant_msg)
+                offered += tokens
+                if tokens <= remaining:
+                    selected.append((user_msg, assistant_msg))
+                    spent += tokens
+                    remaining -= tokens
+                    continue
+                # Shorten the first exchange that doesn't fit; everything older is dropped
+                trimmed = self._trim(user_msg, assistant_msg, remaining)
+                if trimmed is not None:
+                    selected.append(trimmed[:2])
+                    spent += trimmed[2]
+                remaining = 0
+            plan.spend[section] = spent
+            if offered > spent:
+                plan.dropped[section] = offered - spent
+
+        plan.history_messages = [message for pair in reversed(selected) for message in pair]
+
+        if summary_message is not None:
+            tokens = self.counter.count_message(summary_message)
+            if tokens > remaining and remaining - MESSAGE_OVERHEAD >= 16:
+                summary_message = {"role": summary_message["role"],
+                                   "content": self.counter.truncate(summary_message["content"],
+                                                                    remaining - MESSAGE_OVERHEAD)}
+                plan.dropped["history_summary"] = tokens - self.counter.count_message(summary_message)
+                tokens = self.counter.count_message(summary_message)
+            if tokens <= remaining:
+                plan.summary_message = summary_message
+                plan.spend["history_summary"] = tokens
+            else:
+                plan.dropped["history_summary"] = tokens
+        return plan
+
+    def _trim(self, user_msg: Dict[str, str], assistant_msg: Dict[str, str],
+              budget: int) -> Optional[Tuple[Dict[str, str], Dict[str, str], int]]:
+        """Shorten an exchange's answer to fit, or None if even the question doesn't fit"""
+        answer_budget = budget - self.counter.count_message(user_msg) - MESSAGE_OVERHEAD
+        if answer_budget < 16:
+            return None
+
+        trimmed = {"role": "assistant", "content": self.counter.truncate(assistant_msg["content"], answer_budget)}
+        return user_msg, trimmed, self.counter.count_message(user_msg) + self.counter.count_message(trimmed)
+
+    def fit_messages(self, messages: List[Dict[str, str]], keep_tail: int) -> List[Dict[str, str]]:
+        """
+        Drop the oldest history turns of a built prompt until it fits the budget
+
+        Used for prompts that extend an already budgeted one (revisions append
+        the first answer and the feedback).
+
+        Args:
+            messages: System messages (instructions, then an optional history
+                summary), history turns, then keep_tail final messages
+            keep_tail: Number of trailing messages that must be kept
+
+        Returns:
+            The messages, or a copy without the oldest history exchanges (and,
+            only if that is not enough, without the summary)
+        """
+        excess = self.counter.count_messages(messages) - self.input_budget
+        if excess <= 0:
+            return messages
+
+        history_end = len(messages) - keep_tail
+        head = 1
+        while head < history_end and messages[head]["role"] == "system":
+            head += 1
+
+        start = head
+        while excess > 0 and start + 1 < history_end:
+            excess -= self.counter.count_message(messages[start]) + self.counter.count_message(messages[start + 1])
+            start += 2
+        if excess > 0:
+            # Even without history the prompt is over budget: drop the summary too
+            return messages[:1] + messages[start:]
+        return messages[:head] + messages[start:]
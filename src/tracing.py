@@ -0,0 +1,86 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class RequestTrace:
+    """Collects per-stage wall-clock timings and token usage for a single request"""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.started_at = time.time()
+        self.spans: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        # (provider, "prompt" | "completion") -> tokens reported by the provider
+        self.tokens: Dict[Tuple[str, str], int] = {}
+        # Request-level labels such as the outcome, used by metrics and the trace sink
+        self.attributes: Dict[str, Any] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Time a stage of the request
+
+        Args:
+            name: Stage name; repeated stages accumulate
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """Add a measured duration to a stage"""
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int):
+        """Add to a named counter (e.g. prompt tokens per section)"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def add_usage(self, provider: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        """
+        Record token usage reported by an LLM provider
+
+        Args:
+            provider: Provider name (e.g. "openai", "gemini")
+            prompt_tokens: Input tokens billed for the call
+            completion_tokens: Output tokens billed for the call
+        """
+        for kind, value in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+            if value:
+                key = (provider, kind)
+                self.tokens[key] = self.tokens.get(key, 0) + int(value)
+
+    def set(self, name: str, value: Any):
+        """Set a request-level attribute"""
+        self.attributes[name] = value
+
+    def elapsed(self) -> float:
+        """Seconds since the trace started"""
+        return time.perf_counter() - self.start_time
+
+    def format_timings(self) -> str:
+        """Format stage timings as a single debug line"""
+        stages = ", ".join(f"{name}={seconds:.3f}s" for name, seconds in self.spans.items())
+        return f"{stages}, total={self.elapsed():.3f}s" if stages else f"total={self.elapsed():.3f}s"
+
+    def format_counters(self) -> str:
+        """Format counters as a single debug line"""
+        return ", ".join(f"{name}={value}" for name, value in self.counters.items()) or "none"
+
+    def format_usage(self) -> str:
+        """Format provider-reported token usage as a single debug line"""
+        return ", ".join(f"{provider}_{kind}={value}"
+                         for (provider, kind), value in self.tokens.items()) or "none"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable snapshot of the trace (for the JSONL trace sink)"""
+        return {
+            "started_at": round(self.started_at, 3),
+            "total_seconds": round(self.elapsed(), 6),
+            "spans": {name: round(seconds, 6) for name, seconds in self.spans.items()},
+            "prompt_tokens_estimated": dict(self.counters),
+            "usage": {f"{provider}_{kind}": value for (provider, kind), value in self.tokens.items()},
+            "attributes": dict(self.attributes)
+        }